@@ -0,0 +1,198 @@
+import argparse
+import json
+import os
+import random
+import re
+import signal
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from input_parser import LPParser
+from presolve import SCALINGS
+from simplex_solver import SimplexSolver
+from revised_simplex_solver import RevisedSimplexSolver
+from sparse_simplex_solver import SparseSimplexSolver
+from integer_simplex_solver import IntegerSimplexSolver
+from certified_simplex_solver import CertifiedSimplexSolver
+from results_store import ResultsStore
+
+SOLVERS = {"SimplexSolver": SimplexSolver, "RevisedSimplexSolver": RevisedSimplexSolver, "SparseSimplexSolver": SparseSimplexSolver,
+           "IntegerSimplexSolver": IntegerSimplexSolver, "CertifiedSimplexSolver": CertifiedSimplexSolver}
+
+def rule_name(pivot_rule):
+    """Name of a pivot rule in the results files and the results store: Dantzig -> dantzig, SteepestEdge -> steepest_edge."""
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", pivot_rule).lower()
+
+def results_file_name(pivot_rule):
+    """
+    Name of the per-rule results file read by the analysis notebooks:
+        - Dantzig -> dantzig_results.json
+        - SteepestEdge -> steepest_edge_results.json
+    """
+    return rule_name(pivot_rule) + "_results.json"
+
+def problem_sort_key(file_name):
+    """Sort 1.lp, 2.lp, ..., 10.lp numerically, and any other file names after them alphabetically."""
+    stem = os.path.splitext(file_name)[0]
+    return (0, int(stem), "") if stem.isdigit() else (1, 0, stem)
+
+def task_seed(seed, problem_path, pivot_rule):
+    """
+    Seed for one (problem, pivot rule) task, derived from the task itself rather than from the order
+    in which the pool runs the tasks, so that Random gives the same results for any number of workers.
+    """
+    return (seed + zlib.crc32(f"{problem_path}:{pivot_rule}".encode())) % 2**32
+
+class TaskTimeout(BaseException):
+    # Not an Exception, so that no except clause of the solvers can swallow it.
+    pass
+
+def raise_task_timeout(signum, frame):
+    raise TaskTimeout()
+
+def solve_task(problem_path, pivot_rule, solver_name, solver_options, seed, timeout, cache_dir=None):
+    """
+    Solve one problem with one pivot rule, in a worker process.
+
+    Returns:
+        The result dictionary of the solver with 'total_time' (ms) added, as in the notebooks.
+        Problems that exceed the timeout get status "Timeout", problems that raise get status "error".
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+
+    try:
+        lp_parser = LPParser()
+        lp_parser.parse_file(problem_path, cache_dir=cache_dir)
+        solver = SOLVERS[solver_name](pivot_rule, **solver_options)
+    except Exception as e:
+        return {"status": "error", "error_message": str(e), "value": None, "total_time": None}
+
+    # Only the solve is timed and limited, as in the notebooks. The limit is enforced with SIGALRM,
+    # so only on platforms that have it.
+    use_alarm = timeout is not None and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, raise_task_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    start_time = time.time()
+    try:
+        result = solver.solve(lp_parser)
+    except TaskTimeout:
+        result = {"status": "Timeout", "value": None}
+    except Exception as e:
+        result = {"status": "error", "error_message": str(e), "value": None}
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    end_time = time.time()
+
+    result['total_time'] = (end_time - start_time) * 1000
+    return result
+
+def find_problem_directories(path):
+    """Every directory under path (path included) holding .lp files, with those files in numerical order."""
+    problem_directories = {}
+    for directory, _, file_names in sorted(os.walk(path)):
+        lp_files = sorted([f for f in file_names if f.endswith('.lp')], key=problem_sort_key)
+        if len(lp_files) > 0:
+            problem_directories[directory] = lp_files
+    return problem_directories
+
+def solve_directory(path, pivot_rules, workers=None, solver="SimplexSolver", solver_options=None, seed=42, timeout=None, jsonl_path=None, cache_dir=None, store_path=None):
+    """
+    Solve every .lp file under path with every pivot rule, spreading the (problem, pivot rule) tasks over a process pool.
+
+    Each finished task is appended to a JSON Lines file right away. Once all tasks of a directory are done,
+    its results are written to one {rule}_results.json per pivot rule (e.g. 10x10/dantzig_results.json),
+    mapping each problem file name to its result, which is the layout the analysis notebooks read.
+
+    Args:
+        path: Root directory; it and all its sub-directories (e.g. one per size) are searched for .lp files.
+        pivot_rules: Pivot rules to run, e.g. ["Dantzig", "SteepestEdge"].
+        workers: Number of worker processes (default: number of CPUs).
+        solver: One of SOLVERS.
+        solver_options: Keyword arguments for the solver, e.g. {"arithmetic": "float64"}.
+        seed: Base seed; each task is seeded from it and from the task itself (see task_seed).
+        timeout: Seconds allowed per task, or None for no limit.
+        jsonl_path: Where to stream the results (default: path/results.jsonl).
+        cache_dir: Directory of the parsed model cache (see LPParser.parse_file), or None to parse every task from text.
+        store_path: SQLite results store (see results_store.py) to add each finished task to, as the result of suite
+            os.path.basename(path), or None for no store.
+
+    Returns:
+        {directory: {pivot_rule: {file_name: result}}}
+    """
+    if solver not in SOLVERS:
+        raise Exception(f"Unknown solver {solver}, expected one of {list(SOLVERS)}.")
+
+    solver_options = solver_options or {}
+    jsonl_path = jsonl_path or os.path.join(path, 'results.jsonl')
+    problem_directories = find_problem_directories(path)
+    store = ResultsStore(store_path) if store_path is not None else None
+    suite = os.path.basename(os.path.normpath(os.path.abspath(path)))
+
+    results = {directory: {pivot_rule: {} for pivot_rule in pivot_rules} for directory in problem_directories}
+    num_pending_tasks = {directory: len(lp_files) * len(pivot_rules) for directory, lp_files in problem_directories.items()}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor, open(jsonl_path, 'w') as jsonl_file:
+        futures = {}
+        for directory, lp_files in problem_directories.items():
+            for pivot_rule in pivot_rules:
+                for file_name in lp_files:
+                    problem_path = os.path.join(directory, file_name)
+                    future = executor.submit(solve_task, problem_path, pivot_rule, solver, solver_options,
+                                             task_seed(seed, os.path.relpath(problem_path, path), pivot_rule), timeout, cache_dir)
+                    futures[future] = (directory, pivot_rule, file_name)
+
+        for future in as_completed(futures):
+            directory, pivot_rule, file_name = futures[future]
+            result = future.result()
+            results[directory][pivot_rule][file_name] = result
+
+            jsonl_file.write(json.dumps({"directory": os.path.relpath(directory, path), "problem": file_name, "pivot_rule": pivot_rule, **result}) + '\n')
+            jsonl_file.flush()
+            if store is not None:
+                store.add_results(suite, os.path.relpath(directory, path), rule_name(pivot_rule), {file_name: result}, solver)
+
+            num_pending_tasks[directory] -= 1
+            if num_pending_tasks[directory] == 0:
+                write_directory_results(directory, results[directory], problem_directories[directory])
+                print(f'Done with {directory}. Results saved.')
+
+    if store is not None:
+        store.close()
+    return results
+
+def write_directory_results(directory, directory_results, lp_files):
+    for pivot_rule, rule_results in directory_results.items():
+        ordered_results = {file_name: rule_results[file_name] for file_name in lp_files}
+        with open(os.path.join(directory, results_file_name(pivot_rule)), 'w') as f:
+            json.dump(ordered_results, f, indent = 4)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve every .lp file under a directory with several pivot rules in parallel.")
+    parser.add_argument("path", help="Root directory of the problems.")
+    parser.add_argument("--pivot-rules", nargs="+", default=["Dantzig", "Bland", "Random", "SteepestEdge"])
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: number of CPUs).")
+    parser.add_argument("--solver", choices=list(SOLVERS), default="SimplexSolver")
+    parser.add_argument("--arithmetic", choices=["fraction", "float64"], default=None, help="Arithmetic of SimplexSolver.")
+    parser.add_argument("--presolve", action="store_true", help="Reduce each problem before solving it (see presolve.py).")
+    parser.add_argument("--scaling", choices=SCALINGS, default=None, help="Scale each problem before solving it (see presolve.py).")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds allowed per problem and pivot rule.")
+    parser.add_argument("--jsonl", default=None, help="Where to stream the results (default: PATH/results.jsonl).")
+    parser.add_argument("--cache-dir", default=None, help="Cache of parsed models, reused across pivot rules and runs.")
+    parser.add_argument("--store", default=None, help="SQLite results store to add the results to (see results_store.py).")
+    args = parser.parse_args()
+
+    solver_options = {} if args.arithmetic is None else {"arithmetic": args.arithmetic}
+    if args.presolve:
+        solver_options["presolve"] = True
+    if args.scaling is not None:
+        solver_options["scaling"] = args.scaling
+    solve_directory(args.path, args.pivot_rules, workers=args.workers, solver=args.solver, solver_options=solver_options,
+                    seed=args.seed, timeout=args.timeout, jsonl_path=args.jsonl, cache_dir=args.cache_dir, store_path=args.store)
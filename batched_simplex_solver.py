@@ -0,0 +1,259 @@
+from input_parser import LPParser
+from simplex_solver import SimplexSolver, SUMMED_STATISTICS
+import numpy as np
+import math
+import time
+
+class BatchedSimplexSolver(SimplexSolver):
+    """
+    Lockstep simplex method for many LPs of the same shape, over float64 data.
+
+    The K tableaux are stacked into one (K, m + 1, n + 2m + 1) array (one artificial column per row, unused on rows
+    with a non-negative RHS). Every iteration runs pricing, the Harris ratio test and the pivot of all the problems
+    that have not terminated yet as single vectorized operations, so that the Python overhead of an iteration is
+    paid once per batch instead of once per problem.
+
+    Each problem follows the same two-phase method, pivot rule and anti-cycling as SimplexSolver with
+    arithmetic="float64" and full pricing, and gets the same result dictionary. Times are per problem shares
+    of the batch: each iteration's time is split evenly among the problems it pivoted.
+    """
+    # Devex is only implemented on the full tableau of SimplexSolver.
+    PIVOT_RULES = ["Dantzig", "Bland", "Random", "SteepestEdge"]
+
+    def __init__(self, pivot_rule: str, feasibility_tol: float = None, optimality_tol: float = None, degenerate_pivot_limit: int = 10, batch_size: int = None):
+        """
+        Args:
+            pivot_rule: One of "Dantzig", "Bland", "Random" or "SteepestEdge".
+            feasibility_tol, optimality_tol, degenerate_pivot_limit: As for SimplexSolver.
+            batch_size: Largest number of problems stacked together (default: all of them), to bound memory.
+        """
+        super().__init__(pivot_rule, arithmetic="float64", feasibility_tol=feasibility_tol, optimality_tol=optimality_tol,
+                         degenerate_pivot_limit=degenerate_pivot_limit)
+        self.batch_size = batch_size
+
+    def solve(self, lp_parser: LPParser):
+        return self.solve_batch([lp_parser])[0]
+
+    def solve_batch(self, lp_parsers: list):
+        """
+        Solve LPs that all have the same number of variables and constraints.
+
+        Returns:
+            The list of result dictionaries, in the order of lp_parsers.
+        """
+        # Upper bounds of variables are solved as constraint rows here.
+        lp_parsers = [lp_parser.with_upper_bound_rows() if lp_parser.upper_bounds else lp_parser for lp_parser in lp_parsers]
+        shapes = set((len(lp_parser.variables), len(lp_parser.constraints)) for lp_parser in lp_parsers)
+        if len(shapes) > 1:
+            raise Exception(f"All problems of a batch must have the same shape, got {sorted(shapes)}.")
+
+        batch_size = self.batch_size or max(1, len(lp_parsers))
+        results = []
+        for start in range(0, len(lp_parsers), batch_size):
+            results += self.solve_stacked(lp_parsers[start:start + batch_size])
+
+        for result, lp_parser in zip(results, lp_parsers):
+            self.report_objective_value(result, lp_parser)
+        return results
+
+    def solve_stacked(self, lp_parsers: list):
+        K = len(lp_parsers)
+        self.num_variables = n = len(lp_parsers[0].variables)
+        self.num_constraints = m = len(lp_parsers[0].constraints)
+
+        # Columns are: original variables, slack variables, artificial variables (artificial n + m + i belongs to row i).
+        tableaux = np.zeros((K, m + 1, n + 2 * m + 1), dtype=np.float64)
+        basis = np.tile(np.arange(n, n + m), (K, 1))
+        allowed = np.ones((K, n + 2 * m), dtype=bool)
+        costs = np.zeros((K, n), dtype=np.float64)
+        variable_names = []
+
+        for k, lp_parser in enumerate(lp_parsers):
+            original_variables = sorted(list(lp_parser.variables), key=lambda x: self.sort_variables_key_function(x))
+            variable_idxs = {variable: j for j, variable in enumerate(original_variables)}
+            variable_names.append(original_variables + [f'_s{i+1}' for i in range(m)] + [f'_zzz{i+1}' for i in range(m)])
+
+            for i, var_dict in enumerate(lp_parser.constraints):
+                sign = -1 if var_dict['rhs'] < 0 else 1
+                for variable, coefficient in var_dict.items():
+                    if variable in variable_idxs:
+                        tableaux[k, i, variable_idxs[variable]] = float(coefficient) * sign
+                tableaux[k, i, -1] = float(var_dict['rhs']) * sign
+                tableaux[k, i, n + i] = sign
+
+                if sign == -1:
+                    # Phase 1 maximizes -1 * (sum of the artificial variables), made zero on the basic columns.
+                    tableaux[k, i, n + m + i] = 1
+                    tableaux[k, -1] -= tableaux[k, i]
+                    tableaux[k, -1, n + m + i] = 0
+                    basis[k, i] = n + m + i
+                else:
+                    allowed[k, n + m + i] = False
+
+            for variable, coefficient in lp_parser.obj_function.items():
+                costs[k, variable_idxs[variable]] = float(coefficient)
+
+        has_two_phases = np.any(basis >= n + m, axis=1)
+        results = [{"has_two_phases": True, "method": "primal"} if has_two_phases[k] else {"has_two_phases": False} for k in range(K)]
+
+        # Phase 1, for the problems with artificial variables.
+        phase_solution = self.solve_lockstep(tableaux, basis, allowed, has_two_phases.copy())
+        feasible = ~has_two_phases | ((phase_solution["status"] == "Optimal") & (np.abs(tableaux[:, -1, -1]) <= self.feasibility_tol))
+
+        for k in np.where(has_two_phases)[0]:
+            results[k]["first_phase_time"] = phase_solution["time"][k]
+            results[k]["num_pivot_steps_first_phase"] = int(phase_solution["num_pivot_steps"][k])
+            self.add_batch_statistics(results[k], phase_solution, k)
+            if not feasible[k]:
+                results[k]["status"] = "Infeasible"
+                results[k]["value"] = - np.inf
+
+            # Artificial columns never enter again. If some artificial variables are still basic (at zero), the columns
+            # with a positive Phase 1 reduced cost are left out as well, so that they stay at zero (as in SimplexSolver).
+            allowed[k, n + m:] = False
+            if np.any(basis[k] >= n + m):
+                nonbasic = np.ones(n + m, dtype=bool)
+                nonbasic[basis[k][basis[k] < n + m]] = False
+                allowed[k, :n + m] &= ~(nonbasic & (tableaux[k, -1, :n + m] > self.optimality_tol))
+
+        # Phase 2 (or the only phase), with the true objective made zero on the basic columns.
+        tableaux[:, -1] = 0
+        tableaux[:, -1, :n] = - costs
+        basic_costs = np.take_along_axis(tableaux[:, -1, :-1], basis, axis=1)
+        tableaux[:, -1] -= np.einsum('ki,kij->kj', basic_costs, tableaux[:, :-1])
+
+        phase_solution = self.solve_lockstep(tableaux, basis, allowed, feasible.copy())
+
+        for k in np.where(feasible)[0]:
+            if has_two_phases[k]:
+                results[k]["second_phase_time"] = phase_solution["time"][k]
+                results[k]["num_pivot_steps_second_phase"] = int(phase_solution["num_pivot_steps"][k])
+            else:
+                results[k]["first_phase_time"] = phase_solution["time"][k]
+                results[k]["num_pivot_steps"] = int(phase_solution["num_pivot_steps"][k])
+            self.add_batch_statistics(results[k], phase_solution, k)
+
+            results[k]["status"] = phase_solution["status"][k]
+            results[k]["value"] = float(tableaux[k, -1, -1]) if phase_solution["status"][k] == "Optimal" else math.inf
+            if not has_two_phases[k]:
+                results[k]["current_basis"] = [variable_names[k][j] for j in basis[k]]
+
+        return results
+
+    def add_batch_statistics(self, result, phase_solution, k):
+        for statistic in SUMMED_STATISTICS:
+            result[statistic] = result.get(statistic, 0) + phase_solution[statistic][k].item()
+
+    def solve_lockstep(self, tableaux, basis, allowed, active):
+        """
+        Run the primal simplex on the problems where active is True, all at once, until each is optimal or unbounded.
+        Only the columns where allowed is True can enter the basis. tableaux and basis are updated in place.
+
+        Returns:
+            Per-problem arrays: status, num_pivot_steps, time (ms), pricing_time (ms), num_priced_columns, num_degenerate_pivots
+            and num_bound_flips (always 0, as upper bounds are rows here).
+        """
+        K, m = basis.shape
+        status = np.full(K, "Optimal", dtype=object)
+        num_pivot_steps = np.zeros(K, dtype=np.int64)
+        phase_time = np.zeros(K)
+        pricing_time = np.zeros(K)
+        num_priced_columns = np.zeros(K, dtype=np.int64)
+        num_degenerate_pivots = np.zeros(K, dtype=np.int64)
+        degenerate_run = np.zeros(K, dtype=np.int64)
+        bland_fallback = np.zeros(K, dtype=bool)
+
+        while np.any(active):
+            iteration_start_time = time.perf_counter()
+            idx = np.where(active)[0]
+
+            reduced_costs = tableaux[idx, -1, :-1]
+            improving = (reduced_costs < -self.optimality_tol) & allowed[idx]
+            num_priced_columns[idx] += np.sum(allowed[idx], axis=1)
+
+            # Problems without an improving column are optimal.
+            has_improving = np.any(improving, axis=1)
+            active[idx[~has_improving]] = False
+            started = idx
+            idx, improving, reduced_costs = idx[has_improving], improving[has_improving], reduced_costs[has_improving]
+
+            pivot_columns = self.select_entering_columns(tableaux, idx, improving, reduced_costs, bland_fallback[idx])
+            pricing_done_time = time.perf_counter()
+
+            columns = tableaux[idx, :-1, pivot_columns]
+            leaving_rows, step_lengths = self.batched_ratio_test(columns, tableaux[idx, :-1, -1], basis[idx], bland_fallback[idx])
+
+            unbounded = leaving_rows == -1
+            status[idx[unbounded]] = "Unbounded"
+            active[idx[unbounded]] = False
+            idx, pivot_columns, leaving_rows, step_lengths = idx[~unbounded], pivot_columns[~unbounded], leaving_rows[~unbounded], step_lengths[~unbounded]
+
+            # Anti-cycling, as in SimplexSolver.record_step_length.
+            degenerate = step_lengths <= self.feasibility_tol
+            num_degenerate_pivots[idx[degenerate]] += 1
+            degenerate_run[idx] = np.where(degenerate, degenerate_run[idx] + 1, 0)
+            bland_fallback[idx] = degenerate & (degenerate_run[idx] >= self.degenerate_pivot_limit)
+
+            # Rank-one pivot of every problem on (leaving_rows[k], pivot_columns[k]).
+            pivot_rows = tableaux[idx, leaving_rows, :] / tableaux[idx, leaving_rows, pivot_columns][:, None]
+            pivot_columns_values = tableaux[idx, :, pivot_columns]
+            tableaux[idx] -= pivot_columns_values[:, :, None] * pivot_rows[:, None, :]
+            tableaux[idx, leaving_rows, :] = pivot_rows
+
+            basis[idx, leaving_rows] = pivot_columns
+            num_pivot_steps[idx] += 1
+
+            end_time = time.perf_counter()
+            pricing_time[started] += (pricing_done_time - iteration_start_time) * 1000 / len(started)
+            phase_time[started] += (end_time - iteration_start_time) * 1000 / len(started)
+
+        return {"status": status, "num_pivot_steps": num_pivot_steps, "time": phase_time, "pricing_time": pricing_time,
+                "num_priced_columns": num_priced_columns, "num_degenerate_pivots": num_degenerate_pivots, "num_bound_flips": np.zeros(K, dtype=np.int64)}
+
+    def select_entering_columns(self, tableaux, idx, improving, reduced_costs, bland_fallback):
+        """Apply the pivot rule to the improving columns of each problem; problems under the anti-cycling fallback use Bland's rule."""
+        first_improving = np.argmax(improving, axis=1)
+
+        if self.pivot_rule == "Dantzig":
+            pivot_columns = np.argmin(np.where(improving, reduced_costs, np.inf), axis=1)
+
+        elif self.pivot_rule == "Bland":
+            pivot_columns = first_improving
+
+        elif self.pivot_rule == "Random":
+            pivot_columns = np.argmax(np.where(improving, np.random.random(improving.shape), -1), axis=1)
+
+        elif self.pivot_rule == "SteepestEdge":
+            # Exact weights 1 + ||B^-1 a_j||^2, read off the stacked tableaux.
+            edge_weights = 1 + np.sum(tableaux[idx, :-1, :-1] ** 2, axis=1)
+            pivot_columns = np.argmax(np.where(improving, reduced_costs ** 2 / edge_weights, -1), axis=1)
+
+        else:
+            raise Exception(f"Unknown pivot rule {self.pivot_rule}.")
+
+        return np.where(bland_fallback, first_improving, pivot_columns)
+
+    def batched_ratio_test(self, columns, rhs, basis, bland_fallback):
+        """
+        Harris two-pass ratio test of SimplexSolver.ratio_test, for each row of columns / rhs / basis at once.
+
+        Returns:
+            (leaving_rows, step_lengths), with leaving_rows = -1 for problems whose entering column is unbounded.
+        """
+        eligible = columns > self.feasibility_tol
+        safe_columns = np.where(eligible, columns, 1)
+        rhs = np.maximum(rhs, 0)
+
+        ratios = np.where(eligible, rhs / safe_columns, np.inf)
+        max_steps = np.min(np.where(eligible, (rhs + self.feasibility_tol) / safe_columns, np.inf), axis=1)
+        candidates = eligible & (ratios <= max_steps[:, None])
+
+        if self.pivot_rule == "Bland":
+            bland_fallback = np.ones_like(bland_fallback)
+        largest_pivot = np.argmax(np.where(candidates, columns, -np.inf), axis=1)
+        smallest_basic_variable = np.argmin(np.where(candidates, basis, np.iinfo(basis.dtype).max), axis=1)
+        leaving_rows = np.where(bland_fallback, smallest_basic_variable, largest_pivot)
+
+        step_lengths = ratios[np.arange(len(leaving_rows)), leaving_rows]
+        leaving_rows[~np.any(eligible, axis=1)] = -1
+        return leaving_rows, step_lengths
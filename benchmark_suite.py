@@ -0,0 +1,267 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+import scipy
+from scipy.stats import mannwhitneyu
+
+from batch_runner import SOLVERS
+from dense_lp_generator import DenseLPGenerator
+from input_parser import LPParser
+from simplex_solver import SimplexSolver
+from sparse_lp_generator import SparseLPGenerator
+from suite_generator import generate_suite, size_folder_name
+
+PIVOT_RULES = SimplexSolver.PIVOT_RULES
+# Fixed instance sets: (generator, num_variables, num_constraints). Tall problems have more constraints than
+# variables, wide ones the other way round; only two_phase has negative RHS values.
+BENCHMARK_SETS = {
+    "balanced": (DenseLPGenerator(4), 30, 30),
+    "tall": (DenseLPGenerator(4), 15, 45),
+    "wide": (DenseLPGenerator(4), 45, 15),
+    "sparse": (SparseLPGenerator(4, density=0.1), 60, 60),
+    "one_phase": (DenseLPGenerator(4), 40, 40),
+    "two_phase": (DenseLPGenerator(4, allow_negative_rhs=True), 40, 40),
+}
+
+def generate_benchmark_sets(root_folder, set_names, num_problems, seed=42):
+    """
+    Write the problems of the given sets under root_folder/{set}/{n}x{m}/ (see suite_generator.generate_suite), unless they
+    are already there. The problems only depend on the set, the seed and their number, so every run times the same files.
+
+    Returns:
+        {set name: [problem paths]}
+    """
+    problem_paths = {}
+    for set_name in set_names:
+        generator, num_variables, num_constraints = BENCHMARK_SETS[set_name]
+        set_folder = os.path.join(root_folder, set_name)
+        size_folder = os.path.join(set_folder, size_folder_name(num_variables, num_constraints))
+        problem_paths[set_name] = [os.path.join(size_folder, f'{i+1}.lp') for i in range(num_problems)]
+        if not all(os.path.exists(path) for path in problem_paths[set_name]):
+            generate_suite(generator, set_folder, [(num_variables, num_constraints)], num_problems, seed=seed)
+    return problem_paths
+
+def build_tableau(lp_parser: LPParser, arithmetic: str):
+    """The first tableau of SimplexSolver.solve_standard_form (one artificial column per negative RHS, without the crash)."""
+    solver = SimplexSolver("Dantzig", arithmetic=arithmetic)
+    solver.num_constraints = len(lp_parser.constraints)
+    solver.num_variables = len(lp_parser.variables)
+    solver.negative_rhs_idxs = {i: 0 for i, constraint in enumerate(lp_parser.constraints) if constraint['rhs'] < 0}
+    return solver.build_tableau(lp_parser, len(solver.negative_rhs_idxs), flip_negative_rows=True)
+
+def num_pivot_steps(result):
+    return result.get("num_pivot_steps", 0) + result.get("num_pivot_steps_first_phase", 0) + result.get("num_pivot_steps_second_phase", 0)
+
+def time_benchmarks(benchmarks, warmup, repetitions):
+    """
+    Time every benchmark, a (name, run, problems) triple, on every problem: warmup untimed rounds, then repetitions timed ones
+    (time.perf_counter). Each round goes over all benchmarks, rather than repeating one benchmark back to back, so that the
+    samples of a benchmark are spread over the whole run and their spread includes the drift of the machine.
+
+    Returns:
+        {name: (samples, outputs)}: the total time (ms) over the problems of each repetition, and the output of run on
+        each problem in the first timed round.
+    """
+    for _ in range(warmup):
+        for _, run, problems in benchmarks:
+            for problem in problems:
+                run(problem)
+
+    timings = {name: (np.zeros(repetitions), []) for name, _, _ in benchmarks}
+    for repetition in range(repetitions):
+        for name, run, problems in benchmarks:
+            samples, outputs = timings[name]
+            for problem in problems:
+                start_time = time.perf_counter()
+                output = run(problem)
+                samples[repetition] += (time.perf_counter() - start_time) * 1000
+                if repetition == 0:
+                    outputs.append(output)
+    return {name: (samples.tolist(), outputs) for name, (samples, outputs) in timings.items()}
+
+def run_metadata(repo_folder=None):
+    """Machine, software and commit the benchmarks run on. The commit fields are None outside a git checkout."""
+    repo_folder = repo_folder or os.path.dirname(os.path.abspath(__file__))
+
+    def git(*command):
+        try:
+            process = subprocess.run(["git", *command], cwd=repo_folder, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        except OSError:
+            return None
+        return process.stdout.strip() if process.returncode == 0 else None
+
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": git("rev-parse", "HEAD"),
+        "branch": git("rev-parse", "--abbrev-ref", "HEAD"),
+        "dirty": None if status is None else status != "",
+        "machine": {"node": platform.node(), "platform": platform.platform(), "processor": platform.processor() or platform.machine(),
+                    "cpu_count": os.cpu_count()},
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+    }
+
+def run_benchmarks(root_folder, set_names=None, engines=("SimplexSolver",), pivot_rules=PIVOT_RULES, arithmetic="float64",
+                   num_problems=10, warmup=1, repetitions=5, seed=42):
+    """
+    Time, on every problem of every set:
+        - {set}/parse: LPParser.parse_file (without the model cache),
+        - {set}/build_tableau: the first tableau of SimplexSolver (see build_tableau),
+        - {set}/{engine}/{pivot_rule}: engine.solve for each engine (a name of batch_runner.SOLVERS) and each pivot rule
+          in engine.PIVOT_RULES. The other pairs (e.g. Devex with RevisedSimplexSolver) are skipped and listed in the
+          config as "skipped".
+    Benchmarks run in this process, one at a time, so that they do not compete for the CPU (see time_benchmarks).
+
+    Args:
+        arithmetic: Arithmetic of SimplexSolver (build_tableau and the SimplexSolver engine).
+        warmup: Untimed rounds over all benchmarks before the timed ones.
+        repetitions: Timed rounds; each gives one sample per benchmark, the total over the problems of its set.
+        seed: Seed of the problems (see generate_benchmark_sets). The Random rule is seeded with 0 before every run.
+
+    Returns:
+        dict: "metadata" (see run_metadata), "config" and "benchmarks", {name: {"samples_ms", "median_ms"}} with
+        num_pivot_steps (total over the set) for the solves.
+    """
+    set_names = list(set_names or BENCHMARK_SETS)
+    for engine in engines:
+        if engine not in SOLVERS:
+            raise Exception(f"Unknown solver {engine}, expected one of {list(SOLVERS)}.")
+    for pivot_rule in pivot_rules:
+        if not any(pivot_rule in solver.PIVOT_RULES for solver in SOLVERS.values()):
+            raise Exception(f"Unknown pivot rule {pivot_rule}, expected one of {SimplexSolver.PIVOT_RULES}.")
+    skipped = [f'{engine}/{pivot_rule}' for engine in engines for pivot_rule in pivot_rules if pivot_rule not in SOLVERS[engine].PIVOT_RULES]
+    if skipped:
+        print(f'Skipping unsupported engine / pivot rule pairs: {", ".join(skipped)}')
+    problem_paths = generate_benchmark_sets(os.path.join(root_folder, "problems"), set_names, num_problems, seed)
+
+    results = {
+        "metadata": run_metadata(),
+        "config": {"sets": {name: list(BENCHMARK_SETS[name][1:]) for name in set_names}, "engines": list(engines), "pivot_rules": list(pivot_rules),
+                   "skipped": skipped, "arithmetic": arithmetic, "num_problems": num_problems, "warmup": warmup, "repetitions": repetitions,
+                   "seed": seed},
+        "benchmarks": {},
+    }
+
+    def parse(path):
+        lp_parser = LPParser()
+        lp_parser.parse_file(path)
+        return lp_parser
+
+    def solve_with(engine, pivot_rule):
+        solver_options = {"arithmetic": arithmetic} if engine == "SimplexSolver" else {}
+        def solve(lp_parser):
+            random.seed(0)
+            np.random.seed(0)
+            return SOLVERS[engine](pivot_rule, **solver_options).solve(lp_parser)
+        return solve
+
+    benchmarks = []
+    for set_name in set_names:
+        lp_parsers = [parse(path) for path in problem_paths[set_name]]
+        benchmarks.append((f'{set_name}/parse', parse, problem_paths[set_name]))
+        benchmarks.append((f'{set_name}/build_tableau', lambda lp_parser: build_tableau(lp_parser, arithmetic), lp_parsers))
+        for engine in engines:
+            for pivot_rule in pivot_rules:
+                if pivot_rule not in SOLVERS[engine].PIVOT_RULES:
+                    continue
+                benchmarks.append((f'{set_name}/{engine}/{pivot_rule}', solve_with(engine, pivot_rule), lp_parsers))
+
+    for name, (samples, outputs) in time_benchmarks(benchmarks, warmup, repetitions).items():
+        benchmark = {"samples_ms": samples, "median_ms": float(np.median(samples))}
+        if not name.endswith("/parse") and not name.endswith("/build_tableau"):
+            benchmark["num_pivot_steps"] = sum(num_pivot_steps(output) for output in outputs)
+        results["benchmarks"][name] = benchmark
+        print(f'{name}: {benchmark["median_ms"]:.2f} ms')
+
+    return results
+
+def compare_runs(baseline, current, alpha=0.01, min_change=0.05):
+    """
+    Compare the benchmarks two runs have in common. A benchmark regressed (or improved) if its median time changed by
+    more than min_change (relative) and a one-sided Mann-Whitney U test on the samples is significant at level alpha.
+    With 5 repetitions per run, the smallest p-value the test can give is 1/252. alpha applies to each benchmark, so over
+    many benchmarks a few false alarms are expected at loose levels.
+
+    Returns:
+        [dict]: one per benchmark, with name, baseline_ms, current_ms (medians), change (relative), p_value, verdict
+        ("regression", "improvement" or "unchanged") and pivots_changed (the number of pivots differs, so the
+        change is in the algorithm rather than in the speed of the code).
+    """
+    comparisons = []
+    for name, benchmark in current["benchmarks"].items():
+        if name not in baseline["benchmarks"]:
+            continue
+        baseline_benchmark = baseline["benchmarks"][name]
+        change = benchmark["median_ms"] / baseline_benchmark["median_ms"] - 1
+        slower = mannwhitneyu(benchmark["samples_ms"], baseline_benchmark["samples_ms"], alternative="greater").pvalue
+        faster = mannwhitneyu(benchmark["samples_ms"], baseline_benchmark["samples_ms"], alternative="less").pvalue
+
+        if change > min_change and slower < alpha:
+            verdict, p_value = "regression", slower
+        elif change < -min_change and faster < alpha:
+            verdict, p_value = "improvement", faster
+        else:
+            verdict, p_value = "unchanged", min(slower, faster)
+        comparisons.append({"name": name, "baseline_ms": baseline_benchmark["median_ms"], "current_ms": benchmark["median_ms"], "change": change,
+                            "p_value": float(p_value), "verdict": verdict,
+                            "pivots_changed": benchmark.get("num_pivot_steps") != baseline_benchmark.get("num_pivot_steps")})
+    return comparisons
+
+def print_comparisons(comparisons, baseline, current):
+    print(f'Baseline {baseline["metadata"]["commit"]} ({baseline["metadata"]["timestamp"]}), '
+          f'current {current["metadata"]["commit"]} ({current["metadata"]["timestamp"]})')
+    if baseline["metadata"]["machine"] != current["metadata"]["machine"]:
+        print('Warning: the runs come from different machines.')
+    for comparison in comparisons:
+        if comparison["verdict"] == "unchanged" and not comparison["pivots_changed"]:
+            continue
+        pivots = ', pivots changed' if comparison["pivots_changed"] else ''
+        print(f'{comparison["verdict"].upper():12} {comparison["name"]}: {comparison["baseline_ms"]:.2f} -> {comparison["current_ms"]:.2f} ms '
+              f'({comparison["change"]:+.1%}, p = {comparison["p_value"]:.3g}{pivots})')
+    num_regressions = sum(comparison["verdict"] == "regression" for comparison in comparisons)
+    print(f'{num_regressions} regressions out of {len(comparisons)} benchmarks.')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time parsing, tableau construction and the solvers on fixed problem sets, and compare with an earlier run.")
+    parser.add_argument("path", help="Directory of the benchmark problems (path/problems) and results (path/results).")
+    parser.add_argument("--sets", nargs="+", choices=list(BENCHMARK_SETS), default=None, help="Problem sets (default: all).")
+    parser.add_argument("--engines", nargs="+", choices=list(SOLVERS), default=["SimplexSolver"])
+    parser.add_argument("--pivot-rules", nargs="+", default=PIVOT_RULES)
+    parser.add_argument("--arithmetic", choices=["fraction", "float64"], default="float64", help="Arithmetic of SimplexSolver.")
+    parser.add_argument("--num-problems", type=int, default=10, help="Number of problems per set.")
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", default=None, help="Results file of an earlier run to compare with.")
+    parser.add_argument("--alpha", type=float, default=0.01, help="Significance level of the comparison, per benchmark.")
+    parser.add_argument("--min-change", type=float, default=0.05, help="Smallest relative change of the median reported.")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.path, args.sets, args.engines, args.pivot_rules, args.arithmetic, args.num_problems,
+                             args.warmup, args.repetitions, args.seed)
+
+    results_folder = os.path.join(args.path, "results")
+    os.makedirs(results_folder, exist_ok=True)
+    commit = (results["metadata"]["commit"] or "unknown")[:8]
+    results_path = os.path.join(results_folder, f'{results["metadata"]["timestamp"].replace(":", "-")}_{commit}.json')
+    with open(results_path, 'w') as f:
+        json.dump(results, f, indent=4)
+    print(f'Results saved to {results_path}.')
+
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        comparisons = compare_runs(baseline, results, args.alpha, args.min_change)
+        print_comparisons(comparisons, baseline, results)
+        # A non-zero exit status lets scripts stop on regressions.
+        sys.exit(1 if any(comparison["verdict"] == "regression" for comparison in comparisons) else 0)
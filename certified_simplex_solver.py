@@ -0,0 +1,80 @@
+from input_parser import LPParser
+from integer_simplex_solver import IntegerSimplexSolver
+from simplex_solver import SimplexSolver
+import numpy as np
+import time
+
+class CertifiedSimplexSolver(SimplexSolver):
+    """
+    Mixed precision simplex: the problem is solved with the float64 tableau, and its final basis is then checked in
+    exact arithmetic. IntegerSimplexSolver.solve_from_basis builds the exact tableau of that basis once (B^-1 b and
+    the reduced costs), which certifies it if it is primal and dual feasible (or if it exactly shows the entering
+    column to be unbounded, or a row to be infeasible). Otherwise the exact solver goes on pivoting from that basis,
+    which is usually a few pivots away from the exact answer (basis repair).
+
+    The result holds the status and value of the exact check, together with:
+        - certified: True if the status and value were proven in exact arithmetic. It is only False if the repair
+          needed more than max_repair_pivots pivots per phase, in which case the float64 status and value are kept.
+        - num_repair_pivots: exact pivots (and bound flips) made after the float64 solve, 0 if its basis was certified.
+        - num_basis_repairs: basic variables of the float64 basis that had to be replaced, e.g. because their
+          columns are dependent in exact arithmetic.
+        - certification_time (ms).
+    """
+    def __init__(self, pivot_rule: str, max_repair_pivots: int = None, **options):
+        """
+        Args:
+            max_repair_pivots: Exact pivots allowed per phase when the float64 basis is not certified (None: no limit).
+            options: Options of SimplexSolver for the float64 solve, which always uses float64 arithmetic.
+        """
+        if "arithmetic" in options:
+            raise Exception("CertifiedSimplexSolver always solves in float64 and checks in exact arithmetic.")
+        super().__init__(pivot_rule, arithmetic="float64", **options)
+        self.exact_solver = IntegerSimplexSolver(pivot_rule, degenerate_pivot_limit=self.degenerate_pivot_limit)
+        self.exact_solver.pivot_limit = max_repair_pivots
+        self.exact_values = False
+
+    def solve_standard_form(self, lp_parser: LPParser):
+        final_solution = super().solve_standard_form(lp_parser)
+        self.exact_values = False
+        if self.tableau is None:
+            return final_solution
+
+        start_time = time.time()
+        at_upper_bound = list(self.fixed_at_upper_bound)
+        if self.complemented is not None:
+            at_upper_bound += [self.all_variables[j] for j in np.where(self.complemented)[0]]
+        exact_solution = self.exact_solver.solve_from_basis(lp_parser, list(self.current_basis), at_upper_bound)
+        final_solution["certification_time"] = (time.time() - start_time) * 1000
+
+        final_solution["certified"] = exact_solution["status"] != "PivotLimit"
+        final_solution["num_repair_pivots"] = (exact_solution.get("num_pivot_steps", 0) + exact_solution.get("num_pivot_steps_first_phase", 0)
+                                               + exact_solution.get("num_pivot_steps_second_phase", 0) + exact_solution.get("num_bound_flips", 0))
+        final_solution["num_basis_repairs"] = exact_solution.get("num_basis_repairs", 0)
+        if final_solution["certified"]:
+            final_solution["status"] = exact_solution["status"]
+            final_solution["value"] = exact_solution["value"]
+            self.exact_values = True
+        return final_solution
+
+    def infeasible_without_pivots(self):
+        # Infeasibility found before any tableau is built (from the bounds, or by the presolve) is found on the exact values of the problem.
+        final_solution = super().infeasible_without_pivots()
+        final_solution.update({"certified": True, "num_repair_pivots": 0, "num_basis_repairs": 0, "certification_time": 0})
+        return final_solution
+
+    def get_state(self):
+        state = super().get_state()
+        if state is not None:
+            # The float64 tableau may not be that of the certified basis, so resolve solves (and certifies) the problem again.
+            state.warm = False
+        return state
+
+    def get_variable_values(self):
+        """Values of the standard form variables, exact (as Fractions) if the last solve was certified."""
+        if not self.exact_values:
+            return super().get_variable_values()
+
+        values = self.exact_solver.get_variable_values()
+        if self.presolver is not None:
+            values = self.presolver.postsolve_values(values)
+        return values
@@ -1,5 +1,6 @@
 import random
 import numpy as np
+from lp_writer import GeneratedLP, instance_seeds, to_fixed_point, write_lp_file
 
 class DenseLPGenerator:
     def __init__(self, precision=2, allow_negative_rhs = False):
@@ -66,6 +67,39 @@ class DenseLPGenerator:
                 f.write(f'<= {round(rhs, self.precision)}\n')
             
             f.write('End')
-    
-    
-           
+
+    def draw_instance(self, rng, num_variables, num_constraints, scale_factor=5):
+        """
+        Draw a whole problem at once from a numpy.random.Generator, with the distribution of generate_dense_lp:
+        constraint rows of norm scale_factor, an objective of norm 10 and RHS values in [0, 10] (or [-10, 10]).
+
+        Returns:
+            (obj_coefficients, coefficients, rhs), rounded to the precision as fixed-point int64 arrays (see lp_writer.to_fixed_point).
+        """
+        obj_coefficients = rng.uniform(-1, 1, num_variables)
+        obj_coefficients = obj_coefficients / np.linalg.norm(obj_coefficients) * 10
+
+        coefficients = rng.uniform(-1, 1, (num_constraints, num_variables))
+        coefficients = coefficients / np.linalg.norm(coefficients, axis=1, keepdims=True) * scale_factor
+
+        rhs = rng.uniform(-10 if self.allow_negative_rhs else 0, 10, num_constraints)
+        return to_fixed_point(obj_coefficients, self.precision), to_fixed_point(coefficients, self.precision), to_fixed_point(rhs, self.precision)
+
+    def write_instance(self, filepath, rng, num_variables, num_constraints, maximize=True):
+        """Same as generate_dense_lp, but drawing from rng (see draw_instance) and writing the file in one call."""
+        obj_coefficients, coefficients, rhs = self.draw_instance(rng, num_variables, num_constraints)
+        write_lp_file(filepath, obj_coefficients, coefficients, rhs, self.precision, maximize)
+
+    def generate_instances(self, num_variables, num_constraints, num_problems, seed=42, values="fraction", maximize=True):
+        """
+        Yield num_problems problems of one size as GeneratedLP objects, which the solvers take as they are, without any file.
+        Problem i is the one suite_generator.generate_suite writes to {num_variables}x{num_constraints}/{i}.lp with the same seed.
+
+        Args:
+            values: "fraction" (exact, default) or "float", as in LPParser.parse_file.
+        """
+        for seed_sequence in instance_seeds(seed, num_variables, num_constraints, num_problems):
+            lp = GeneratedLP()
+            lp.load_instance(*self.draw_instance(np.random.default_rng(seed_sequence), num_variables, num_constraints), self.precision,
+                             maximize=maximize, values=values)
+            yield lp
@@ -1,90 +1,193 @@
 import subprocess
+import tempfile
 import time
 import os
+import re
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 
-def solve_problem_with_glpsol(file_path):
+GLPSOL_METHODS = ["simplex", "interior"]
+# Final messages of glpsol (simplex and interior point), used when the solution file gives no status.
+GLPSOL_STATUS_MESSAGES = [
+    ("OPTIMAL LP SOLUTION FOUND", "optimal"),
+    ("OPTIMAL SOLUTION FOUND", "optimal"),
+    ("LP HAS UNBOUNDED PRIMAL SOLUTION", "unbounded"),
+    ("LP HAS NO FEASIBLE SOLUTION", "infeasible"),
+    ("LP HAS NO PRIMAL FEASIBLE SOLUTION", "infeasible"),
+    ("PROBLEM HAS NO PRIMAL FEASIBLE SOLUTION", "infeasible"),
+    ("PROBLEM HAS NO FEASIBLE PRIMAL/DUAL SOLUTION", "infeasible"),
+    ("PROBLEM HAS NO DUAL FEASIBLE SOLUTION", "unbounded"),
+]
+# Iteration lines of the glpsol log, e.g. "*    12: obj =   7.3e+02 inf = ..." (simplex) or " 12: obj = ...; rpi = ..." (interior point).
+ITERATION_LINE = re.compile(r"^[ *]?\s*(\d+):\s+obj\s*=\s*(\S+?);?\s")
+TIME_USED_LINE = re.compile(r"Time used:\s*([0-9.]+)\s*secs")
+
+def parse_glpsol_output(output):
+    """
+    Statistics glpsol reports on stdout:
+        - status: from the final message, "undefined" if there is none.
+        - iterations: number of the last iteration line of the log (the last iteration is always logged).
+        - objective: objective of the last iteration line.
+        - time: "Time used" (seconds), i.e. the time of the solver itself, without process start and file reading.
+    """
+    status = "undefined"
+    for message, message_status in GLPSOL_STATUS_MESSAGES:
+        if message in output:
+            status = message_status
+            break
+
+    iterations, objective = None, None
+    for line in output.splitlines():
+        match = ITERATION_LINE.match(line)
+        if match:
+            iterations, objective = int(match.group(1)), float(match.group(2))
+
+    time_used = TIME_USED_LINE.search(output)
+    return {"status": status, "iterations": iterations, "objective": objective, "time": float(time_used.group(1)) if time_used else None}
+
+def parse_glpsol_solution(file_path):
+    """
+    Status and objective value of the "s bas" (simplex) or "s ipt" (interior point) line of a solution file
+    written with glpsol -w, or None if the file has no such line (e.g. the older format of GLPK < 4.57).
+    """
+    with open(file_path, 'r') as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) >= 7 and fields[:2] == ["s", "bas"]:
+                # s bas rows cols primal_status dual_status objective, with statuses u(ndefined), f(easible), i(nfeasible), n(o feasible).
+                primal_status, dual_status = fields[4], fields[5]
+                if primal_status == "f" and dual_status == "f":
+                    status = "optimal"
+                elif primal_status == "n":
+                    status = "infeasible"
+                elif dual_status == "n":
+                    status = "unbounded"
+                else:
+                    status = "undefined"
+                return {"status": status, "objective": float(fields[6])}
+            if len(fields) >= 6 and fields[:2] == ["s", "ipt"]:
+                # s ipt rows cols status objective, with status u(ndefined), o(ptimal), i(nfeasible), n(o feasible).
+                status = {"o": "optimal", "i": "infeasible", "n": "infeasible"}.get(fields[4], "undefined")
+                return {"status": status, "objective": float(fields[5])}
+    return None
+
+def run_glpsol(file_path, method, glpsol="glpsol", timeout=None):
+    """
+    Solve one problem with one glpsol method ("simplex" or "interior"), writing the solution to a temporary file.
+
+    Args:
+        glpsol: glpsol executable; any program with the same command line and output can stand in for it.
+        timeout: Seconds allowed for the run, or None for no limit.
+
+    Returns:
+        dict: status, time (reported by glpsol, seconds), wall_time (seconds, including process start and file reading),
+        iterations, objective (None unless optimal) and return_code. A run that exceeds the timeout gets status "timeout".
+    """
+    if method not in GLPSOL_METHODS:
+        raise Exception(f"Unknown glpsol method {method}, expected one of {GLPSOL_METHODS}.")
+    file_format = "--freemps" if file_path.lower().endswith('.mps') else "--lp"
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        solution_path = os.path.join(temporary_directory, "solution.txt")
+        start_time = time.time()
+        try:
+            process = subprocess.run(
+                [glpsol, file_format, file_path, f"--{method}", "-w", solution_path],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            return {"status": "timeout", "time": None, "wall_time": time.time() - start_time, "iterations": None, "objective": None, "return_code": None}
+        wall_time = time.time() - start_time
+
+        result = parse_glpsol_output(process.stdout + process.stderr)
+        solution = parse_glpsol_solution(solution_path) if os.path.exists(solution_path) else None
+
+    if solution is not None:
+        # An interior point run that stops on an infeasible problem leaves the solution status undefined; the log tells why.
+        if solution["status"] != "undefined":
+            result["status"] = solution["status"]
+        result["objective"] = solution["objective"]
+    if result["status"] != "optimal":
+        result["objective"] = None
+    result["wall_time"] = wall_time
+    result["return_code"] = process.returncode
+    return result
+
+def solve_problem_with_glpsol(file_path, glpsol="glpsol", timeout=None):
     """
     Solve a given LP problem using both GLPK simplex and interior point methods via glpsol.
-    
+
     Args:
-        file_path: Path to the LP problem file (.mps or other supported format)
-        
+        file_path: Path to the LP problem file (.lp, or .mps in free format)
+        glpsol: glpsol executable (see run_glpsol).
+        timeout: Seconds allowed per method, or None for no limit.
+
     Returns:
-        dict: A dictionary containing status, simplex_time, and interior_point_time
+        dict: A dictionary containing status, simplex_time, and interior_point_time (as reported by glpsol),
+        and the other statistics of run_glpsol for each method, prefixed by simplex_ / interior_
     """
+    return merge_method_results({method: run_glpsol(file_path, method, glpsol, timeout) for method in GLPSOL_METHODS})
+
+def merge_method_results(method_results):
+    """One result per problem from the results of run_glpsol per method, with the keys the notebooks read."""
     results = {}
-    
-    # SIMPLEX
-    start_time = time.time()
-    simplex_process = subprocess.run(
-        ["glpsol", "--lp", file_path, "--simplex"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
-    )
-    simplex_time = time.time() - start_time
-    
-    simplex_output = simplex_process.stdout + simplex_process.stderr
-    status = "undefined"
+    for method, result in method_results.items():
+        for key, value in result.items():
+            results[f'{method}_{key}'] = value
 
-    if "OPTIMAL LP SOLUTION FOUND" in simplex_output:
-        status = "optimal"
-    elif "LP HAS UNBOUNDED PRIMAL SOLUTION" in simplex_output:
-        status = "unbounded"
-    elif "LP HAS NO FEASIBLE SOLUTION" in simplex_output:
-        status = "infeasible"
-    elif "LP HAS NO PRIMAL FEASIBLE SOLUTION" in simplex_output:
-        status = "infeasible"
-    
-    results['status'] = status
-    results['simplex_time'] = simplex_time
-    results['simplex_return_code'] = simplex_process.returncode
-
-    # IPM
-    start_time = time.time()
-    interior_process = subprocess.run(
-        ["glpsol", "--lp", file_path, "--interior"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
-    )
-    interior_time = time.time() - start_time
-    
-    results['interior_point_time'] = interior_time
-    results['interior_return_code'] = interior_process.returncode
-    
+    results['status'] = results['simplex_status']
+    results['interior_point_time'] = results.pop('interior_time')
     return results
 
-def process_problem_set(problem_dir, output_json_path):
+def process_problem_set(problem_dir, output_json_path, workers=None, glpsol="glpsol", timeout=None):
     """
     Process all problems in a directory and save results to a JSON file.
-    
+    Each (problem, method) run is a task of a thread pool: the work happens in the glpsol processes,
+    so threads are enough to keep `workers` of them running at once.
+
     Args:
         problem_dir: Directory containing problem files
         output_json_path: Path to save the JSON results
+        workers: Number of glpsol processes run at once (default: number of CPUs).
+        glpsol: glpsol executable (see run_glpsol).
+        timeout: Seconds allowed per problem and method, or None for no limit.
     """
+    problem_files = sorted(f for f in os.listdir(problem_dir) if os.path.isfile(os.path.join(problem_dir, f)))
+    method_results = {problem_file: {} for problem_file in problem_files}
+    errors = {}
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = {}
+        for problem_file in problem_files:
+            for method in GLPSOL_METHODS:
+                future = executor.submit(run_glpsol, os.path.join(problem_dir, problem_file), method, glpsol, timeout)
+                futures[future] = (problem_file, method)
+
+        for future in tqdm(as_completed(futures), total=len(futures)):
+            problem_file, method = futures[future]
+            try:
+                method_results[problem_file][method] = future.result()
+            except Exception as e:
+                print(f"Error solving {problem_file}: {str(e)}")
+                errors[problem_file] = str(e)
+
     results = {}
-    problem_files = [f for f in os.listdir(problem_dir) if os.path.isfile(os.path.join(problem_dir, f))]
-    
-    for i in tqdm(range(len(problem_files))):
-        problem_file = problem_files[i]
-        file_path = os.path.join(problem_dir, problem_file)
-        
-        try:
-            problem_results = solve_problem_with_glpsol(file_path)
-            results[problem_file] = problem_results
-        except Exception as e:
-            print(f"Error solving {problem_file}: {str(e)}")
+    for problem_file in problem_files:
+        if problem_file in errors:
             results[problem_file] = {
                 "status": "error",
-                "error_message": str(e),
+                "error_message": errors[problem_file],
                 "simplex_time": None,
                 "interior_point_time": None
             }
-    
+        else:
+            results[problem_file] = merge_method_results(method_results[problem_file])
+
     with open(output_json_path, 'w') as f:
         json.dump(results, f, indent=2)
-    
-    return results
\ No newline at end of file
+
+    return results
@@ -1,6 +1,633 @@
 from fractions import Fraction
+import numpy as np
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+import tempfile
+
+# One token of an .lp file: a row name, a constant (optionally signed number, e.g. a right-hand side),
+# a term (optional sign and coefficient, then a variable), a lone sign (continued on the next line)
+# or a comparison operator.
+TOKEN_PATTERN = re.compile(r"""\s*(?:
+    (?P<label>[A-Za-z_][\w.]*)\s*:
+    |(?P<constant>[+-]?\s*(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?(?:/\d+)?)(?!\s*[\w./])
+    |(?P<sign>[+-])?\s*(?P<coefficient>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?(?:/\d+)?)?\s*(?P<name>[A-Za-z_][\w.]*)
+    |(?P<lone_sign>[+-])
+    |(?P<operator><=|>=|=<|=>|<|>|=)
+)""", re.VERBOSE)
+
+# Section headers of the .lp format (case insensitive), and the section they start.
+SECTIONS = {
+    "maximize": "objective", "maximum": "objective", "max": "objective",
+    "minimize": "objective", "minimum": "objective", "min": "objective",
+    "subject to": "constraints", "such that": "constraints", "st": "constraints", "s.t.": "constraints",
+    "bounds": "bounds", "bound": "bounds",
+    "general": "integers", "generals": "integers", "gen": "integers", "integers": "integers",
+    "binary": "integers", "binaries": "integers", "bin": "integers", "semi-continuous": "integers",
+    "end": "end",
+}
+OPERATORS = {"<=": "<=", "=<": "<=", "<": "<=", ">=": ">=", "=>": ">=", ">": ">=", "=": "="}
+INFINITY_NAMES = ["inf", "infinity"]
+VALUE_TYPES = ["fraction", "float"]
+MPS_FORMATS = ["free", "fixed"]
+# Columns of the fields of a fixed MPS data line.
+MPS_FIXED_FIELDS = [(1, 3), (4, 12), (14, 22), (24, 36), (39, 47), (49, 61)]
+# Part of the model cache key: bump it whenever a change of the parser changes the LPModel of a file.
+PARSER_VERSION = 1
+# Arrays of an LPModel, as saved in the model cache.
+MODEL_ARRAYS = ["obj", "obj_idxs", "rows", "cols", "values", "row_lower", "row_upper", "lower", "upper"]
+MODEL_VALUE_ARRAYS = ["obj", "values", "row_lower", "row_upper", "lower", "upper"]
+
+def parse_fraction(text):
+    """Fraction(text), with a faster path for plain decimals such as -1.828 (what the generators write)."""
+    if 'e' in text or 'E' in text or '/' in text:
+        return Fraction(text)
+    integer, _, decimals = text.partition('.')
+    return Fraction(int(integer + decimals), 10 ** len(decimals))
+
+def parse_float(text):
+    return float(Fraction(text)) if '/' in text else float(text)
+
+def model_cache_key(filename, values: str, mps_format: str):
+    """Key of the parsed model of a file in the model cache: a hash of its content, the parser version and the parse options."""
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        digest.update(f.read())
+    extension = os.path.splitext(filename)[1].lower()
+    digest.update(f"{PARSER_VERSION}:{extension}:{values}:{mps_format if extension == '.mps' else ''}".encode())
+    return digest.hexdigest()
+
+def fraction_arrays(values):
+    """
+    Numerators and denominators of an array of Fractions as two int64 arrays, with denominator 0 for -inf / inf.
+    Returns None if some of them do not fit in int64.
+    """
+    numerators, denominators = [], []
+    for value in values.tolist():
+        if isinstance(value, float):
+            numerators.append(1 if value > 0 else -1)
+            denominators.append(0)
+        else:
+            numerators.append(value.numerator)
+            denominators.append(value.denominator)
+    try:
+        return np.array(numerators, dtype=np.int64), np.array(denominators, dtype=np.int64)
+    except OverflowError:
+        return None
+
+def fractions_of(numerators, denominators):
+    """Inverse of fraction_arrays. Each distinct value is turned into a Fraction once, and shared by its entries."""
+    # Group equal (numerator, denominator) pairs by sorting (np.unique with axis=0 is several times slower).
+    order = np.lexsort((denominators, numerators))
+    sorted_numerators, sorted_denominators = numerators[order], denominators[order]
+    is_first = np.ones(len(order), dtype=bool)
+    is_first[1:] = (sorted_numerators[1:] != sorted_numerators[:-1]) | (sorted_denominators[1:] != sorted_denominators[:-1])
+
+    unique_values = np.empty(int(is_first.sum()), dtype=object)
+    unique_values[:] = [Fraction(numerator, denominator) if denominator != 0 else math.copysign(math.inf, numerator)
+                        for numerator, denominator in zip(sorted_numerators[is_first].tolist(), sorted_denominators[is_first].tolist())]
+    values = np.empty(len(order), dtype=object)
+    values[order] = unique_values[np.cumsum(is_first) - 1]
+    return values
+
+def tokenize(line, filename):
+    """
+    Split one line of an .lp file into tokens:
+        - ("label", name), ("constant", text), ("sign", text) and ("operator", text), with operators normalized to <=, >= and =,
+        - ("term", coefficient, variable), with the sign included in the coefficient text, e.g. "-1.5", "1".
+    """
+    tokens = []
+    idx = 0
+    for match in TOKEN_PATTERN.finditer(line):
+        if match.start() != idx:
+            break
+        idx = match.end()
+
+        if match.group('name') is not None:
+            coefficient = match.group('coefficient') or '1'
+            tokens.append(("term", '-' + coefficient if match.group('sign') == '-' else coefficient, match.group('name')))
+        elif match.group('label') is not None:
+            tokens.append(("label", match.group('label')))
+        elif match.group('constant') is not None:
+            tokens.append(("constant", match.group('constant').replace(' ', '')))
+        elif match.group('lone_sign') is not None:
+            tokens.append(("sign", match.group('lone_sign')))
+        else:
+            tokens.append(("operator", OPERATORS[match.group('operator')]))
+
+    if line[idx:].strip() != '':
+        raise Exception(f"Invalid term {line[idx:].strip()} in {filename}.")
+    return tokens
+
+# Array-based linear program in general form, as read from an .lp or .mps file in a single pass:
+#   maximize or minimize obj . x + obj_constant
+#   subject to row_lower <= A x <= row_upper, lower <= x <= upper,
+# with -inf / inf (math.inf) for missing bounds.
+class LPModel:
+    def __init__(self):
+        self.sense = "max"
+        self.variable_names = []         # variable of each column, in order of first appearance
+        self.variable_idxs = {}          # variable -> column
+        self.constraint_names = []
+        self.values_type = "fraction"
+        self.obj = None                  # objective coefficient of each column
+        self.obj_idxs = None             # columns that appear in the objective function
+        self.obj_constant = 0
+        self.rows, self.cols, self.values = None, None, None   # constraint matrix in COO format, sorted by row
+        self.row_lower, self.row_upper = None, None
+        self.lower, self.upper = None, None
+        self.num_variables = 0
+        self.num_constraints = 0
+
+    def start_parsing(self, values: str):
+        if values not in VALUE_TYPES:
+            raise Exception(f"Unknown value type {values}, expected one of {VALUE_TYPES}.")
+        self.__init__()
+        self.values_type = values
+        self.to_number = parse_fraction if values == "fraction" else parse_float
+
+        # Filled while parsing, then turned into arrays by finish_parsing.
+        self.obj_terms = {}
+        self.row_terms = []
+        self.row_bounds = []
+        self.bounds = {}
+
+    def finish_parsing(self):
+        self.num_variables = len(self.variable_names)
+        self.num_constraints = len(self.row_terms)
+        dtype = object if self.values_type == "fraction" else np.float64
+        zero = self.to_number('0')
+
+        rows, cols, coefficients = [], [], []
+        for i, terms in enumerate(self.row_terms):
+            for j in sorted(terms):
+                rows.append(i)
+                cols.append(j)
+                coefficients.append(terms[j])
+
+        self.obj = np.array([self.obj_terms.get(j, zero) for j in range(self.num_variables)], dtype=dtype)
+        self.obj_idxs = np.array(sorted(self.obj_terms), dtype=np.int64)
+        self.rows = np.array(rows, dtype=np.int64)
+        self.cols = np.array(cols, dtype=np.int64)
+        self.values = np.array(coefficients, dtype=dtype)
+        self.row_lower = np.array([lower for lower, _ in self.row_bounds], dtype=dtype)
+        self.row_upper = np.array([upper for _, upper in self.row_bounds], dtype=dtype)
+        self.lower = np.array([self.bounds.get(j, (zero, math.inf))[0] for j in range(self.num_variables)], dtype=dtype)
+        self.upper = np.array([self.bounds.get(j, (zero, math.inf))[1] for j in range(self.num_variables)], dtype=dtype)
+
+        del self.obj_terms, self.row_terms, self.row_bounds, self.bounds, self.to_number
+
+    def column_of(self, variable):
+        """Column of variable, which gets the next one on its first appearance."""
+        j = self.variable_idxs.get(variable)
+        if j is None:
+            j = self.variable_idxs[variable] = len(self.variable_names)
+            self.variable_names.append(variable)
+        return j
+
+    def add_term(self, terms, variable, coefficient):
+        """Add coefficient * variable to terms ({column: coefficient})."""
+        j = self.column_of(variable)
+        if j in terms:
+            terms[j] += coefficient
+        else:
+            terms[j] = coefficient
+
+    def set_bound(self, variable, lower=None, upper=None):
+        j = self.column_of(variable)
+        current_lower, current_upper = self.bounds.get(j, (self.to_number('0'), math.inf))
+        self.bounds[j] = (current_lower if lower is None else lower, current_upper if upper is None else upper)
+
+    def parse_file(self, filename, values: str = "fraction"):
+        """
+        Read a CPLEX-LP file line by line, with one tokenizer pass per line. Supported are Maximize / Minimize,
+        <=, >= and = rows, ranged rows (lo <= expression <= hi), constants in the objective and a Bounds section
+        (lower, upper, double and fixed bounds, free variables, -inf / inf). Integer sections are not supported.
+        Args:
+            values: "fraction" stores every value as an exact Fraction (object arrays), "float" as float64.
+        """
+        self.start_parsing(values)
+
+        section = None
+        row = None   # the constraint being read
+        with open(filename, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line == '' or line.startswith('\\'):
+                    continue
+
+                header = SECTIONS.get(line.lower())
+                if header is not None:
+                    if row is not None:
+                        self.end_constraint(row, filename)
+                        row = None
+                    if header == "objective":
+                        self.sense = "max" if line.lower().startswith("max") else "min"
+                    elif header == "integers":
+                        raise Exception(f"Integer variables are not supported, in {filename}.")
+                    section = header
+                    if section == "end":
+                        break
+                    continue
+
+                tokens = tokenize(line, filename)
+                if section == "objective":
+                    self.parse_objective_tokens(tokens, filename)
+                elif section == "constraints":
+                    row = self.parse_constraint_tokens(tokens, row, filename)
+                elif section == "bounds":
+                    self.parse_bound_tokens(tokens, line, filename)
+                else:
+                    raise Exception(f"Line {line} outside of any section in {filename}.")
+
+        if row is not None:
+            self.end_constraint(row, filename)
+        self.finish_parsing()
+
+    def parse_objective_tokens(self, tokens, filename):
+        # The objective name (e.g. obj:) is optional.
+        sign = ''
+        for token in tokens:
+            if token[0] == "term":
+                self.add_term(self.obj_terms, token[2], self.to_number(self.apply_sign(sign, token[1])))
+                sign = ''
+            elif token[0] == "constant":
+                self.obj_constant += self.to_number(self.apply_sign(sign, token[1]))
+                sign = ''
+            elif token[0] == "sign":
+                sign = token[1]
+            elif token[0] != "label":
+                raise Exception(f"Invalid term {token[1]} in the objective function in {filename}.")
+
+    def apply_sign(self, sign, text):
+        """Sign of a lone '-' (e.g. at the end of the previous line) applied to a coefficient text."""
+        if sign != '-':
+            return text
+        return text[1:] if text.startswith('-') else '-' + text.lstrip('+')
+
+    def parse_constraint_tokens(self, tokens, row, filename):
+        """
+        Feed the tokens of one line to the constraint being read, which is a dict with its name, terms and the
+        (operator, constant) pairs on the left and on the right of the expression. Returns the constraint still
+        being read, or None. A constraint ends with the constant on its right; one with a constant on its left
+        only (lo <= expression) ends at the next name or section.
+        """
+        for token in tokens:
+            if token[0] == "label":
+                if row is not None:
+                    self.end_constraint(row, filename)
+                row = {"name": token[1], "terms": {}, "left": None, "right": None, "operator": None, "sign": ''}
+                continue
+
+            if row is None:
+                # Unnamed constraint.
+                row = {"name": f'c{len(self.constraint_names) + 1}', "terms": {}, "left": None, "right": None, "operator": None, "sign": ''}
+
+            if token[0] == "sign":
+                row["sign"] = token[1]
+            elif token[0] == "term" and row["operator"] is None:
+                self.add_term(row["terms"], token[2], self.to_number(self.apply_sign(row["sign"], token[1])))
+                row["sign"] = ''
+            elif token[0] == "constant" and len(row["terms"]) == 0 and row["left"] is None:
+                row["left"] = [None, self.to_number(self.apply_sign(row["sign"], token[1]))]
+                row["sign"] = ''
+            elif token[0] == "operator" and len(row["terms"]) == 0 and row["left"] is not None and row["left"][0] is None:
+                row["left"][0] = token[1]
+            elif token[0] == "operator" and len(row["terms"]) > 0 and row["operator"] is None:
+                row["operator"] = token[1]
+            elif token[0] == "constant" and row["operator"] is not None and row["right"] is None:
+                row["right"] = (row["operator"], self.to_number(self.apply_sign(row["sign"], token[1])))
+                row["sign"] = ''
+                self.end_constraint(row, filename)
+                row = None
+            else:
+                raise Exception(f"Invalid term {token[-1]} in constraint {row['name']} in {filename}.")
+
+        return row
+
+    def end_constraint(self, row, filename):
+        """Turn the operators and constants on both sides of a constraint into its (row_lower, row_upper)."""
+        lower, upper = -math.inf, math.inf
+        if len(row["terms"]) == 0 or (row["left"] is None and row["right"] is None) or (row["operator"] is not None and row["right"] is None):
+            raise Exception(f"Constraint {row['name']} is incomplete in {filename}.")
+
+        if row["right"] is not None:
+            operator, constant = row["right"]
+            if operator in ("<=", "="):
+                upper = constant
+            if operator in (">=", "="):
+                lower = constant
+        if row["left"] is not None:
+            # constant <= expression is expression >= constant, and so on.
+            operator, constant = row["left"]
+            if operator in ("<=", "="):
+                lower = max(lower, constant)
+            if operator in (">=", "="):
+                upper = min(upper, constant)
+
+        self.constraint_names.append(row["name"])
+        self.row_terms.append(row["terms"])
+        self.row_bounds.append((lower, upper))
+
+    def parse_bound_tokens(self, tokens, line, filename):
+        """One bound: x free, l <= x, x >= l, x <= u, l <= x <= u, x = v (with -inf / inf as values)."""
+        items = []
+        for token in tokens:
+            if token[0] == "term" and token[2].lower() in INFINITY_NAMES:
+                items.append(("constant", -math.inf if token[1].startswith('-') else math.inf))
+            elif token[0] == "term" and token[2].lower() == "free" and len(items) == 1:
+                items.append(("free",))
+            elif token[0] == "term" and token[1] == '1':
+                items.append(("variable", token[2]))
+            elif token[0] == "constant":
+                items.append(("constant", self.to_number(token[1])))
+            elif token[0] == "operator":
+                items.append(("operator", token[1]))
+            else:
+                raise Exception(f"Unsupported bound {line} in {filename}.")
+
+        kinds = [item[0] for item in items]
+        if kinds == ["variable", "free"]:
+            self.set_bound(items[0][1], -math.inf, math.inf)
+        elif kinds == ["variable", "operator", "constant"]:
+            self.set_variable_bound(items[0][1], items[1][1], items[2][1])
+        elif kinds == ["constant", "operator", "variable"]:
+            # l <= x is x >= l.
+            reversed_operator = {"<=": ">=", ">=": "<=", "=": "="}[items[1][1]]
+            self.set_variable_bound(items[2][1], reversed_operator, items[0][1])
+        elif kinds == ["constant", "operator", "variable", "operator", "constant"]:
+            self.set_variable_bound(items[2][1], {"<=": ">=", ">=": "<=", "=": "="}[items[1][1]], items[0][1])
+            self.set_variable_bound(items[2][1], items[3][1], items[4][1])
+        else:
+            raise Exception(f"Unsupported bound {line} in {filename}.")
+
+    def set_variable_bound(self, variable, operator, value):
+        if operator == "<=":
+            self.set_bound(variable, upper=value)
+        elif operator == ">=":
+            self.set_bound(variable, lower=value)
+        else:
+            self.set_bound(variable, value, value)
+
+    def parse_mps(self, filename, values: str = "fraction", mps_format: str = "free"):
+        """
+        Read an MPS file: NAME, OBJSENSE (MAX / MIN, default MIN), ROWS, COLUMNS, RHS, RANGES, BOUNDS and ENDATA.
+        The first N row is the objective; integer markers and integer bound types are not supported.
+        Args:
+            mps_format: "free" splits the data lines on whitespace; "fixed" reads the fields from their
+                fixed columns (2-3, 5-12, 15-22, 25-36, 40-47, 50-61), so names may contain spaces.
+        """
+        if mps_format not in MPS_FORMATS:
+            raise Exception(f"Unknown MPS format {mps_format}, expected one of {MPS_FORMATS}.")
+        self.start_parsing(values)
+        self.sense = "min"
+
+        objective_row = None
+        row_idxs = {}       # row name -> index, for the constraint rows
+        row_types = []
+        rhs = {}
+        ranges = {}
+        section = None
+        with open(filename, 'r') as f:
+            for line in f:
+                if line.strip() == '' or line.startswith('*'):
+                    continue
+
+                if not line[0].isspace():
+                    # Section header, possibly with data on the same line (NAME x, OBJSENSE MAX).
+                    parts = line.split()
+                    section = parts[0].upper()
+                    if section == "OBJSENSE" and len(parts) > 1:
+                        self.sense = "max" if parts[1].upper().startswith("MAX") else "min"
+                    if section == "ENDATA":
+                        break
+                    continue
+
+                if mps_format == "fixed" and section != "OBJSENSE":
+                    fields = [line[start:end].strip() for start, end in MPS_FIXED_FIELDS]
+                    fields = [field for field in fields if field != ''] if section == "ROWS" else fields
+                else:
+                    fields = line.split()
+
+                if section == "OBJSENSE":
+                    self.sense = "max" if fields[0].upper().startswith("MAX") else "min"
+
+                elif section == "ROWS":
+                    row_type, name = fields[0].upper(), fields[1]
+                    if row_type == "N":
+                        objective_row = objective_row or name
+                    elif row_type in ("L", "G", "E"):
+                        row_idxs[name] = len(self.row_terms)
+                        self.constraint_names.append(name)
+                        self.row_terms.append({})
+                        row_types.append(row_type)
+                    else:
+                        raise Exception(f"Unknown row type {row_type} in {filename}.")
+
+                elif section == "COLUMNS":
+                    if "'MARKER'" in line:
+                        raise Exception(f"Integer variables are not supported, in {filename}.")
+                    if mps_format == "fixed":
+                        variable, pairs = fields[1], [(fields[2], fields[3]), (fields[4], fields[5])]
+                    else:
+                        variable, pairs = fields[0], list(zip(fields[1::2], fields[2::2]))
+                    self.column_of(variable)
+                    for row_name, value in pairs:
+                        if row_name == '':
+                            continue
+                        if row_name == objective_row:
+                            self.add_term(self.obj_terms, variable, self.to_number(value))
+                        elif row_name in row_idxs:
+                            self.add_term(self.row_terms[row_idxs[row_name]], variable, self.to_number(value))
+
+                elif section in ("RHS", "RANGES"):
+                    # The set name is optional in free MPS: the remaining fields are (row, value) pairs.
+                    if mps_format == "fixed":
+                        pairs = [(fields[2], fields[3]), (fields[4], fields[5])]
+                    else:
+                        pairs = list(zip(fields[len(fields) % 2::2], fields[len(fields) % 2 + 1::2]))
+                    for row_name, value in pairs:
+                        if row_name == '':
+                            continue
+                        if section == "RHS" and row_name == objective_row:
+                            # The RHS of the objective is minus its constant.
+                            self.obj_constant = - self.to_number(value)
+                        elif section == "RHS":
+                            rhs[row_name] = self.to_number(value)
+                        else:
+                            ranges[row_name] = self.to_number(value)
+
+                elif section == "BOUNDS":
+                    self.parse_mps_bound(fields, mps_format, filename)
+
+                elif section != "NAME":
+                    raise Exception(f"Unknown section {section} in {filename}.")
+
+        zero = self.to_number('0')
+        for name, i in row_idxs.items():
+            b = rhs.get(name, zero)
+            row_type = row_types[i]
+            lower, upper = (-math.inf, b) if row_type == "L" else (b, math.inf) if row_type == "G" else (b, b)
+            if name in ranges:
+                r = ranges[name]
+                if row_type == "L" or (row_type == "E" and r < 0):
+                    lower = b - abs(r)
+                if row_type == "G" or (row_type == "E" and r > 0):
+                    upper = b + abs(r)
+            self.row_bounds.append((lower, upper))
+
+        self.finish_parsing()
+
+    def parse_mps_bound(self, fields, mps_format, filename):
+        bound_type = fields[0].upper()
+        if mps_format == "fixed":
+            variable, value = fields[2], fields[3]
+        elif bound_type in ("FR", "MI", "PL"):
+            # The bound set name is optional, and these types have no value.
+            variable, value = fields[-1], ''
+        else:
+            variable, value = fields[-2], fields[-1]
+
+        if bound_type == "UP":
+            value = self.to_number(value)
+            # By convention, a negative upper bound with the default lower bound makes the variable unbounded below.
+            lower_bound = self.bounds.get(self.column_of(variable), (0, math.inf))[0]
+            self.set_bound(variable, -math.inf if value < 0 and lower_bound == 0 else None, value)
+        elif bound_type == "LO":
+            self.set_bound(variable, lower=self.to_number(value))
+        elif bound_type == "FX":
+            self.set_bound(variable, self.to_number(value), self.to_number(value))
+        elif bound_type == "FR":
+            self.set_bound(variable, -math.inf, math.inf)
+        elif bound_type == "MI":
+            self.set_bound(variable, lower=-math.inf)
+        elif bound_type == "PL":
+            self.set_bound(variable, upper=math.inf)
+        else:
+            raise Exception(f"Unsupported bound type {bound_type} in {filename}.")
+
+    def save(self, directory):
+        """
+        Write the model to directory: one .npy file per array (Fraction arrays as int64 numerator and denominator arrays,
+        see fraction_arrays) and index.json with the variable and constraint names and the scalars.
+        The directory is written under a temporary name and renamed, so that concurrent writers of the same model are safe.
+        Returns False, writing nothing, if a Fraction does not fit in int64.
+        """
+        arrays = {}
+        for name in MODEL_ARRAYS:
+            array = getattr(self, name)
+            if name in MODEL_VALUE_ARRAYS and self.values_type == "fraction":
+                split = fraction_arrays(array)
+                if split is None:
+                    return False
+                arrays[name + "_numerators"], arrays[name + "_denominators"] = split
+            else:
+                arrays[name] = array
+
+        parent_directory = os.path.dirname(os.path.abspath(directory))
+        os.makedirs(parent_directory, exist_ok=True)
+        temporary_directory = tempfile.mkdtemp(dir=parent_directory)
+        for name, array in arrays.items():
+            np.save(os.path.join(temporary_directory, name + ".npy"), array)
+        with open(os.path.join(temporary_directory, "index.json"), 'w') as f:
+            json.dump({"parser_version": PARSER_VERSION, "values_type": self.values_type, "sense": self.sense, "obj_constant": str(self.obj_constant),
+                       "variable_names": self.variable_names, "constraint_names": self.constraint_names}, f)
+
+        try:
+            os.rename(temporary_directory, directory)
+        except OSError:
+            # Another process saved the same model first.
+            shutil.rmtree(temporary_directory, ignore_errors=True)
+        return True
+
+    def load(self, directory):
+        """
+        Read a model written by save. The arrays are memory-mapped rather than read (float64 and index arrays are used as they
+        are); Fraction arrays are rebuilt from their numerators and denominators.
+        """
+        self.__init__()
+        with open(os.path.join(directory, "index.json"), 'r') as f:
+            index = json.load(f)
+
+        self.values_type = index["values_type"]
+        self.sense = index["sense"]
+        self.obj_constant = Fraction(index["obj_constant"]) if self.values_type == "fraction" else float(index["obj_constant"])
+        self.variable_names = index["variable_names"]
+        self.variable_idxs = {variable: j for j, variable in enumerate(self.variable_names)}
+        self.constraint_names = index["constraint_names"]
+
+        def load_array(name):
+            return np.load(os.path.join(directory, name + ".npy"), mmap_mode='r')
+
+        for name in MODEL_ARRAYS:
+            if name in MODEL_VALUE_ARRAYS and self.values_type == "fraction":
+                setattr(self, name, fractions_of(load_array(name + "_numerators"), load_array(name + "_denominators")))
+            else:
+                setattr(self, name, load_array(name))
+
+        self.num_variables = len(self.variable_names)
+        self.num_constraints = len(self.row_lower)
+
+    def load_arrays(self, obj_coefficients, coefficients, rhs, precision: int, values: str = "fraction", maximize: bool = True):
+        """
+        Build the model of max / min obj_coefficients^T x s.t. coefficients x <= rhs, x >= 0 directly from the fixed-point
+        int64 arrays of the generators (in units of 10^-precision, see lp_writer.to_fixed_point), with the same values
+        parse_file reads from the written file, but without writing or parsing any text. The variables are x1, ..., xn.
+        """
+        if values not in VALUE_TYPES:
+            raise Exception(f"Unknown value type {values}, expected one of {VALUE_TYPES}.")
+        self.__init__()
+        self.values_type = values
+        self.sense = "max" if maximize else "min"
+
+        coefficients = np.asarray(coefficients, dtype=np.int64)
+        self.num_constraints, self.num_variables = coefficients.shape
+        self.variable_names = [f"x{j+1}" for j in range(self.num_variables)]
+        self.variable_idxs = {variable: j for j, variable in enumerate(self.variable_names)}
+        self.constraint_names = [f"c{i+1}" for i in range(self.num_constraints)]
+
+        denominator = 10 ** precision
+        def to_values(fixed_point):
+            fixed_point = np.asarray(fixed_point, dtype=np.int64).reshape(-1)
+            if values == "fraction":
+                return fractions_of(fixed_point, np.full(len(fixed_point), denominator, dtype=np.int64))
+            return fixed_point / denominator
+
+        rows, cols = np.nonzero(coefficients)
+        self.rows, self.cols = rows.astype(np.int64), cols.astype(np.int64)
+        self.values = to_values(coefficients[rows, cols])
+        self.obj = to_values(obj_coefficients)
+        self.obj_idxs = np.flatnonzero(np.asarray(obj_coefficients)).astype(np.int64)
+
+        dtype = object if values == "fraction" else np.float64
+        zero = Fraction(0) if values == "fraction" else 0.0
+        self.row_lower = np.full(self.num_constraints, -math.inf, dtype=dtype)
+        self.row_upper = to_values(rhs)
+        self.lower = np.full(self.num_variables, zero, dtype=dtype)
+        self.upper = np.full(self.num_variables, math.inf, dtype=dtype)
+
+    def to_coo(self):
+        """Constraint matrix as (rows, cols, values) arrays."""
+        return self.rows, self.cols, self.values
+
+    def to_csr(self):
+        """Constraint matrix as (indptr, indices, values) arrays; the COO arrays are already sorted by row."""
+        indptr = np.zeros(self.num_constraints + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.rows, minlength=self.num_constraints), out=indptr[1:])
+        return indptr, self.cols, self.values
 
 # Class that defines a parser for .lp files, i.e. files that contain optimization programs.
+# The problem is read into an LPModel (self.model). variables, constraints and obj_function are a view of it in
+# the standard form the solvers use: maximize obj_function subject to constraints (all <=) and variables >= 0.
+#   - Minimize is turned into Maximize of the negated objective (obj_sign = -1).
+#   - >= rows are negated, = rows and ranged rows become two <= rows.
+#   - A variable with a finite lower bound l is shifted to x' = x - l >= 0, one with only a finite upper bound u
+#     is mirrored to x' = u - x >= 0, and a free variable x is split into x - x_neg. Finite upper bounds
+#     of shifted variables are kept as upper_bounds (x' <= u - l), not as rows.
+# objective_value maps the optimal value of the standard form back to the objective of the file.
 class LPParser:
     def __init__(self):
         self.num_variables = 0
@@ -8,104 +635,146 @@ class LPParser:
         self.variables = set()
         self.constraints = []
         self.obj_function = {}
-        
-    def parse_file(self, filename):
+        self.model = None
+
+        self.obj_sign = 1
+        self.obj_constant = 0
+        self.shifts = {}   # standard form variable -> its shift, signed by its direction (see objective_value)
+        self.upper_bounds = {}   # standard form variable -> its finite upper bound (0 <= x <= u), kept out of the constraints
+
+    def parse_file(self, filename, values: str = "fraction", mps_format: str = "free", cache_dir: str = None):
+        """
+        Read an .lp (CPLEX-LP) or .mps file, by extension.
+        Args:
+            values: "fraction" (exact, default) or "float".
+            mps_format: "free" or "fixed", for .mps files.
+            cache_dir: Directory of the model cache, or None. The parsed model of each file is saved there (see LPModel.save)
+                under a key made of the file content hash and the parser version (see model_cache_key), and loaded
+                from there instead of parsing the file again, e.g. once per pivot rule.
+        """
         self.__init__()
-        with open(filename, 'r') as f:
-            lines = f.readlines()
+        self.model = LPModel()
 
-        # Remove empty lines
-        non_empty_lines = [line.strip() for line in lines if (line != '' and line != '\n' and (not line.startswith('\\')))]
-        
-        line_idx = 0
-        while non_empty_lines[line_idx] != 'End':
-            line = non_empty_lines[line_idx]
-
-            if line == "Maximize":
-                # Assume only one objective function, could extend later.
-                # Also, remove whitespace in the next line.
-                self.parse_obj_function(non_empty_lines[line_idx + 1].replace(' ', ''), filename)
-                line_idx += 2
-            
-            elif line == "Subject To":
-                line_idx = self.parse_constraints(non_empty_lines, line_idx + 1, filename)
-        
-            # Now we have all constraints, and the objective function.
-            # However, need to update number of variables now, as maybe the objective function or constraints
-            # don't contain all variables
+        cache_path = None
+        if cache_dir is not None:
+            cache_path = os.path.join(cache_dir, model_cache_key(filename, values, mps_format))
+            if os.path.isdir(cache_path):
+                self.model.load(cache_path)
+                self.load_model(self.model)
+                return
 
-    def parse_obj_function(self, string_to_parse, filename):
-        parts = string_to_parse.split(":")
+        if filename.lower().endswith('.mps'):
+            self.model.parse_mps(filename, values, mps_format)
+        else:
+            self.model.parse_file(filename, values)
 
-        if len(parts) < 2:
-            raise Exception(f"Invalid objective function in {filename}.")
+        if cache_path is not None:
+            self.model.save(cache_path)
+        self.load_model(self.model)
 
-        # Assume everything is +, will do more later.
-        terms = self.preprocess_terms(parts[1])
-        terms = [t for t in terms.split('+') if t != '']
-        for term in terms:
-            coefficient, variable = self.split_coefficient_and_variable(term)
+    def load_arrays(self, obj_coefficients, coefficients, rhs, precision: int, values: str = "fraction", maximize: bool = True):
+        """Read a generated problem from its fixed-point arrays instead of a file (see LPModel.load_arrays)."""
+        self.__init__()
+        self.model = LPModel()
+        self.model.load_arrays(obj_coefficients, coefficients, rhs, precision, values, maximize)
+        self.load_model(self.model)
 
-            if coefficient == variable == None:
-                raise Exception(f"Invalid term in the objective function in {filename}.")
-            
-            if variable not in self.variables:
-                self.num_variables += 1
-                self.variables.add(variable)
-            self.obj_function[variable] = coefficient
+    def load_model(self, model: LPModel):
+        """Build the standard form view of an LPModel."""
+        self.obj_sign = 1 if model.sense == "max" else -1
+        self.obj_constant = model.obj_constant
+        self.shifts = {}
+        self.upper_bounds = {}
 
-    def split_coefficient_and_variable(self, expr):
-        idx = 0
+        # Each column becomes one or two standard form variables: (name, direction), with x = shift + direction * x'.
+        pieces = []
+        column_shifts = []
+        for j, name in enumerate(model.variable_names):
+            lower, upper = model.lower[j], model.upper[j]
+            if lower > -math.inf:
+                pieces.append([(name, 1)])
+                column_shifts.append(lower)
+                if upper < math.inf:
+                    self.upper_bounds[name] = upper - lower
+            elif upper < math.inf:
+                pieces.append([(name, -1)])
+                column_shifts.append(upper)
+            else:
+                pieces.append([(name, 1), (f'{name}_neg', -1)])
+                column_shifts.append(0)
 
-        try:
-            coefficient = ''
-            while idx < len(expr) and ('0' <= (expr[idx]) <= '9' or expr[idx] in ['-', '.', '/']):
-                coefficient += expr[idx]
-                idx += 1
+            if column_shifts[j] != 0:
+                self.shifts[name] = pieces[j][0][1] * column_shifts[j]
 
-            if idx == 0:
-                coefficient = Fraction(1)
+        self.variables = set(variable for column_pieces in pieces for variable, _ in column_pieces)
+        self.num_variables = len(self.variables)
 
-            elif idx == 1 and expr[0] == '-':
-                coefficient = Fraction(-1)
+        self.obj_function = {}
+        for j in model.obj_idxs.tolist():
+            for variable, direction in pieces[j]:
+                self.obj_function[variable] = self.obj_sign * direction * model.obj[j]
 
-            else:
-                coefficient = Fraction(coefficient)
+        # Row i is lower_i <= sum_j a_ij (shift_j + direction_j x'_j) <= upper_i.
+        row_entries = [[] for _ in range(model.num_constraints)]
+        for i, j, value in zip(model.rows.tolist(), model.cols.tolist(), model.values.tolist()):
+            row_entries[i].append((j, value))
 
-            return coefficient, expr[idx:]
-        except:
-            return None, None
-        
-    def preprocess_terms(self, terms_str):
-        terms_str = terms_str.replace('-', '+-')
-        return terms_str
-    
-    def parse_constraints(self, lines, starting_idx, filename):
-        # Iterate until the "End". To be changed when I add bounds.
-        for line_idx in range(starting_idx, len(lines) - 1):
-            line = lines[line_idx].replace(' ', '')
-            parts = line.split(':')
-            constraint_dict = {}
-
-            terms, bound = parts[1].split('<=')
-            constraint_dict['rhs'] = Fraction(bound)
-            terms = self.preprocess_terms(terms)
-            terms = [t for t in terms.split('+') if t != '']
-
-            for term in terms:
-                coefficient, variable = self.split_coefficient_and_variable(term)
-                if coefficient == variable == None:
-                    raise Exception(f"Invalid term in constraint {parts[0]} in {filename}.")
-                
-                if variable not in self.variables:
-                    self.num_variables += 1
-                    self.variables.add(variable)
-                constraint_dict[variable] = coefficient
-            
-            self.constraints.append(constraint_dict)
-            self.num_constraints += 1
-        
-        return len(lines) - 1
+        # Columns that are a single variable with direction 1 (the usual x >= 0) keep their coefficients as they are.
+        plain_variables = [column_pieces[0][0] if len(column_pieces) == 1 and column_pieces[0][1] == 1 else None for column_pieces in pieces]
+        shifted_columns = set(j for j, shift in enumerate(column_shifts) if shift != 0)
+
+        self.constraints = []
+        for i, entries in enumerate(row_entries):
+            shift = sum(value * column_shifts[j] for j, value in entries if j in shifted_columns) if shifted_columns else 0
+            if model.row_upper[i] < math.inf:
+                constraint = {'rhs': model.row_upper[i] - shift}
+                for j, value in entries:
+                    if plain_variables[j] is not None:
+                        constraint[plain_variables[j]] = value
+                        continue
+                    for variable, direction in pieces[j]:
+                        constraint[variable] = direction * value
+                self.constraints.append(constraint)
+            if model.row_lower[i] > -math.inf:
+                constraint = {'rhs': - (model.row_lower[i] - shift)}
+                for j, value in entries:
+                    for variable, direction in pieces[j]:
+                        constraint[variable] = - direction * value
+                self.constraints.append(constraint)
+
+        self.num_constraints = len(self.constraints)
+
+    def with_upper_bound_rows(self):
+        """
+        Copy of the standard form view where each upper bound x <= u is an extra constraint row instead,
+        for the solvers that have no bounded variables (all but SimplexSolver). The rows come after the constraints.
+        """
+        lp_parser = LPParser()
+        lp_parser.variables = set(self.variables)
+        lp_parser.constraints = [dict(constraint) for constraint in self.constraints]
+        lp_parser.obj_function = dict(self.obj_function)
+        lp_parser.model = self.model
+        lp_parser.obj_sign = self.obj_sign
+        lp_parser.obj_constant = self.obj_constant
+        lp_parser.shifts = dict(self.shifts)
+
+        one = Fraction(1) if self.model is None or self.model.values_type == "fraction" else 1.0
+        for variable, upper in self.upper_bounds.items():
+            lp_parser.constraints.append({'rhs': upper, variable: one})
+
+        lp_parser.num_variables = len(lp_parser.variables)
+        lp_parser.num_constraints = len(lp_parser.constraints)
+        return lp_parser
+
+    def objective_value(self, value):
+        """
+        Objective value of the problem in the file, given the optimal value of the standard form (maximize obj_function):
+        obj_sign * (value + sum of obj_function[x'] * shift of x') + obj_constant.
+        """
+        if abs(value) == math.inf:
+            return self.obj_sign * value
+        shift = sum(self.obj_function.get(variable, 0) * shift for variable, shift in self.shifts.items())
+        return float(self.obj_sign * (value + shift) + self.obj_constant)
 
     def stringify_equation(self, equation_dict):
         result = []
@@ -0,0 +1,314 @@
+from input_parser import LPParser
+from simplex_solver import SimplexSolver, EDGE_WEIGHT_RULES
+import numpy as np
+from fractions import Fraction
+import math
+
+# While the entries of the tableau (and its denominator) stay below this bound in absolute value, the tableau is an
+# int64 array: every product in a pivot is then below 2^62, and their difference below 2^63.
+INT64_PIVOT_BOUND = 2 ** 31
+
+class IntegerSimplexSolver(SimplexSolver):
+    """
+    Exact tableau simplex without Fractions in the tableau.
+
+    The standard form problem is scaled to integers once (see scale_to_integers), and the tableau is kept as
+    integers T with one shared denominator d > 0 (self.denominator), the tableau of SimplexSolver being T / d.
+    Pivots are fraction-free (Bareiss) updates, T'_i = (|p| T_i - sign(p) T_ic T_r) / d for every row i but the
+    pivot row r, where p = T_rc becomes the new denominator. The division is exact, as d is the determinant of the
+    basis (up to sign), so no gcd is computed and entries grow like determinants rather than like products of
+    Fractions. The tableau is an int64 array while its entries fit (see INT64_PIVOT_BOUND), with a bound on its
+    largest entry kept up to date at each pivot from the pivot row and column. The first pivot (or bound flip) that
+    could exceed it converts the tableau once to Python integers (an object array), which it stays for the rest of
+    the solve. Ratio tests compare the ratios of the integer entries by cross-multiplication.
+
+    Pricing, ratio tests and anti-cycling are those of SimplexSolver with exact Fractions, on the scaled problem:
+    the row scaling changes the units of the slack variables, so the pivot path can differ from SimplexSolver's,
+    but the status and the (exact) value are the same. The interface and the result dictionary are the same as
+    for SimplexSolver; warm starts (get_state / resolve) fall back to a full solve.
+    """
+    def __init__(self, pivot_rule: str, **options):
+        if "arithmetic" in options:
+            raise Exception("IntegerSimplexSolver always uses exact integer arithmetic.")
+        super().__init__(pivot_rule, arithmetic="fraction", **options)
+        self.denominator = 1
+        # Upper bound on the absolute values of the constraint rows of an int64 tableau.
+        self.max_entry = 0
+        self.column_scales = {}
+        self.objective_scale = 1
+
+    def solve_standard_form(self, lp_parser: LPParser):
+        final_solution = super().solve_standard_form(self.scale_to_integers(lp_parser))
+        return self.unscale_solution(final_solution, lp_parser)
+
+    def solve_from_basis(self, lp_parser: LPParser, basis: list, at_upper_bound=()):
+        final_solution = super().solve_from_basis(self.scale_to_integers(lp_parser), basis, at_upper_bound)
+        return self.unscale_solution(final_solution, lp_parser)
+
+    def unscale_solution(self, final_solution, lp_parser: LPParser):
+        # get_state keeps the problem that was given, not its integer copy.
+        self.lp_parser = lp_parser
+        if final_solution["status"] == "Optimal":
+            final_solution["value"] = float(self.exact_value())
+        return final_solution
+
+    def exact_value(self):
+        """Objective value of the final basis, as a Fraction."""
+        return Fraction(self.tableau[-1, -1]) / (self.denominator * self.objective_scale)
+
+    def scale_to_integers(self, lp_parser: LPParser):
+        """
+        Integer copy of the standard form problem (maximize c x subject to A x <= b, 0 <= x <= u):
+            - a variable with a fractional upper bound p / q is replaced by y = q x, whose upper bound is p,
+            - every row, the objective included, is multiplied by the lcm of the denominators of its values.
+        This only rescales the slack variables and the objective value; self.column_scales (the q of each replaced
+        variable) and self.objective_scale map the solution back.
+        """
+        self.column_scales = {}
+        upper_bounds = {}
+        for variable, upper in lp_parser.upper_bounds.items():
+            upper = Fraction(upper)
+            if upper.denominator != 1:
+                self.column_scales[variable] = upper.denominator
+            upper_bounds[variable] = upper.numerator
+
+        def integer_row(row):
+            row = {variable: Fraction(value) / self.column_scales.get(variable, 1) for variable, value in row.items()}
+            multiplier = math.lcm(*[value.denominator for value in row.values()])
+            return {variable: int(value * multiplier) for variable, value in row.items()}, multiplier
+
+        scaled = LPParser()
+        scaled.variables = set(lp_parser.variables)
+        scaled.constraints = [integer_row(constraint)[0] for constraint in lp_parser.constraints]
+        scaled.obj_function, self.objective_scale = integer_row(lp_parser.obj_function)
+        scaled.upper_bounds = upper_bounds
+        scaled.obj_sign = lp_parser.obj_sign
+        scaled.num_variables = len(scaled.variables)
+        scaled.num_constraints = len(scaled.constraints)
+        return scaled
+
+    def build_tableau(self, lp_parser: LPParser, num_artificials: int, flip_negative_rows: bool):
+        tableau = np.frompyfunc(int, 1, 1)(super().build_tableau(lp_parser, num_artificials, flip_negative_rows))
+        self.denominator = 1
+        self.max_entry = int(np.abs(tableau).max())
+        # The objective coefficients are written into the int64 tableau later on, so they must fit as well.
+        largest_objective = max([abs(coefficient) for coefficient in lp_parser.obj_function.values()], default=0)
+        if max(self.max_entry, largest_objective) < INT64_PIVOT_BOUND:
+            return tableau.astype(np.int64)
+        return tableau
+
+    def to_python_ints(self, tableau):
+        """Object array (Python integers) copy of an int64 tableau, which replaces it from then on, self.tableau included."""
+        self.tableau = tableau.astype(object)
+        return self.tableau
+
+    def set_objective_row(self, tableau, obj_function, current_basis):
+        """
+        SimplexSolver.set_objective_row on the scaled tableau: the objective is written times d before the basic columns
+        are eliminated. The row is computed in Python integers, and an int64 tableau is converted if it does not fit.
+        """
+        d = self.denominator
+        column_idxs = {variable: j for j, variable in enumerate(self.all_variables)}
+        objective = np.zeros(tableau.shape[1], dtype=object)
+        for variable, coefficient in obj_function.items():
+            if variable in column_idxs:
+                objective[column_idxs[variable]] = - coefficient * d
+            else:
+                objective[-1] += coefficient * self.fixed_at_upper_bound.get(variable, 0) * d
+        if self.complemented is not None:
+            for j in np.where(self.complemented)[0]:
+                objective[-1] -= objective[j] * self.upper_bounds[j]
+                objective[j] = - objective[j]
+        # A basic column is d times a unit column, so its objective entry is a multiple of d.
+        for idx, basic_variable in enumerate(current_basis):
+            basic_variable_idx = column_idxs[basic_variable]
+            if objective[basic_variable_idx] != 0:
+                objective -= tableau[idx].astype(object) * (objective[basic_variable_idx] // d)
+
+        if tableau.dtype == np.int64 and np.abs(objective).max() >= INT64_PIVOT_BOUND:
+            tableau = self.to_python_ints(tableau)
+        tableau[-1] = objective
+        return tableau
+
+    def basic_upper_bounds(self, current_basis):
+        # In the scale of the RHS column.
+        return super().basic_upper_bounds(current_basis) * self.denominator
+
+    def ratio_test(self, column, rhs, basic_variable_index, upper_bounds=None):
+        """
+        SimplexSolver.ratio_test on the integer entries, which share the denominator d: the ratios are compared by
+        cross-multiplication (see min_ratio_candidates). feasibility_tol is 0, so pass 1 is the minimum ratio and pass 2
+        breaks its ties.
+        """
+        eligible = np.where(column > 0)[0]
+        distances = rhs[eligible]
+        if upper_bounds is not None:
+            increasing = np.where((column < 0) & (upper_bounds < math.inf))[0]
+            eligible = np.concatenate([eligible, increasing])
+            distances = np.concatenate([distances, upper_bounds[increasing] - rhs[increasing]])
+        if len(eligible) == 0:
+            return -1, None
+
+        pivots = np.abs(column[eligible])
+        candidates, step_length = self.min_ratio_candidates(distances, pivots)
+        if len(candidates) > 1 and (self.pivot_rule == "Bland" or self.bland_fallback):
+            leaving = min(candidates, key=lambda k: basic_variable_index(eligible[k]))
+        else:
+            leaving = candidates[np.argmax(pivots[candidates])]
+
+        return eligible[leaving], step_length
+
+    def dual_ratio_test(self, row, reduced_costs):
+        """SimplexSolver.dual_ratio_test on the integer entries, with the ratios compared as in ratio_test."""
+        eligible = np.where(row < 0)[0]
+        if len(eligible) == 0:
+            return -1, None
+
+        pivots = - row[eligible]
+        candidates, step_length = self.min_ratio_candidates(reduced_costs[eligible], pivots)
+        if self.pivot_rule == "Bland" or self.bland_fallback:
+            entering = candidates[0]
+        else:
+            entering = candidates[np.argmax(pivots[candidates])]
+
+        return eligible[entering], step_length
+
+    @staticmethod
+    def min_ratio_candidates(numerators, denominators):
+        """
+        Indices of the smallest ratios numerators[i] / denominators[i] (denominators > 0), compared by cross-multiplication
+        instead of as Fractions: a pairwise tournament finds one smallest ratio, then one vectorized comparison finds its ties.
+        The products are taken in int64 if both arrays are int64 and below INT64_PIVOT_BOUND, in Python integers otherwise.
+
+        Returns:
+            (candidates, smallest ratio as a Fraction)
+        """
+        if not (numerators.dtype == np.int64 and denominators.dtype == np.int64
+                and max(np.abs(numerators).max(), denominators.max()) < INT64_PIVOT_BOUND):
+            numerators, denominators = numerators.astype(object), denominators.astype(object)
+
+        idxs = np.arange(len(numerators))
+        while len(idxs) > 1:
+            num_pairs = len(idxs) // 2
+            left, right = idxs[0:2 * num_pairs:2], idxs[1:2 * num_pairs:2]
+            right_smaller = (numerators[right] * denominators[left] < numerators[left] * denominators[right]).astype(bool)
+            idxs = np.concatenate([np.where(right_smaller, right, left), idxs[2 * num_pairs:]])
+        best = idxs[0]
+
+        candidates = np.where(numerators * denominators[best] == numerators[best] * denominators)[0]
+        return candidates, Fraction(numerators[best]) / int(denominators[best])
+
+    def select_entering_variable(self, negative_indices, reduced_costs):
+        # The edge weights are those of T / d (see init_edge_weights), and so are the reduced costs they are compared
+        # with, which also keeps their squares within float64.
+        if self.pivot_rule in EDGE_WEIGHT_RULES:
+            reduced_costs = reduced_costs / self.denominator
+        return super().select_entering_variable(negative_indices, reduced_costs)
+
+    def init_edge_weights(self, tableau):
+        # The weights are computed on the tableau of SimplexSolver, T / d.
+        super().init_edge_weights(tableau.astype(np.float64) / self.denominator)
+
+    def perform_pivot_operation(self, tableau, pivot_column: int, leaving_variable_index: int):
+        """
+        Fraction-free pivot on (leaving_variable_index, pivot_column), see the class docstring. The pivot row is kept
+        (times the sign of the pivot, so that the new denominator |p| is positive) and every other row is updated.
+        An int64 tableau is pivoted in int64 as long as self.max_entry, its objective row and d are below
+        INT64_PIVOT_BOUND; otherwise it is converted to Python integers first, and returned as such.
+        """
+        if tableau.dtype == np.int64:
+            if max(self.max_entry, np.abs(tableau[-1]).max(), self.denominator) < INT64_PIVOT_BOUND:
+                return self.int64_pivot(tableau, pivot_column, leaving_variable_index)
+            tableau = self.to_python_ints(tableau)
+
+        r = leaving_variable_index
+        pivot = int(tableau[r, pivot_column])
+        sign = 1 if pivot > 0 else -1
+        d = self.denominator
+
+        pivot_row = tableau[r].copy()
+        pivot_col = tableau[:, pivot_column] * sign
+        tableau[:-1] = (abs(pivot) * tableau[:-1] - np.outer(pivot_col[:-1], pivot_row)) // d
+
+        # The objective row can be off the integer lattice of the basis after the dual simplex shifts its costs
+        # (see reoptimize), in which case it keeps the exact quotient as Fractions.
+        numerators = abs(pivot) * tableau[-1] - pivot_col[-1] * pivot_row
+        if np.any(numerators % d != 0):
+            tableau[-1] = np.frompyfunc(Fraction, 2, 1)(numerators, d)
+        else:
+            tableau[-1] = numerators // d
+
+        tableau[r] = pivot_row * sign
+        self.denominator = abs(pivot)
+        return tableau
+
+    def int64_pivot(self, tableau, pivot_column: int, leaving_variable_index: int):
+        """perform_pivot_operation on an int64 tableau whose entries (and d) are below INT64_PIVOT_BOUND."""
+        r = leaving_variable_index
+        pivot = int(tableau[r, pivot_column])
+        sign = 1 if pivot > 0 else -1
+        d = self.denominator
+
+        pivot_row = tableau[r].copy()
+        pivot_col = tableau[:, pivot_column] * sign
+        numerators = abs(pivot) * tableau[-1] - pivot_col[-1] * pivot_row
+        if np.any(numerators % d != 0):
+            # The objective row leaves the integer lattice (see perform_pivot_operation), which needs Fractions.
+            return self.perform_pivot_operation(self.to_python_ints(tableau), pivot_column, leaving_variable_index)
+
+        column_max = int(np.abs(pivot_col[:-1]).max())
+        row_max = int(np.abs(pivot_row).max())
+        tableau[:-1] = (abs(pivot) * tableau[:-1] - np.outer(pivot_col[:-1], pivot_row)) // d
+        tableau[-1] = numerators // d
+        tableau[r] = pivot_row * sign
+        self.denominator = abs(pivot)
+
+        # Every new entry is (|p| T_ij - sign(p) T_ic T_rj) / d; the exact maximum is only taken when this bound is too large.
+        self.max_entry = (abs(pivot) * self.max_entry + column_max * row_max) // d
+        if self.max_entry >= INT64_PIVOT_BOUND:
+            self.max_entry = int(np.abs(tableau[:-1]).max())
+        return tableau
+
+    def complement_column(self, tableau, column: int):
+        # The RHS column gains u_j times the column: an int64 tableau is converted first if that may not fit.
+        if tableau.dtype == np.int64:
+            rhs_bound = int(np.abs(tableau[:, -1]).max()) + int(np.abs(tableau[:, column]).max()) * self.upper_bounds[column]
+            if rhs_bound >= INT64_PIVOT_BOUND:
+                tableau = self.to_python_ints(tableau)
+            else:
+                self.max_entry = max(self.max_entry, rhs_bound)
+        return super().complement_column(tableau, column)
+
+    def tableau_bit_lengths(self, tableau):
+        # The numerators are the integer entries, and the denominator is the shared one.
+        if tableau.dtype == np.int64:
+            return int(np.abs(tableau).max()).bit_length(), self.denominator.bit_length()
+        return int(np.frompyfunc(lambda value: value.numerator.bit_length(), 1, 1)(tableau).max()), self.denominator.bit_length()
+
+    def get_state(self):
+        state = super().get_state()
+        if state is not None:
+            # The tableau is scaled, so resolve solves the problem again instead.
+            state.warm = False
+        return state
+
+    def get_variable_values(self):
+        if self.tableau is None:
+            print('No LP has been solved yet, thus returning None.')
+            return None
+
+        values = {variable: 0 for variable in self.original_variables}
+        values.update(self.fixed_at_upper_bound)
+        for row, basic_variable in enumerate(self.current_basis):
+            if basic_variable in values:
+                values[basic_variable] = Fraction(self.tableau[row, -1]) / self.denominator
+        if self.complemented is not None:
+            for j in np.where(self.complemented)[0]:
+                if self.all_variables[j] in values:
+                    values[self.all_variables[j]] = self.upper_bounds[j] - values[self.all_variables[j]]
+        for variable, scale in self.column_scales.items():
+            values[variable] = Fraction(values[variable]) / scale
+
+        if self.presolver is not None:
+            values = self.presolver.postsolve_values(values)
+        return values
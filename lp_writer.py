@@ -0,0 +1,111 @@
+import numpy as np
+from input_parser import LPParser
+
+# Matrix entries formatted at once by format_rows, to bound the memory of the digit arrays.
+FORMAT_BLOCK_SIZE = 2 ** 18
+
+def instance_seeds(seed, num_variables, num_constraints, num_problems):
+    """
+    Independent seed streams of the problems 1.lp, ..., {num_problems}.lp of one size, spawned from
+    the base seed and the size, so that a problem does not depend on which other sizes are generated,
+    nor on the number of workers.
+    """
+    return np.random.SeedSequence(seed, spawn_key=(num_variables, num_constraints)).spawn(num_problems)
+
+def to_fixed_point(values, precision: int):
+    """Round float values to `precision` decimals, as int64 arrays in units of 10^-precision (the exact values written)."""
+    return np.rint(np.asarray(values, dtype=np.float64) * 10 ** precision).astype(np.int64)
+
+def format_number(value: int, precision: int):
+    """Decimal text of one fixed-point value."""
+    sign = "-" if value < 0 else ""
+    if precision == 0:
+        return f"{sign}{abs(value)}"
+    integer_part, fractional_part = divmod(abs(value), 10 ** precision)
+    return f"{sign}{integer_part}.{fractional_part:0{precision}d}"
+
+def format_rows(values, precision: int, names):
+    """
+    Text of the linear expressions sum_j values[i, j] names[j], one per row of the fixed-point matrix `values`,
+    with zero terms left out and "0 names[0]" for empty rows.
+
+    The text is built on byte arrays rather than term by term: every term is a fixed-width field
+    (sign, integer digits with leading zeros blanked, decimals, name), so that all digits of a block
+    of rows come from a few array operations, and the zero terms are then dropped with a mask.
+    """
+    values = np.atleast_2d(values)
+    num_rows, num_columns = values.shape
+    name_width = max(len(name) for name in names)
+    name_bytes = np.array([list(name.ljust(name_width).encode()) for name in names], dtype=np.uint8).reshape(num_columns, name_width)
+
+    integer_parts = np.abs(values) // 10 ** precision
+    num_integer_digits = len(str(int(integer_parts.max(initial=0))))
+    num_digits = num_integer_digits + precision
+    # Field: sign, integer digits, '.', decimals, ' ', name, ' '.
+    point_width = 1 if precision > 0 else 0
+    width = 1 + num_integer_digits + point_width + precision + 1 + name_width + 1
+    digit_powers = 10 ** np.arange(num_digits - 1, -1, -1, dtype=np.int64)
+
+    rows = []
+    block_rows = max(1, FORMAT_BLOCK_SIZE // max(1, num_columns * num_digits))
+    for start in range(0, num_rows, block_rows):
+        block = values[start:start + block_rows]
+        digits = ((np.abs(block)[:, :, None] // digit_powers) % 10 + ord('0')).astype(np.uint8)
+
+        fields = np.full(block.shape + (width,), ord(' '), dtype=np.uint8)
+        fields[:, :, 0] = np.where(block < 0, ord('-'), ord('+'))
+        integer_digits = digits[:, :, :num_integer_digits]
+        # Leading zeros of the integer part (but not its last digit) become spaces, e.g. "+ 3.2871".
+        integer_digits[:, :, :-1][np.cumprod(integer_digits[:, :, :-1] == ord('0'), axis=2).astype(bool)] = ord(' ')
+        fields[:, :, 1:1 + num_integer_digits] = integer_digits
+        if precision > 0:
+            fields[:, :, 1 + num_integer_digits] = ord('.')
+            fields[:, :, 2 + num_integer_digits:2 + num_digits] = digits[:, :, num_integer_digits:]
+        fields[:, :, width - 1 - name_width:width - 1] = name_bytes
+
+        nonzero = block != 0
+        text = fields[nonzero].tobytes().decode()
+        row_widths = np.count_nonzero(nonzero, axis=1) * width
+        for end, row_width in zip(np.cumsum(row_widths).tolist(), row_widths.tolist()):
+            rows.append(text[end - row_width:end] if row_width > 0 else f"0 {names[0]} ")
+    return rows
+
+def write_lp_file(filepath, obj_coefficients, coefficients, rhs, precision: int, maximize: bool = True, write_bounds: bool = False):
+    """
+    Write max / min obj_coefficients^T x s.t. coefficients x <= rhs, x >= 0 as an .lp file, from fixed-point arrays
+    (see to_fixed_point). The text is built in memory and written with a single call.
+
+    Args:
+        write_bounds: Also write the (default) bounds 0 <= x_j, as SparseLPGenerator does.
+    """
+    num_variables = len(obj_coefficients)
+    names = [f"x{j+1}" for j in range(num_variables)]
+    obj_row = format_rows(obj_coefficients, precision, names)[0]
+    constraint_rows = format_rows(coefficients, precision, names) if len(rhs) > 0 else []
+
+    lines = ['Maximize' if maximize else 'Minimize', f' obj: {obj_row}', 'Subject To']
+    lines += [f' c{i+1}: {row}<= {format_number(value, precision)}' for i, (row, value) in enumerate(zip(constraint_rows, rhs.tolist()))]
+    if write_bounds:
+        lines.append('Bounds')
+        lines += [f' 0 <= {name}' for name in names]
+    lines.append('End')
+
+    with open(filepath, 'w') as f:
+        f.write('\n'.join(lines))
+
+class GeneratedLP(LPParser):
+    """
+    A generated problem held in memory: an LPParser that can be passed to the solvers as it is (built from the
+    fixed-point arrays with LPParser.load_arrays, so without writing or parsing text), which keeps its arrays
+    to write the .lp file only when one is needed, e.g. for GLPK.
+    """
+    def load_instance(self, obj_coefficients, coefficients, rhs, precision: int, maximize: bool = True, write_bounds: bool = False, values: str = "fraction"):
+        self.load_arrays(obj_coefficients, coefficients, rhs, precision, values, maximize)
+        self.obj_coefficients, self.coefficients, self.rhs = obj_coefficients, coefficients, rhs
+        self.precision = precision
+        self.maximize = maximize
+        self.write_bounds = write_bounds
+
+    def write(self, filepath):
+        """Write the problem as the .lp file write_instance of its generator would have written."""
+        write_lp_file(filepath, self.obj_coefficients, self.coefficients, self.rhs, self.precision, self.maximize, self.write_bounds)
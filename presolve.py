@@ -0,0 +1,287 @@
+from input_parser import LPParser
+from fractions import Fraction
+import math
+
+SCALINGS = ["geometric", "equilibration"]
+# Passes of alternating row and column geometric mean scaling.
+GEOMETRIC_SCALING_PASSES = 4
+
+class Presolver:
+    """
+    Presolve of the standard form view of an LPParser (maximize obj_function subject to <= rows and
+    0 <= x <= upper_bounds), run between the parser and a solver, with the postsolve map back to it.
+
+    Reductions, repeated until none applies:
+        - rows that no x within the bounds can satisfy make the problem infeasible (e.g. an empty row with a negative RHS),
+        - singleton rows a x_j <= b become a bound on x_j: an upper bound, or a lower bound by which x_j is shifted,
+        - duplicate rows (positive multiples of each other) are merged into the tightest one,
+        - dominated rows, which hold for every x within the bounds implied by the other rows, are dropped,
+        - fixed columns (upper bound 0, also when implied by a row with non-negative coefficients and RHS 0)
+          and empty columns that have an optimal bound are removed, at that bound.
+    Rows and columns are then optionally scaled by powers of 2, which is exact in Fraction and float64 arithmetic alike:
+        - "geometric": a few alternating passes dividing each row and column by the geometric mean of its largest
+          and smallest coefficient,
+        - "equilibration": the largest coefficient of each row, then of each column, is scaled to about 1.
+    Scaling leaves the objective value unchanged; the reductions add a constant to it (postsolve).
+    """
+    def __init__(self, reduce: bool = True, scaling: str = None):
+        """
+        Args:
+            reduce: Apply the reductions.
+            scaling: None (no scaling), "geometric" or "equilibration".
+        """
+        if scaling is not None and scaling not in SCALINGS:
+            raise Exception(f"Unknown scaling {scaling}, expected one of {SCALINGS}.")
+
+        self.reduce = reduce
+        self.scaling = scaling
+
+    def presolve(self, lp_parser: LPParser):
+        """
+        Returns:
+            A new LPParser holding the presolved problem, or None if the presolve found the problem infeasible.
+            lp_parser is not modified.
+        """
+        self.original_variables = set(lp_parser.variables)
+        self.variables = set(lp_parser.variables)
+        self.constraints = [{variable: value for variable, value in constraint.items() if variable == 'rhs' or value != 0} for constraint in lp_parser.constraints]
+        self.obj_function = {variable: value for variable, value in lp_parser.obj_function.items() if value != 0}
+        self.upper_bounds = {variable: lp_parser.upper_bounds.get(variable, math.inf) for variable in self.variables}
+        self.exact = lp_parser.model is None or lp_parser.model.values_type == "fraction"
+
+        # Postsolve map: x = shifts[x] + column_scales[x] * x' for the variables left, x = shifts[x] + fixed_values[x] for the removed ones.
+        self.shifts = {}
+        self.fixed_values = {}
+        self.column_scales = {}
+        self.offset = 0
+        self.num_removed_rows = 0
+        self.num_removed_columns = 0
+
+        if self.reduce and not self.reduce_problem():
+            return None
+        self.num_removed_rows = len(lp_parser.constraints) - len(self.constraints)
+        self.num_removed_columns = len(lp_parser.variables) - len(self.variables)
+
+        if self.scaling is not None:
+            self.scale_problem()
+
+        presolved_lp_parser = LPParser()
+        presolved_lp_parser.variables = set(self.variables)
+        presolved_lp_parser.constraints = self.constraints
+        presolved_lp_parser.obj_function = self.obj_function
+        presolved_lp_parser.upper_bounds = {variable: upper for variable, upper in self.upper_bounds.items() if upper < math.inf}
+        presolved_lp_parser.model = lp_parser.model
+        presolved_lp_parser.num_variables = len(presolved_lp_parser.variables)
+        presolved_lp_parser.num_constraints = len(presolved_lp_parser.constraints)
+        return presolved_lp_parser
+
+    def postsolve(self, final_solution):
+        """
+        Map the result of the presolved problem back to the problem given to presolve (the objective constant of the reductions),
+        and report how much the presolve removed.
+        """
+        if final_solution["status"] == "Optimal":
+            final_solution["value"] = float(final_solution["value"] + self.offset)
+        final_solution["num_presolve_removed_rows"] = self.num_removed_rows
+        final_solution["num_presolve_removed_columns"] = self.num_removed_columns
+
+    def postsolve_values(self, values: dict):
+        """Values of the variables of the problem given to presolve, from values ({variable: value}) of the presolved problem."""
+        original_values = {}
+        for variable in self.original_variables:
+            if variable in self.fixed_values:
+                value = self.fixed_values[variable]
+            else:
+                value = values.get(variable, 0) * self.column_scales.get(variable, 1)
+            original_values[variable] = value + self.shifts.get(variable, 0)
+        return original_values
+
+    def reduce_problem(self):
+        """Apply the reductions until none applies. Returns False if the problem is infeasible."""
+        while True:
+            num_constraints, num_variables = len(self.constraints), len(self.variables)
+
+            if not self.reduce_singleton_rows() or not self.drop_redundant_rows():
+                return False
+            self.merge_duplicate_rows()
+            self.remove_fixed_columns()
+
+            if len(self.constraints) == num_constraints and len(self.variables) == num_variables:
+                return True
+
+    def reduce_singleton_rows(self):
+        kept_constraints = []
+        for constraint in self.constraints:
+            if len(constraint) != 2:
+                kept_constraints.append(constraint)
+                continue
+
+            variable, coefficient = next((variable, value) for variable, value in constraint.items() if variable != 'rhs')
+            bound = constraint['rhs'] / coefficient
+            if coefficient > 0:
+                if bound < 0:
+                    return False
+                self.upper_bounds[variable] = min(self.upper_bounds[variable], bound)
+            elif bound > 0:
+                if bound > self.upper_bounds[variable]:
+                    return False
+                self.shift_variable(variable, bound)
+
+        self.constraints = kept_constraints
+        return True
+
+    def shift_variable(self, variable: str, lower: float):
+        """Substitute x = lower + x' (x' >= 0) in the rows, the objective and the upper bound of x."""
+        for constraint in self.constraints:
+            if variable in constraint:
+                constraint['rhs'] -= constraint[variable] * lower
+        self.offset += self.obj_function.get(variable, 0) * lower
+        self.upper_bounds[variable] -= lower
+        self.shifts[variable] = self.shifts.get(variable, 0) + lower
+
+    def drop_redundant_rows(self):
+        """
+        Drop the rows whose largest activity within the implied bounds is at most their RHS. Returns False if a row's
+        smallest activity within the bounds is above its RHS. Columns with an implied upper bound of 0 get it as their bound.
+        Activities are screened in float64 and only checked exactly for the rows that may be dropped or infeasible.
+        """
+        # Upper bounds of each variable, smallest first, as (float bound, row it comes from, coefficient in that row): its own one,
+        # and b_i / a_ij from the rows with non-negative coefficients and RHS. A row is only dropped by the bounds of rows that are
+        # still there, other than itself, so that the rows that are kept imply every dropped one.
+        implied_bounds = {variable: [(float(upper), None, None)] for variable, upper in self.upper_bounds.items()}
+        for i, constraint in enumerate(self.constraints):
+            if constraint['rhs'] >= 0 and all(value > 0 for variable, value in constraint.items() if variable != 'rhs'):
+                rhs = float(constraint['rhs'])
+                for variable, value in constraint.items():
+                    if variable != 'rhs':
+                        implied_bounds[variable].append((rhs / float(value), i, value))
+        for bounds in implied_bounds.values():
+            bounds.sort(key=lambda bound: bound[0])
+
+        def exact_bound(variable, bound):
+            _, row, value = bound
+            return self.upper_bounds[variable] if row is None else self.constraints[row]['rhs'] / value
+
+        dropped_rows = set()
+        for i, constraint in enumerate(self.constraints):
+            rhs = float(constraint['rhs'])
+            margin = 1e-9 * (1 + abs(rhs))
+            row_bounds = []
+            min_activity = 0.0
+            max_activity = 0.0
+            for variable, value in constraint.items():
+                if variable == 'rhs':
+                    continue
+                if value < 0:
+                    min_activity += float(value) * float(self.upper_bounds[variable])
+                else:
+                    bound = next(bound for bound in implied_bounds[variable] if bound[1] != i and bound[1] not in dropped_rows)
+                    row_bounds.append((variable, value, bound))
+                    max_activity += float(value) * bound[0]
+
+            if min_activity > rhs - margin:
+                if sum(value * self.upper_bounds[variable] for variable, value in constraint.items() if variable != 'rhs' and value < 0) > constraint['rhs']:
+                    return False
+            if max_activity <= rhs + margin:
+                if sum(value * exact_bound(variable, bound) for variable, value, bound in row_bounds) <= constraint['rhs']:
+                    dropped_rows.add(i)
+
+        for variable, bounds in implied_bounds.items():
+            if exact_bound(variable, bounds[0]) == 0:
+                self.upper_bounds[variable] = 0
+        self.constraints = [constraint for i, constraint in enumerate(self.constraints) if i not in dropped_rows]
+        return True
+
+    def merge_duplicate_rows(self):
+        """
+        Keep one row out of rows that are positive multiples of each other, with the tightest of their RHS.
+        Rows are grouped by their float64 coefficients divided by the first one, and compared exactly within a group.
+        """
+        groups = {}
+        kept_constraints = []
+        for constraint in self.constraints:
+            terms = sorted((variable, value) for variable, value in constraint.items() if variable != 'rhs')
+            scale = abs(terms[0][1])
+            float_scale = float(scale)
+            key = tuple((variable, round(float(value) / float_scale, 9)) for variable, value in terms)
+
+            group = groups.setdefault(key, [])
+            duplicate = next((first for first in group if all(value * first[1] == first[0][variable] * scale for variable, value in terms)), None)
+            if duplicate is None:
+                group.append((constraint, scale))
+                kept_constraints.append(constraint)
+                continue
+
+            first_constraint, first_scale = duplicate
+            first_constraint['rhs'] = min(first_constraint['rhs'], constraint['rhs'] / scale * first_scale)
+        self.constraints = kept_constraints
+
+    def remove_fixed_columns(self):
+        """Remove the columns fixed at 0 by their bound, and the empty columns whose optimal value is a finite bound."""
+        column_counts = {variable: 0 for variable in self.variables}
+        for constraint in self.constraints:
+            for variable in constraint:
+                if variable != 'rhs':
+                    column_counts[variable] += 1
+
+        for variable in sorted(self.variables):
+            cost = self.obj_function.get(variable, 0)
+            if self.upper_bounds[variable] == 0 or (column_counts[variable] == 0 and cost <= 0):
+                value = 0
+            elif column_counts[variable] == 0 and self.upper_bounds[variable] < math.inf:
+                value = self.upper_bounds[variable]
+            else:
+                # Empty columns with a positive cost and no upper bound are left to the solver (unbounded if feasible).
+                continue
+
+            self.offset += cost * value
+            self.fixed_values[variable] = value
+            self.variables.remove(variable)
+            self.obj_function.pop(variable, None)
+            del self.upper_bounds[variable]
+            for constraint in self.constraints:
+                constraint.pop(variable, None)
+
+    def scale_problem(self):
+        """Scale row i by 2^row_exponents[i] and column x by 2^column_exponents[x] (x = 2^column_exponents[x] x')."""
+        log_entries = [(i, variable, math.log2(abs(value))) for i, constraint in enumerate(self.constraints)
+                       for variable, value in constraint.items() if variable != 'rhs']
+        row_exponents = [0] * len(self.constraints)
+        column_exponents = {variable: 0 for variable in self.variables}
+
+        def scaled_log_ranges(by_row: bool):
+            # (smallest, largest) log2 of the scaled coefficients of each row, or of each column.
+            ranges = {}
+            for i, variable, log_value in log_entries:
+                key = i if by_row else variable
+                log_value += row_exponents[i] + column_exponents[variable]
+                smallest, largest = ranges.get(key, (log_value, log_value))
+                ranges[key] = (min(smallest, log_value), max(largest, log_value))
+            return ranges
+
+        num_passes = GEOMETRIC_SCALING_PASSES if self.scaling == "geometric" else 1
+        for _ in range(num_passes):
+            for by_row in [True, False]:
+                for key, (smallest, largest) in scaled_log_ranges(by_row).items():
+                    target = (smallest + largest) / 2 if self.scaling == "geometric" else largest
+                    if by_row:
+                        row_exponents[key] -= round(target)
+                    else:
+                        column_exponents[key] -= round(target)
+
+        for i, constraint in enumerate(self.constraints):
+            for variable in constraint:
+                if variable != 'rhs':
+                    constraint[variable] *= self.power_of_two(row_exponents[i] + column_exponents[variable])
+            constraint['rhs'] *= self.power_of_two(row_exponents[i])
+
+        for variable, exponent in column_exponents.items():
+            if exponent == 0:
+                continue
+            self.column_scales[variable] = self.power_of_two(exponent)
+            if variable in self.obj_function:
+                self.obj_function[variable] *= self.column_scales[variable]
+            self.upper_bounds[variable] /= self.column_scales[variable]
+
+    def power_of_two(self, exponent: int):
+        return Fraction(2) ** exponent if self.exact else 2.0 ** exponent
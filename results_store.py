@@ -0,0 +1,272 @@
+import argparse
+import json
+import os
+import re
+import sqlite3
+
+from suite_generator import parse_size
+
+# Columns averaged by the store, as in the averages.json files. num_pivot_steps_total is num_pivot_steps for
+# one-phase results, and the pivots of both phases otherwise.
+AVERAGED_COLUMNS = ["total_time", "first_phase_time", "second_phase_time", "num_pivot_steps_first_phase",
+                    "num_pivot_steps_second_phase", "num_pivot_steps_total"]
+# Columns the aggregates are kept by, and the results queried by.
+KEY_COLUMNS = ["suite", "shape", "size", "rule", "solver", "has_two_phases", "status"]
+# Result keys stored in their own columns; the other scalar keys (e.g. num_bound_flips, certified) are kept as JSON.
+RESULT_COLUMNS = ["has_two_phases", "status", "value", "total_time", "first_phase_time", "second_phase_time",
+                  "num_pivot_steps_first_phase", "num_pivot_steps_second_phase", "num_pivot_steps"]
+
+SIZE_PATTERN = re.compile(r"^\d+x\d+$")
+
+def size_sort_key(size):
+    """Order '5x10', '10x5', '10x20', ... by (num_variables, num_constraints), with any other folder name first."""
+    return parse_size(size) if SIZE_PATTERN.match(size) else (0, 0)
+
+def split_directory(relative_directory):
+    """
+    'balanced_problems/50x100' -> ('balanced_problems', '50x100'): the shape is the path above the size folder,
+    and the size is '' for directories that are not a size folder.
+    """
+    parts = [part for part in relative_directory.replace(os.sep, "/").split("/") if part not in ("", ".")]
+    if len(parts) > 0 and SIZE_PATTERN.match(parts[-1]):
+        return "/".join(parts[:-1]), parts[-1]
+    return "/".join(parts), ""
+
+def result_row(suite, shape, size, problem, rule, solver, result):
+    """Values of one results row, for a result dictionary of the solvers (or of a *_results.json file)."""
+    num_variables, num_constraints = parse_size(size) if size else (None, None)
+    num_pivot_steps = result.get("num_pivot_steps")
+    if num_pivot_steps is None and result.get("num_pivot_steps_first_phase") is not None:
+        num_pivot_steps = result["num_pivot_steps_first_phase"] + (result.get("num_pivot_steps_second_phase") or 0)
+    extra = {key: value for key, value in result.items() if key not in RESULT_COLUMNS and not isinstance(value, (list, dict))}
+    return (suite, shape, size, num_variables, num_constraints, problem, rule, solver, int(bool(result.get("has_two_phases"))),
+            result.get("status") or "", result.get("value"), result.get("total_time"), result.get("first_phase_time"),
+            result.get("second_phase_time"), result.get("num_pivot_steps_first_phase"), result.get("num_pivot_steps_second_phase"),
+            num_pivot_steps, json.dumps(extra))
+
+class ResultsStore:
+    """
+    SQLite store of the results of batch_runner.py, one row per (problem, pivot rule, solver), which replaces
+    reloading the {rule}_results.json and averages*.json files of every size folder.
+
+    The rows are kept by suite (e.g. problems_pivot_rules_two_phases), shape (e.g. balanced_problems), size
+    (e.g. 50x50), problem, rule (e.g. steepest_edge), and solver; re-adding a result replaces it. Triggers keep
+    the sum and count of every column of AVERAGED_COLUMNS per KEY_COLUMNS group in the aggregates table as results
+    are added, replaced or deleted, so averages, relative performances and per-status breakdowns are GROUP BY
+    queries over those groups rather than over every result. The results table can also be queried directly
+    (store.connection), e.g. for per-problem comparisons.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.create_tables()
+
+    def create_tables(self):
+        averaged_columns = ", ".join(f"{column} REAL" for column in AVERAGED_COLUMNS[:3])
+        pivot_columns = ", ".join(f"{column} INTEGER" for column in AVERAGED_COLUMNS[3:5])
+        aggregate_columns = ", ".join(f"sum_{column} REAL NOT NULL DEFAULT 0, count_{column} INTEGER NOT NULL DEFAULT 0" for column in AVERAGED_COLUMNS)
+        keys = ", ".join(KEY_COLUMNS)
+
+        # The aggregates of the rows removed (OLD) and added (NEW) by a statement.
+        remove_old = (f"UPDATE aggregates SET num_results = num_results - 1, "
+                      + ", ".join(f"sum_{column} = sum_{column} - COALESCE(OLD.{column}, 0), count_{column} = count_{column} - (OLD.{column} IS NOT NULL)"
+                                  for column in AVERAGED_COLUMNS)
+                      + " WHERE " + " AND ".join(f"{key} = OLD.{key}" for key in KEY_COLUMNS) + ";"
+                      + " DELETE FROM aggregates WHERE num_results = 0;")
+        add_new = (f"INSERT INTO aggregates ({keys}, num_results, "
+                   + ", ".join(f"sum_{column}, count_{column}" for column in AVERAGED_COLUMNS)
+                   + ") VALUES (" + ", ".join(f"NEW.{key}" for key in KEY_COLUMNS) + ", 1, "
+                   + ", ".join(f"COALESCE(NEW.{column}, 0), NEW.{column} IS NOT NULL" for column in AVERAGED_COLUMNS)
+                   + f") ON CONFLICT ({keys}) DO UPDATE SET num_results = num_results + 1, "
+                   + ", ".join(f"sum_{column} = sum_{column} + excluded.sum_{column}, count_{column} = count_{column} + excluded.count_{column}"
+                               for column in AVERAGED_COLUMNS) + ";")
+
+        self.connection.executescript(f"""
+            CREATE TABLE IF NOT EXISTS results (
+                suite TEXT NOT NULL, shape TEXT NOT NULL, size TEXT NOT NULL, num_variables INTEGER, num_constraints INTEGER,
+                problem TEXT NOT NULL, rule TEXT NOT NULL, solver TEXT NOT NULL, has_two_phases INTEGER NOT NULL, status TEXT NOT NULL,
+                value REAL, {averaged_columns}, {pivot_columns}, num_pivot_steps_total INTEGER, extra TEXT,
+                PRIMARY KEY (suite, shape, size, problem, rule, solver));
+            CREATE INDEX IF NOT EXISTS results_by_key ON results ({keys});
+            CREATE TABLE IF NOT EXISTS aggregates (
+                suite TEXT NOT NULL, shape TEXT NOT NULL, size TEXT NOT NULL, rule TEXT NOT NULL, solver TEXT NOT NULL,
+                has_two_phases INTEGER NOT NULL, status TEXT NOT NULL, num_results INTEGER NOT NULL, {aggregate_columns},
+                PRIMARY KEY ({keys}));
+            CREATE TRIGGER IF NOT EXISTS results_insert AFTER INSERT ON results BEGIN {add_new} END;
+            CREATE TRIGGER IF NOT EXISTS results_delete AFTER DELETE ON results BEGIN {remove_old} END;
+            CREATE TRIGGER IF NOT EXISTS results_update AFTER UPDATE ON results BEGIN {remove_old} {add_new} END;
+        """)
+
+    def add_rows(self, rows):
+        """Insert result_row tuples in one transaction, replacing the rows of the same problem, rule and solver."""
+        columns = ["suite", "shape", "size", "num_variables", "num_constraints", "problem", "rule", "solver", *RESULT_COLUMNS[:-1],
+                   "num_pivot_steps_total", "extra"]
+        updates = ", ".join(f"{column} = excluded.{column}" for column in columns[8:])
+        with self.connection:
+            self.connection.executemany(f"INSERT INTO results ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                                        f"ON CONFLICT (suite, shape, size, problem, rule, solver) DO UPDATE SET {updates}", rows)
+
+    def add_results(self, suite, relative_directory, rule, results, solver="SimplexSolver"):
+        """
+        Add the results of one rule in one directory.
+
+        Args:
+            suite: Name of the problem suite, e.g. problems_pivot_rules_two_phases.
+            relative_directory: Directory of the problems in the suite, e.g. balanced_problems/50x50 (see split_directory).
+            rule: Name of the pivot rule, e.g. steepest_edge.
+            results: {problem file name: result dictionary}, as in a {rule}_results.json file.
+        """
+        shape, size = split_directory(relative_directory)
+        self.add_rows([result_row(suite, shape, size, problem, rule, solver, result) for problem, result in results.items()])
+
+    def import_directory(self, root_folder, solver="SimplexSolver"):
+        """
+        Add every {rule}_results.json file under root_folder, the first directory below root_folder being the suite
+        (e.g. root_folder=problems). Files holding one dictionary of results per size folder, such as
+        problems_correctness/my_solver_results.json, are read as such.
+
+        Returns:
+            The number of results added.
+        """
+        num_results = 0
+        for directory, _, file_names in sorted(os.walk(root_folder)):
+            parts = os.path.relpath(directory, root_folder).replace(os.sep, "/").split("/")
+            if parts == ["."]:
+                continue
+            for file_name in sorted(file_names):
+                # Empty files are runs that never wrote their results (e.g. problems_correctness/glpk_results.json).
+                if not file_name.endswith("_results.json") or os.path.getsize(os.path.join(directory, file_name)) == 0:
+                    continue
+                with open(os.path.join(directory, file_name), 'r') as f:
+                    data = json.load(f)
+                rule = file_name[:-len("_results.json")]
+                by_directory = {"/".join(parts[1:]): data}
+                if len(data) > 0 and all(SIZE_PATTERN.match(key) for key in data):
+                    by_directory = {"/".join(parts[1:] + [size]): size_results for size, size_results in data.items()}
+                for relative_directory, results in by_directory.items():
+                    self.add_results(parts[0], relative_directory, rule, results, solver)
+                    num_results += len(results)
+        return num_results
+
+    def grouped_averages(self, column, group_by, suite=None, shape=None, size=None, rule=None, solver=None, has_two_phases=None, status=None):
+        """
+        Average of column per group_by group (a list of KEY_COLUMNS), over the results matching the given keys.
+
+        Returns:
+            [(group values..., average)], the average being None for groups without a value of column.
+        """
+        if column not in AVERAGED_COLUMNS:
+            raise Exception(f"Unknown column {column}, expected one of {AVERAGED_COLUMNS}.")
+        conditions = {"suite": suite, "shape": shape, "size": size, "rule": rule, "solver": solver, "status": status,
+                      "has_two_phases": None if has_two_phases is None else int(has_two_phases)}
+        conditions = {key: value for key, value in conditions.items() if value is not None}
+        where = " AND ".join(f"{key} = ?" for key in conditions) or "1"
+        groups = ", ".join(group_by)
+        query = (f"SELECT {groups}, SUM(sum_{column}) / NULLIF(SUM(count_{column}), 0) FROM aggregates "
+                 f"WHERE {where} GROUP BY {groups}")
+        return self.connection.execute(query, list(conditions.values())).fetchall()
+
+    def sizes(self, suite, shape):
+        """Size folders of a suite and shape, ordered by (num_variables, num_constraints)."""
+        rows = self.connection.execute("SELECT DISTINCT size FROM aggregates WHERE suite = ? AND shape = ?", (suite, shape)).fetchall()
+        return sorted([size for size, in rows], key=size_sort_key)
+
+    def averages(self, suite, shape, size, **keys):
+        """
+        The averages.json of one size folder, or averages_{status}.json with status=...:
+            {column: {rule: average}} for every column of AVERAGED_COLUMNS.
+        """
+        averages = {}
+        for column in AVERAGED_COLUMNS:
+            averages[column] = {rule: average for rule, average in self.grouped_averages(column, ["rule"], suite, shape, size, **keys)}
+        return averages
+
+    def mean_over_sizes(self, suite, shape, column="total_time", sizes=None, by_status=False, **keys):
+        """
+        Mean over the size folders of the average of column per size and rule, which is how the notebooks
+        summarize a shape. sizes restricts it to some size folders, e.g. the last two of self.sizes(suite, shape).
+
+        Returns:
+            {rule: mean}, or {rule: {status: mean}} if by_status.
+        """
+        group_by = ["size", "rule", "status"] if by_status else ["size", "rule"]
+        values = {}
+        for *group, average in self.grouped_averages(column, group_by, suite, shape, **keys):
+            if average is not None and (sizes is None or group[0] in sizes):
+                values.setdefault(tuple(group[1:]), []).append(average)
+
+        means = {}
+        for group, averages in values.items():
+            mean = sum(averages) / len(averages)
+            if by_status:
+                means.setdefault(group[0], {})[group[1]] = mean
+            else:
+                means[group[0]] = mean
+        return means
+
+    def relative_performance(self, suite, shape, baseline_rule="steepest_edge", column="total_time", sizes=None, **keys):
+        """
+        Mean over the size folders of the average of column of each rule divided by that of baseline_rule,
+        as in compute_relative_performances.ipynb (the baseline is 1).
+
+        Returns:
+            {rule: relative performance}
+        """
+        per_size = {}
+        for size, rule, average in self.grouped_averages(column, ["size", "rule"], suite, shape, **keys):
+            if sizes is None or size in sizes:
+                per_size.setdefault(size, {})[rule] = average
+
+        ratios = {}
+        for size, averages in per_size.items():
+            if averages.get(baseline_rule) is None:
+                raise Exception(f"No {column} of {baseline_rule} for {suite}/{shape}/{size}.")
+            for rule, average in averages.items():
+                if average is not None:
+                    ratios.setdefault(rule, []).append(average / averages[baseline_rule])
+        return {rule: sum(values) / len(values) for rule, values in ratios.items()}
+
+    def status_averages(self, suite, shape, column="total_time", sizes=None, **keys):
+        """Mean over the size folders of the average of column per rule and status: {rule: {status: mean}}."""
+        return self.mean_over_sizes(suite, shape, column, sizes, by_status=True, **keys)
+
+    def close(self):
+        self.connection.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import results into a SQLite results store, and query its averages.")
+    parser.add_argument("store", help="Path of the SQLite store, e.g. results.sqlite.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Add every {rule}_results.json file under a directory.")
+    import_parser.add_argument("path", help="Root directory, whose sub-directories are the suites (e.g. problems).")
+    import_parser.add_argument("--solver", default="SimplexSolver", help="Solver the results were obtained with.")
+
+    for command, help_text in [("averages", "Averages per size and rule, as in the averages.json files."),
+                               ("relative", "Relative performance of each rule to a baseline rule, averaged over the sizes."),
+                               ("status", "Averages per rule and status, averaged over the sizes.")]:
+        query_parser = subparsers.add_parser(command, help=help_text)
+        query_parser.add_argument("suite", help="e.g. problems_pivot_rules_two_phases")
+        query_parser.add_argument("shape", help="e.g. balanced_problems")
+        query_parser.add_argument("--column", choices=AVERAGED_COLUMNS, default="total_time")
+        query_parser.add_argument("--last-sizes", type=int, default=None, help="Only the last (largest) sizes.")
+        query_parser.add_argument("--status", default=None, help="Only the results with this status.")
+        query_parser.add_argument("--solver", default=None)
+    subparsers.choices["relative"].add_argument("--baseline", default="steepest_edge")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.store)
+    if args.command == "import":
+        print(f'Imported {store.import_directory(args.path, args.solver)} results into {args.store}.')
+    else:
+        sizes = store.sizes(args.suite, args.shape)
+        sizes = sizes[-args.last_sizes:] if args.last_sizes else sizes
+        keys = {"solver": args.solver, "status": args.status}
+        if args.command == "averages":
+            output = {size: store.averages(args.suite, args.shape, size, **keys) for size in sizes}
+        elif args.command == "relative":
+            output = store.relative_performance(args.suite, args.shape, args.baseline, args.column, sizes, **keys)
+        else:
+            output = store.status_averages(args.suite, args.shape, args.column, sizes, **keys)
+        print(json.dumps(output, indent=4))
+    store.close()
@@ -0,0 +1,333 @@
+from input_parser import LPParser
+from simplex_solver import SimplexSolver
+import numpy as np
+import scipy.linalg
+import math
+import time
+
+# Columns per FTRAN when the SteepestEdge weights are computed at the start of a phase.
+EDGE_WEIGHT_BLOCK_SIZE = 256
+
+class RevisedSimplexSolver(SimplexSolver):
+    """
+    Revised simplex method over float64 data.
+
+    Instead of updating the full (m+1) x (n+m+1) tableau, only the basis is kept,
+    as an LU factorization plus a file of eta (product-form) updates, which is
+    refactorized every `refactor_frequency` pivots. Each iteration then costs two
+    O(m^2) triangular solves (BTRAN for the duals, FTRAN for the entering column)
+    plus pricing, instead of O(m * (n + m)). SteepestEdge keeps the Goldfarb-Reid weights
+    of SimplexSolver, updated with one extra BTRAN per pivot.
+
+    The interface and the result dictionary are the same as for SimplexSolver.
+    """
+    # Devex is only implemented on the full tableau of SimplexSolver.
+    PIVOT_RULES = ["Dantzig", "Bland", "Random", "SteepestEdge"]
+
+    def __init__(self, pivot_rule: str, feasibility_tol: float = None, optimality_tol: float = None, refactor_frequency: int = 50, **pricing_options):
+        super().__init__(pivot_rule, arithmetic="float64", feasibility_tol=feasibility_tol, optimality_tol=optimality_tol, **pricing_options)
+        if self.method != "primal":
+            raise Exception("The dual simplex is only available in SimplexSolver.")
+        self.refactor_frequency = refactor_frequency
+
+    def solve_standard_form(self, lp_parser: LPParser):
+        if lp_parser.upper_bounds:
+            # Upper bounds of variables are solved as constraint rows here.
+            lp_parser = lp_parser.with_upper_bound_rows()
+
+        self.num_constraints = len(lp_parser.constraints)
+        self.num_variables = len(lp_parser.variables)
+        m, n = self.num_constraints, self.num_variables
+
+        self.original_variables = sorted(list(lp_parser.variables), key=lambda x: self.sort_variables_key_function(x))
+        variable_idxs = {variable: j for j, variable in enumerate(self.original_variables)}
+
+        negative_rhs_idxs = [i for i in range(m) if lp_parser.constraints[i]['rhs'] < 0]
+        # With the crash, rows with a negative RHS share a single artificial variable.
+        if len(negative_rhs_idxs) > 0 and self.crash:
+            num_artificials = 1
+        else:
+            num_artificials = len(negative_rhs_idxs)
+
+        # Columns are: original variables, slack variables, artificial variables.
+        # Rows with a negative RHS are multiplied by -1 (unless crashing), exactly as in SimplexSolver.
+        # The matrix is assembled from (row, column, value) triplets so that subclasses can pick the storage.
+        rows, cols, values = [], [], []
+        self.b = np.zeros(m, dtype=np.float64)
+        for i, var_dict in enumerate(lp_parser.constraints):
+            sign = -1 if var_dict['rhs'] < 0 and not self.crash else 1
+            for variable, coefficient in var_dict.items():
+                if variable in variable_idxs and coefficient != 0:
+                    rows.append(i)
+                    cols.append(variable_idxs[variable])
+                    values.append(float(coefficient) * sign)
+            self.b[i] = float(var_dict['rhs']) * sign
+
+            rows.append(i)
+            cols.append(n + i)
+            values.append(sign)
+
+        for k, i in enumerate(negative_rhs_idxs):
+            rows.append(i)
+            if self.crash:
+                cols.append(n + m)
+                values.append(-1)
+            else:
+                cols.append(n + m + k)
+                values.append(1)
+
+        self.A = self.build_constraint_matrix(rows, cols, values, (m, n + m + num_artificials))
+
+        self.all_variables = self.original_variables + [f'_s{i+1}' for i in range(m)] + [f'_zzz{k+1}' for k in range(num_artificials)]
+
+        c = np.zeros(n + m + num_artificials, dtype=np.float64)
+        for variable, coefficient in lp_parser.obj_function.items():
+            c[variable_idxs[variable]] = float(coefficient)
+
+        # Initial basis: slacks, except on negative rows where the artificial variable is basic.
+        basis = [n + i for i in range(m)]
+        if not self.crash:
+            for k, i in enumerate(negative_rhs_idxs):
+                basis[i] = n + m + k
+        self.basis = np.array(basis, dtype=int)
+        self.refactor()
+
+        if num_artificials > 0:
+            final_solution = {}
+
+            crash_time = 0
+            if self.crash:
+                # Same crash as SimplexSolver.crash_basis: the shared artificial variable enters on the most
+                # infeasible row, after which every basic variable is non-negative.
+                start_time = time.time()
+                self.pivot(n + m, int(np.argmin(self.x_basis)), self.ftran(self.columns(n + m)))
+                crash_time = time.time() - start_time
+                final_solution["num_crash_pivots"] = 1
+
+            # Phase 1: maximize -1 * (sum of the artificial variables).
+            phase_one_costs = np.zeros_like(c)
+            phase_one_costs[n + m:] = -1
+
+            start_time = time.time()
+            temp_solution = self.solve_revised(phase_one_costs, n + m + num_artificials)
+            end_time = time.time()
+
+            final_solution["has_two_phases"] = True
+            final_solution['first_phase_time'] = (end_time - start_time + crash_time) * 1000
+            final_solution["num_pivot_steps_first_phase"] = temp_solution["num_pivot_steps"]
+            self.add_phase_statistics(final_solution, temp_solution)
+
+            if temp_solution["status"] != "Optimal" or abs(temp_solution["value"]) > self.feasibility_tol:
+                self.solution = "Infeasible"
+                final_solution["status"] = "Infeasible"
+                final_solution["value"] = - np.inf
+                return final_solution
+
+            # Artificial variables left in the basis (at zero) must be pivoted out,
+            # otherwise they could become positive during Phase 2.
+            self.drive_out_artificials(n + m)
+
+            start_time = time.time()
+            temp_solution = self.solve_revised(c, n + m)
+            end_time = time.time()
+
+            final_solution["second_phase_time"] = (end_time - start_time) * 1000
+            final_solution["num_pivot_steps_second_phase"] = temp_solution["num_pivot_steps"]
+            final_solution["status"] = temp_solution["status"]
+            final_solution["value"] = temp_solution["value"]
+            self.add_phase_statistics(final_solution, temp_solution)
+
+            return final_solution
+        else:
+            start_time = time.time()
+            final_solution = self.solve_revised(c, n + m)
+            end_time = time.time()
+            final_solution["first_phase_time"] = (end_time - start_time) * 1000
+            final_solution["has_two_phases"] = False
+
+            return final_solution
+
+    def build_constraint_matrix(self, rows, cols, values, shape):
+        A = np.zeros(shape, dtype=np.float64)
+        A[rows, cols] = values
+        return A
+
+    def columns(self, idxs):
+        """Dense copy of the constraint matrix column(s) at `idxs`."""
+        return self.A[:, idxs]
+
+    def refactor(self):
+        """
+        Recompute the LU factorization of the basis matrix, clear the eta file
+        and recompute the basic variable values from scratch.
+        """
+        self.lu = scipy.linalg.lu_factor(self.columns(self.basis))
+        self.etas = []
+        self.x_basis = self.ftran(self.b)
+
+    def ftran(self, column):
+        """Solve B y = column (or a matrix of columns), using the LU factors followed by the eta file."""
+        y = self.solve_factors(column)
+        for r, eta in self.etas:
+            y_r = y[r] * eta[r]
+            y += np.multiply.outer(eta, y[r])
+            y[r] = y_r
+        return y
+
+    def btran(self, row):
+        """Solve y^T B = row^T (or B^T Y = rows for a matrix of columns), applying the eta file in reverse before the LU factors."""
+        row = row.copy()
+        for r, eta in reversed(self.etas):
+            row[r] = eta @ row
+        return self.solve_factors(row, transpose=True)
+
+    def solve_factors(self, rhs, transpose: bool = False):
+        """Solve with the LU factors of the last refactorized basis only (no eta file)."""
+        return scipy.linalg.lu_solve(self.lu, rhs, trans=1 if transpose else 0)
+
+    def init_edge_weights(self, tableau=None):
+        """
+        Goldfarb-Reid weights 1 + ||B^-1 a_j||^2 of SteepestEdge, as in SimplexSolver, computed once per phase
+        with an FTRAN of the constraint matrix (by blocks of columns) and then kept by update_edge_weights.
+        """
+        if self.pivot_rule != "SteepestEdge":
+            self.edge_weights = None
+            return
+
+        num_all_columns = self.A.shape[1]
+        self.edge_weights = np.empty(num_all_columns)
+        for start in range(0, num_all_columns, EDGE_WEIGHT_BLOCK_SIZE):
+            idxs = np.arange(start, min(start + EDGE_WEIGHT_BLOCK_SIZE, num_all_columns))
+            self.edge_weights[idxs] = 1 + np.sum(self.ftran(self.columns(idxs)) ** 2, axis=0)
+
+    def update_edge_weights(self, entering: int, leaving_row: int, alpha):
+        """
+        Goldfarb-Reid update of the weights for the pivot on (leaving_row, entering), before the pivot is applied.
+        alpha is the FTRAN of the entering column; one BTRAN of [e_r, alpha] gives the pivot row (rho^T A)
+        and the products alpha_j . alpha (tau^T A) of every column.
+        """
+        alpha_rq = alpha[leaving_row]
+        unit = np.zeros(self.num_constraints)
+        unit[leaving_row] = 1
+        rho_tau = self.btran(np.column_stack([unit, alpha]))
+        products = np.asarray(self.A.T @ rho_tau)
+        ratios = products[:, 0] / alpha_rq
+        weight_q = self.edge_weights[entering]
+
+        self.edge_weights = np.maximum(self.edge_weights - 2 * ratios * products[:, 1] + ratios ** 2 * weight_q, 1 + ratios ** 2)
+        self.edge_weights[self.basis[leaving_row]] = max(weight_q / alpha_rq ** 2, 1)
+        self.edge_weights[entering] = 1
+
+    def reduced_costs_of(self, costs, duals, num_columns: int, idxs=None):
+        """
+        Reduced costs z_j - c_j (tableau convention: negative means improving) of the columns idxs,
+        or of the first num_columns columns if idxs is None. Basic columns get 0.
+        """
+        if idxs is None:
+            reduced_costs = (self.A.T @ duals)[:num_columns] - costs[:num_columns]
+            reduced_costs[self.basis[self.basis < num_columns]] = 0
+        else:
+            reduced_costs = self.A[:, idxs].T @ duals - costs[idxs]
+            reduced_costs[np.isin(idxs, self.basis)] = 0
+        return reduced_costs
+
+    def pivot(self, entering: int, leaving_row: int, alpha):
+        """Update the basic values and append the eta matrix for the basis change."""
+        theta = self.x_basis[leaving_row] / alpha[leaving_row]
+        self.x_basis -= theta * alpha
+        self.x_basis[leaving_row] = theta
+
+        eta = - alpha / alpha[leaving_row]
+        eta[leaving_row] = 1 / alpha[leaving_row]
+        self.etas.append((leaving_row, eta))
+        self.basis[leaving_row] = entering
+
+        if len(self.etas) >= self.refactor_frequency:
+            self.refactor()
+
+    def solve_revised(self, costs, num_columns: int):
+        """
+        Run the primal revised simplex for `costs` over the first `num_columns` columns of A,
+        starting from the current basis.
+        """
+        self.reset_iteration_state()
+        self.init_edge_weights()
+        trace = self.trace
+        if trace is not None:
+            trace.start_phase(self.all_variables)
+
+        num_pivot_steps = 0
+        while True:
+            pricing_start_time = time.perf_counter_ns()
+            duals = self.btran(costs[self.basis])
+            candidates, reduced_costs = self.price(lambda idxs: self.reduced_costs_of(costs, duals, num_columns, idxs), num_columns)
+            entering = self.select_entering_variable(candidates, reduced_costs) if len(candidates) > 0 else -1
+            pricing_ns = time.perf_counter_ns() - pricing_start_time
+            self.pricing_time += pricing_ns / 1e6
+            if entering == -1:
+                break
+
+            if trace is not None:
+                ratio_test_start_time = time.perf_counter_ns()
+            alpha = self.ftran(self.columns(entering))
+            leaving_row, step_length = self.ratio_test(alpha, self.x_basis, lambda row: self.basis[row])
+            if trace is not None:
+                ratio_test_ns = time.perf_counter_ns() - ratio_test_start_time
+            if leaving_row == -1:
+                self.solution = "Unbounded"
+                return {"status": "Unbounded", "value": math.inf, "num_pivot_steps": num_pivot_steps, "current_basis": self.current_basis(), **self.statistics()}
+
+            if trace is not None:
+                pivot_start_time = time.perf_counter_ns()
+                leaving = int(self.basis[leaving_row])
+            self.record_step_length(step_length)
+
+            if self.edge_weights is not None:
+                self.update_edge_weights(entering, leaving_row, alpha)
+            self.pivot(entering, leaving_row, alpha)
+            if trace is not None:
+                # The ratio test stage includes the FTRAN of the entering column; there is no tableau to measure.
+                trace.record(self, None, "pivot", num_pivot_steps, entering, leaving, leaving_row, step_length,
+                             pricing_ns, ratio_test_ns, time.perf_counter_ns() - pivot_start_time)
+            num_pivot_steps += 1
+
+        return {"status": "Optimal", "value": float(costs[self.basis] @ self.x_basis), "num_pivot_steps": num_pivot_steps, "current_basis": self.current_basis(), **self.statistics()}
+
+    def drive_out_artificials(self, num_structural_and_slack: int):
+        for row in range(self.num_constraints):
+            if self.basis[row] < num_structural_and_slack:
+                continue
+
+            # Row `row` of B^-1 A tells which non-artificial columns can replace the artificial variable.
+            unit = np.zeros(self.num_constraints)
+            unit[row] = 1
+            tableau_row = (self.A.T @ self.btran(unit))[:num_structural_and_slack]
+            tableau_row[self.basis[self.basis < num_structural_and_slack]] = 0
+
+            candidates = np.where(np.abs(tableau_row) > self.feasibility_tol)[0]
+            if len(candidates) == 0:
+                # Redundant row: the artificial variable stays basic at zero and is never priced again.
+                continue
+
+            entering = candidates[np.argmax(np.abs(tableau_row[candidates]))]
+            self.pivot(entering, row, self.ftran(self.columns(entering)))
+
+    def get_state(self):
+        raise Exception("Warm starts are only available in SimplexSolver.")
+
+    def get_variable_values(self):
+        if not hasattr(self, 'basis'):
+            print('No LP has been solved yet, thus returning None.')
+            return None
+
+        values = {variable: 0 for variable in self.original_variables}
+        for row, j in enumerate(self.basis):
+            if j < self.num_variables:
+                values[self.all_variables[j]] = float(self.x_basis[row])
+
+        if self.presolver is not None:
+            values = self.presolver.postsolve_values(values)
+        return values
+
+    def current_basis(self):
+        return [self.all_variables[j] for j in self.basis]
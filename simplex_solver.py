@@ -1,47 +1,208 @@
 from input_parser import LPParser
+from presolve import Presolver
 import numpy as np
 from fractions import Fraction
 import math
 import re
 import time
 
+ARITHMETICS = ["fraction", "float64"]
+# Pivot rules that price with per-column edge weights.
+EDGE_WEIGHT_RULES = ["SteepestEdge", "Devex"]
+PRICING_MODES = ["full", "partial", "multiple"]
+# Per-phase statistics that are summed up over both phases of a two-phase solve.
+SUMMED_STATISTICS = ["pricing_time", "num_priced_columns", "num_degenerate_pivots", "num_bound_flips"]
+METHODS = ["primal", "dual", "auto"]
+
+class SimplexState:
+    """
+    Final tableau and basis of a solve, with a copy of the problem it belongs to (see SimplexSolver.get_state and resolve).
+    warm is False if the tableau cannot be reused, e.g. after an infeasible Phase 1.
+    complemented tells which columns of the tableau hold u_j - x_j (see SimplexSolver.complement_column), or is None.
+    """
+    def __init__(self, arithmetic: str, tableau, current_basis: list, all_variables: list, original_variables: list, lp_parser: LPParser, warm: bool,
+                 complemented=None):
+        self.arithmetic = arithmetic
+        self.tableau = tableau
+        self.current_basis = current_basis
+        self.all_variables = all_variables
+        self.original_variables = original_variables
+        self.warm = warm
+        self.complemented = complemented
+
+        self.variables = set(lp_parser.variables)
+        self.constraints = [dict(constraint) for constraint in lp_parser.constraints]
+        self.obj_function = dict(lp_parser.obj_function)
+        self.obj_sign = lp_parser.obj_sign
+        self.obj_constant = lp_parser.obj_constant
+        self.shifts = dict(lp_parser.shifts)
+        self.upper_bounds = dict(lp_parser.upper_bounds)
+
+    def copy_problem(self):
+        """A new LPParser holding a copy of the problem."""
+        lp_parser = LPParser()
+        lp_parser.variables = set(self.variables)
+        lp_parser.constraints = [dict(constraint) for constraint in self.constraints]
+        lp_parser.obj_function = dict(self.obj_function)
+        lp_parser.obj_sign = self.obj_sign
+        lp_parser.obj_constant = self.obj_constant
+        lp_parser.shifts = dict(self.shifts)
+        lp_parser.upper_bounds = dict(self.upper_bounds)
+        lp_parser.num_variables = len(lp_parser.variables)
+        lp_parser.num_constraints = len(lp_parser.constraints)
+        return lp_parser
+
 class SimplexSolver:
-    def __init__(self, pivot_rule: str):
+    # Pivot rules this engine accepts (subclasses narrow it down).
+    PIVOT_RULES = ["Dantzig", "Bland", "Random", "SteepestEdge", "Devex"]
+
+    def __init__(self, pivot_rule: str, arithmetic: str = "fraction", feasibility_tol: float = None, optimality_tol: float = None,
+                 pricing: str = "full", partial_pricing_block: int = None, multiple_pricing_size: int = 8, degenerate_pivot_limit: int = 10,
+                 crash: bool = False, method: str = "primal", presolve: bool = False, scaling: str = None, trace=None):
+        """
+        Args:
+            pivot_rule: One of "Dantzig", "Bland", "Random", "SteepestEdge" or "Devex".
+            arithmetic: "fraction" keeps the tableau as exact Fractions (default, used for correctness runs),
+                "float64" keeps it as a contiguous float64 array and vectorizes pricing, ratio test and pivots.
+            feasibility_tol: Smallest pivot element / RHS magnitude treated as non-zero in the ratio test.
+                Defaults to 1e-9 for float64 and is always 0 for exact arithmetic.
+            optimality_tol: Reduced costs above -optimality_tol are treated as non-negative.
+                Defaults to 1e-9 for float64 and is always 0 for exact arithmetic.
+            pricing: How the entering variable candidates are found.
+                - "full": scan every reduced cost on every iteration.
+                - "partial": scan a rotating block of partial_pricing_block columns (default: a quarter
+                  of the columns) and stop at the first block holding an improving column.
+                - "multiple": keep the multiple_pricing_size most attractive columns of a full scan and only
+                  re-price those, for at most multiple_pricing_size iterations, before scanning again.
+                The pivot rule is then applied to the candidates found. Optimality is only declared after a
+                scan over all columns. pricing_time (ms) and num_priced_columns are reported in the result.
+            degenerate_pivot_limit: Number of consecutive degenerate pivots after which Bland's rule is used
+                until the objective improves again (anti-cycling). num_degenerate_pivots is reported in the result.
+            crash: If True, two-phase problems start Phase 1 from the basis built by crash_basis, with a single
+                artificial column instead of one per row with a negative RHS. The crash pivot is reported as
+                num_crash_pivots and its time is part of first_phase_time.
+            method: How problems with a negative RHS are solved (problems with a feasible origin always use the primal simplex).
+                - "primal": two-phase primal simplex with artificial variables.
+                - "dual": dual simplex from the slack basis, without artificial variables (see solve_dual).
+                - "auto": the dual simplex if the slack basis has at most as many dual infeasibilities
+                  (positive objective coefficients) as primal ones (negative RHS values), the primal simplex otherwise.
+                The chosen one is reported as "method" in the result.
+            presolve: If True, the problem is first reduced by presolve.Presolver (empty, singleton, duplicate and dominated rows,
+                fixed and empty columns), and the result is mapped back to the problem given to solve. The result then also
+                holds presolve_time (ms), num_presolve_removed_rows and num_presolve_removed_columns.
+            scaling: None (default), "geometric" or "equilibration": power-of-2 row and column scaling by presolve.Presolver,
+                after the reductions if presolve is True.
+            trace: A simplex_trace.SimplexTrace recording every iteration (entering and leaving variables, step length,
+                degeneracy, time per stage and bit lengths of the tableau entries), or None (default) to record nothing.
+        """
+        if pivot_rule not in self.PIVOT_RULES:
+            raise Exception(f"The {pivot_rule} pivot rule is not available in {type(self).__name__}, expected one of {self.PIVOT_RULES}.")
+        if arithmetic not in ARITHMETICS:
+            raise Exception(f"Unknown arithmetic {arithmetic}, expected one of {ARITHMETICS}.")
+        if pricing not in PRICING_MODES:
+            raise Exception(f"Unknown pricing mode {pricing}, expected one of {PRICING_MODES}.")
+        if method not in METHODS:
+            raise Exception(f"Unknown method {method}, expected one of {METHODS}.")
+
         self.pivot_rule = pivot_rule
+        self.arithmetic = arithmetic
+        self.pricing = pricing
+        self.partial_pricing_block = partial_pricing_block
+        self.multiple_pricing_size = multiple_pricing_size
+        self.degenerate_pivot_limit = degenerate_pivot_limit
+        self.crash = crash
+        self.method = method
+        self.presolve = presolve
+        self.scaling = scaling
+        self.presolver = None
         self.solution = None
+        self.tableau = None
+        self.upper_bounds = None
+        self.complemented = None
+        self.fixed_at_upper_bound = {}
+        self.edge_weights = None
+        self.trace = trace
+        # Pivots (and bound flips) allowed per phase before solve_tableau / solve_dual_tableau stop with status "PivotLimit",
+        # meant for solve_from_basis (None: no limit).
+        self.pivot_limit = None
+
+        if arithmetic == "fraction":
+            self.feasibility_tol = 0
+            self.optimality_tol = 0
+        else:
+            self.feasibility_tol = 1e-9 if feasibility_tol is None else feasibility_tol
+            self.optimality_tol = 1e-9 if optimality_tol is None else optimality_tol
 
     def solve(self, lp_parser: LPParser):
+        """
+        Solve the problem read by lp_parser. The solver works on its standard form view (maximize, <= rows,
+        non-negative variables); the reported value is that of the objective in the file (see LPParser.objective_value).
+        """
+        if not self.presolve and self.scaling is None:
+            self.presolver = None
+            final_solution = self.solve_standard_form(lp_parser)
+            self.report_objective_value(final_solution, lp_parser)
+            return final_solution
+
+        start_time = time.time()
+        self.presolver = Presolver(reduce=self.presolve, scaling=self.scaling)
+        presolved_lp_parser = self.presolver.presolve(lp_parser)
+        presolve_time = (time.time() - start_time) * 1000
+
+        if presolved_lp_parser is None:
+            final_solution = self.infeasible_without_pivots()
+        else:
+            final_solution = self.solve_standard_form(presolved_lp_parser)
+        self.presolver.postsolve(final_solution)
+        final_solution["presolve_time"] = presolve_time
+
+        # get_state keeps the problem given to solve, so that resolve solves it again (with presolve) rather than warm starting.
+        self.lp_parser = lp_parser
+        self.report_objective_value(final_solution, lp_parser)
+        return final_solution
+
+    def infeasible_without_pivots(self):
+        """Result for a problem found infeasible before any tableau is built."""
+        self.tableau = None
+        self.reset_iteration_state()
+        self.solution = "Infeasible"
+        return {"status": "Infeasible", "value": - np.inf, "num_pivot_steps": 0, "first_phase_time": 0, "has_two_phases": False, **self.statistics()}
+
+    def report_objective_value(self, final_solution, lp_parser: LPParser):
+        if final_solution["status"] in ("Optimal", "Unbounded"):
+            final_solution["value"] = lp_parser.objective_value(final_solution["value"])
+
+    def solve_standard_form(self, lp_parser: LPParser):
+        self.lp_parser = lp_parser
+        self.fixed_at_upper_bound = {}
         self.num_constraints = len(lp_parser.constraints)
         self.num_variables = len(lp_parser.variables)
 
         self.negative_rhs_idxs = {i: 0 for i in range(len(lp_parser.constraints)) if lp_parser.constraints[i]['rhs'] < 0}
-        
-        tableau = np.full((self.num_constraints + 1, self.num_variables + self.num_constraints + 1 + len(self.negative_rhs_idxs)), Fraction(0), dtype=object)
-        self.original_variables = sorted(list(lp_parser.variables), key=lambda x: self.sort_variables_key_function(x))
 
-        i = 0
-        for constraint_idx, var_dict in enumerate(lp_parser.constraints):
-            if constraint_idx in self.negative_rhs_idxs:
-                sign = -1
-            else:
-                sign = 1    
+        if any(upper < 0 for upper in lp_parser.upper_bounds.values()):
+            # A variable whose lower bound is above its upper bound.
+            return self.infeasible_without_pivots()
 
-            for variable, coefficient in var_dict.items():
-                if variable in lp_parser.variables:
-                    j = self.original_variables.index(variable)
+        if len(self.negative_rhs_idxs) > 0 and self.choose_method(lp_parser) == "dual":
+            return self.solve_dual(lp_parser)
+        
+        # With the crash, rows with a negative RHS share a single artificial variable (see crash_basis).
+        if len(self.negative_rhs_idxs) > 0 and self.crash:
+            num_artificials = 1
+        else:
+            num_artificials = len(self.negative_rhs_idxs)
 
-                    tableau[i, j] = coefficient * sign
-            
-            tableau[i, -1] = lp_parser.constraints[constraint_idx]['rhs'] * sign
+        tableau = self.build_tableau(lp_parser, num_artificials, flip_negative_rows=not self.crash)
 
-            # Here we add slack variables (or surplus variable, denoted by a -1 coefficient.)
-            tableau[i, i + self.num_variables] = Fraction(1) * sign
-            i += 1
-        
         # Here we set the coefficients of the artificial variables (if there are any)
         art_var_added = 0
 
         for i, neg_idx in enumerate(self.negative_rhs_idxs):
+            if self.crash:
+                tableau[neg_idx, len(self.original_variables) + self.num_constraints] = Fraction(-1)
+                continue
+
             tableau[neg_idx, len(self.original_variables) + self.num_constraints + art_var_added] = 1
             art_var_added += 1
 
@@ -49,11 +210,19 @@ class SimplexSolver:
         #   - original variables,
         #   - slack variables, denoted by _sNumber,
         #   - artificial variables (if we need two phase simplex), denoted by _zzzNumber.
-        self.all_variables = self.original_variables + [f'_s{i+1}' for i in range(self.num_constraints)] + [f'_zzz{i+1}' for i in range(len(self.negative_rhs_idxs))]
+        self.all_variables = self.original_variables + [f'_s{i+1}' for i in range(self.num_constraints)] + [f'_zzz{i+1}' for i in range(num_artificials)]
+        self.init_bounds(lp_parser.upper_bounds)
         
         art_var_added = 0
-        if len(self.negative_rhs_idxs) > 0:
+        if len(self.negative_rhs_idxs) > 0 and self.crash:
+            final_solution = {"num_crash_pivots": 1}
+            start_time = time.time()
+            tableau, current_basis = self.crash_basis(tableau)
+            crash_time = time.time() - start_time
+
+        elif len(self.negative_rhs_idxs) > 0:
             final_solution = {}
+            crash_time = 0
             for neg_idx, i in self.negative_rhs_idxs.items():
                 tableau[-1, self.num_variables + self.num_constraints + art_var_added] = 1
                 art_var_added += 1
@@ -68,17 +237,22 @@ class SimplexSolver:
                     num_a_var_alrdy_in_basis += 1
                 else:
                     current_basis[i] = self.all_variables[self.num_variables + i]
-            
+
+        if len(self.negative_rhs_idxs) > 0:
             start_time = time.time()
             temp_solution = self.solve_tableau(tableau, current_basis)
             end_time = time.time()
+            # The pivots may have replaced the tableau by one of another dtype (see perform_pivot_operation).
+            tableau = self.tableau
 
             final_solution["has_two_phases"] = True
-            final_solution['first_phase_time'] = (end_time - start_time) * 1000
+            final_solution["method"] = "primal"
+            final_solution['first_phase_time'] = (end_time - start_time + crash_time) * 1000
             final_solution["num_pivot_steps_first_phase"] = temp_solution["num_pivot_steps"]
+            self.add_phase_statistics(final_solution, temp_solution)
             
             # We are now done with Phase 1.
-            if temp_solution["status"] != "Optimal" or temp_solution["value"] != 0:
+            if temp_solution["status"] != "Optimal" or abs(temp_solution["value"]) > self.feasibility_tol:
                 self.solution = "Infeasible"
                 final_solution["status"] = "Infeasible"
                 final_solution["value"] = - np.inf
@@ -91,36 +265,42 @@ class SimplexSolver:
                 if basic_variable.startswith('_zzz'):
                     artificial_var_in_basis = True
                     break
-            
+
+            phase_one_variables = list(self.all_variables)
             if not artificial_var_in_basis:
-                tableau = np.delete(tableau, np.array([i for i in range(self.num_variables + self.num_constraints, len(self.all_variables))]), axis = 1)
+                columns_to_delete = np.arange(self.num_variables + self.num_constraints, len(self.all_variables))
+                tableau = np.delete(tableau, columns_to_delete, axis = 1)
+                self.all_variables = self.all_variables[:self.num_variables + self.num_constraints]
             else:
                 columns_to_delete = []
                 variables_to_delete = []
                 for idx, value in enumerate(tableau[-1, :self.num_variables + self.num_constraints]):
 
-                    if value > 0 and self.all_variables[idx] not in current_basis:
+                    if value > self.optimality_tol and self.all_variables[idx] not in current_basis:
+                        columns_to_delete.append(idx)
+                        variables_to_delete.append(self.all_variables[idx])
+
+                # Nonbasic artificial variables never enter again.
+                for idx in range(self.num_variables + self.num_constraints, len(self.all_variables)):
+                    if self.all_variables[idx] not in current_basis:
                         columns_to_delete.append(idx)
                         variables_to_delete.append(self.all_variables[idx])
 
                 tableau = np.delete(tableau, columns_to_delete, axis=1)
                 for var in variables_to_delete:
                     self.all_variables.remove(var)
+
+            if self.upper_bounds is not None:
+                # Dropped columns keep their variable at its current bound, which is the upper one if complemented.
+                for idx in columns_to_delete:
+                    if self.complemented[idx]:
+                        self.fixed_at_upper_bound[phase_one_variables[idx]] = self.upper_bounds[idx]
+                self.upper_bounds = np.delete(self.upper_bounds, columns_to_delete)
+                self.complemented = np.delete(self.complemented, columns_to_delete)
             
-            # Now we need to set the objective function (last row in tableau)
-            # If we have artificial variables, we need to set the objective function
-            # as the preliminary one, asking to maximize -1 * the sum of all artificial variables.
-            for variable, coefficient in lp_parser.obj_function.items():
-                tableau[-1, self.all_variables.index(variable)] = - coefficient
-
-            # We have initialised the new objective function.
-            # Now we need to make basis variables have only one value of 1 on column.
-            for idx, basic_variable in enumerate(current_basis):
-                basic_variable_idx = self.all_variables.index(basic_variable)
-                if np.sum(tableau[:, basic_variable_idx]) == 1:
-                    continue
-                
-                tableau[-1] -= tableau[idx] * tableau[-1, basic_variable_idx]
+            # Now we need to set the objective function (last row in tableau), in place of the
+            # Phase 1 one, and make it zero on the basic columns.
+            tableau = self.set_objective_row(tableau, lp_parser.obj_function, current_basis)
             
             start_time = time.time()
             temp_solution = self.solve_tableau(tableau, current_basis)
@@ -130,11 +310,14 @@ class SimplexSolver:
             final_solution["num_pivot_steps_second_phase"] = temp_solution["num_pivot_steps"]
             final_solution["status"] = temp_solution["status"]
             final_solution["value"] = temp_solution["value"]
+            self.add_phase_statistics(final_solution, temp_solution)
 
             return final_solution
         else:
+            # Original variables come first, so their columns are their positions in original_variables.
+            column_idxs = {variable: j for j, variable in enumerate(self.original_variables)}
             for variable, coefficient in lp_parser.obj_function.items():
-                tableau[-1, self.all_variables.index(variable)] = - coefficient
+                tableau[-1, column_idxs[variable]] = - coefficient
             current_basis = self.all_variables[self.num_variables:]
 
             start_time = time.time()
@@ -145,7 +328,531 @@ class SimplexSolver:
 
             return final_solution
    
+    def build_tableau(self, lp_parser: LPParser, num_artificials: int, flip_negative_rows: bool):
+        """
+        Tableau with the constraint rows, one slack column per row and num_artificials (still empty) artificial columns.
+        With flip_negative_rows, rows with a negative RHS are multiplied by -1 so that every RHS is non-negative.
+        """
+        tableau_shape = (self.num_constraints + 1, self.num_variables + self.num_constraints + 1 + num_artificials)
+        if self.arithmetic == "float64":
+            tableau = np.zeros(tableau_shape, dtype=np.float64)
+        else:
+            tableau = np.full(tableau_shape, Fraction(0), dtype=object)
+        self.original_variables = sorted(list(lp_parser.variables), key=lambda x: self.sort_variables_key_function(x))
+        variable_idxs = {variable: j for j, variable in enumerate(self.original_variables)}
+
+        i = 0
+        for constraint_idx, var_dict in enumerate(lp_parser.constraints):
+            if constraint_idx in self.negative_rhs_idxs and flip_negative_rows:
+                sign = -1
+            else:
+                sign = 1    
+
+            for variable, coefficient in var_dict.items():
+                if variable in variable_idxs:
+                    tableau[i, variable_idxs[variable]] = coefficient * sign
+            
+            tableau[i, -1] = lp_parser.constraints[constraint_idx]['rhs'] * sign
+
+            # Here we add slack variables (or surplus variable, denoted by a -1 coefficient.)
+            tableau[i, i + self.num_variables] = Fraction(1) * sign
+            i += 1
+
+        return tableau
+
+    def choose_method(self, lp_parser: LPParser):
+        """Pick the primal or the dual simplex for a problem whose slack basis is not primal feasible."""
+        if self.method != "auto":
+            return self.method
+
+        num_dual_infeasibilities = sum(1 for coefficient in lp_parser.obj_function.values() if coefficient > 0)
+        return "dual" if num_dual_infeasibilities <= len(self.negative_rhs_idxs) else "primal"
+
+    def solve_dual(self, lp_parser: LPParser):
+        """Solve a problem with negative RHS values without artificial variables, from the slack basis (see reoptimize)."""
+        tableau = self.build_tableau(lp_parser, 0, flip_negative_rows=False)
+        self.all_variables = self.original_variables + [f'_s{i+1}' for i in range(self.num_constraints)]
+        self.init_bounds(lp_parser.upper_bounds)
+        current_basis = self.all_variables[self.num_variables:]
+
+        tableau = self.set_objective_row(tableau, lp_parser.obj_function, current_basis)
+        return self.reoptimize(tableau, current_basis, lp_parser.obj_function)
+
+    def reoptimize(self, tableau, current_basis, obj_function):
+        """
+        Optimize from any basis of the problem, given a tableau whose objective row holds the true reduced costs.
+        If the basis is primal feasible, the primal simplex finishes from it (method "primal", single phase).
+        Otherwise the dual simplex restores primal feasibility (method "dual"). It needs a dual feasible basis
+        (no negative reduced cost), so negative reduced costs are first replaced by their absolute value (rather
+        than 0, which makes the dual simplex stall on degenerate pivots) and the dual simplex only finds a primal
+        feasible basis (first phase). The true objective is then put back and the primal simplex finishes
+        from that basis (second phase).
+        """
+        self.column_idxs = {variable: j for j, variable in enumerate(self.all_variables)}
+        if np.all(self.primal_infeasibilities(tableau, current_basis) <= self.feasibility_tol):
+            start_time = time.time()
+            final_solution = self.solve_tableau(tableau, current_basis)
+            end_time = time.time()
+            final_solution["method"] = "primal"
+            final_solution["first_phase_time"] = (end_time - start_time) * 1000
+            final_solution["has_two_phases"] = False
+            return final_solution
+
+        costs_shifted = bool(np.any(tableau[-1, :-1] < -self.optimality_tol))
+        if costs_shifted:
+            tableau[-1, :-1] = np.abs(tableau[-1, :-1])
+
+        final_solution = {"method": "dual"}
+
+        start_time = time.time()
+        temp_solution = self.solve_dual_tableau(tableau, current_basis)
+        end_time = time.time()
+        tableau = self.tableau
+
+        final_solution["has_two_phases"] = costs_shifted
+        final_solution['first_phase_time'] = (end_time - start_time) * 1000
+
+        if temp_solution["status"] != "Optimal" or not costs_shifted:
+            if temp_solution["status"] == "Infeasible":
+                self.solution = "Infeasible"
+            final_solution["num_pivot_steps_first_phase" if costs_shifted else "num_pivot_steps"] = temp_solution["num_pivot_steps"]
+            self.add_phase_statistics(final_solution, temp_solution)
+            final_solution["status"] = temp_solution["status"]
+            final_solution["value"] = temp_solution["value"]
+            return final_solution
+
+        final_solution["num_pivot_steps_first_phase"] = temp_solution["num_pivot_steps"]
+        self.add_phase_statistics(final_solution, temp_solution)
+
+        tableau = self.set_objective_row(tableau, obj_function, current_basis)
+
+        start_time = time.time()
+        temp_solution = self.solve_tableau(tableau, current_basis)
+        end_time = time.time()
+
+        final_solution["second_phase_time"] = (end_time - start_time) * 1000
+        final_solution["num_pivot_steps_second_phase"] = temp_solution["num_pivot_steps"]
+        final_solution["status"] = temp_solution["status"]
+        final_solution["value"] = temp_solution["value"]
+        self.add_phase_statistics(final_solution, temp_solution)
+
+        return final_solution
+
+    def solve_from_basis(self, lp_parser: LPParser, basis: list, at_upper_bound=()):
+        """
+        Solve the standard form problem starting from a given basis, e.g. the final basis of a solve in another
+        arithmetic, instead of the slack basis. The tableau of the basis is built (see install_basis) and reoptimize
+        finishes from it, so a basis that is already optimal costs no pivot.
+
+        Args:
+            basis: Basic variables, one per constraint. Variables that are not columns of the problem (e.g. artificial
+                variables) or whose column depends on the other basic columns are replaced by slack variables.
+            at_upper_bound: Nonbasic variables that sit at their upper bound.
+
+        Returns:
+            The result dictionary of reoptimize, with num_basis_repairs, the number of basic variables that were replaced.
+        """
+        self.lp_parser = lp_parser
+        self.fixed_at_upper_bound = {}
+        self.num_constraints = len(lp_parser.constraints)
+        self.num_variables = len(lp_parser.variables)
+        self.negative_rhs_idxs = {}
+
+        if any(upper < 0 for upper in lp_parser.upper_bounds.values()):
+            return self.infeasible_without_pivots()
+
+        tableau, current_basis, num_basis_repairs = self.install_basis(lp_parser, basis, at_upper_bound)
+        final_solution = self.reoptimize(tableau, current_basis, lp_parser.obj_function)
+        final_solution["num_basis_repairs"] = num_basis_repairs
+        return final_solution
+
+    def install_basis(self, lp_parser: LPParser, basis: list, at_upper_bound=()):
+        """
+        Tableau of the given basis (see solve_from_basis), with its objective row. Starting from the slack basis, every
+        basic variable of `basis` is pivoted in on a row whose slack variable is not in `basis`, the one with the largest
+        entry in its column. A basic variable whose column is zero on all those rows is left out.
+
+        Returns:
+            (tableau, current_basis, num_basis_repairs)
+        """
+        tableau = self.build_tableau(lp_parser, 0, flip_negative_rows=False)
+        self.all_variables = self.original_variables + [f'_s{i+1}' for i in range(self.num_constraints)]
+        self.init_bounds(lp_parser.upper_bounds)
+        self.column_idxs = {variable: j for j, variable in enumerate(self.all_variables)}
+        self.edge_weights = None
+        current_basis = self.all_variables[self.num_variables:]
+
+        for variable in at_upper_bound:
+            j = self.column_idxs.get(variable)
+            if j is not None and self.upper_bounds is not None and self.upper_bounds[j] < math.inf and not self.complemented[j]:
+                tableau = self.complement_column(tableau, j)
+
+        num_basis_repairs = 0
+        target_basis = set(basis)
+        for variable in basis:
+            if variable in current_basis:
+                continue
+            if variable not in self.column_idxs:
+                num_basis_repairs += 1
+                continue
+
+            j = self.column_idxs[variable]
+            rows = np.array([i for i, basic_variable in enumerate(current_basis) if basic_variable not in target_basis], dtype=int)
+            entries = np.abs(tableau[rows, j]) if len(rows) > 0 else np.array([])
+            if len(rows) == 0 or entries.max() <= self.feasibility_tol:
+                num_basis_repairs += 1
+                continue
+
+            row = rows[np.argmax(entries)]
+            tableau = self.perform_pivot_operation(tableau, j, row)
+            current_basis[row] = variable
+
+        tableau = self.set_objective_row(tableau, lp_parser.obj_function, current_basis)
+        return tableau, current_basis, num_basis_repairs
+
+    def set_objective_row(self, tableau, obj_function, current_basis):
+        """
+        Write the objective function into the last row of the tableau and make it zero on the basic columns.
+        Returns the tableau, like perform_pivot_operation.
+        """
+        column_idxs = {variable: j for j, variable in enumerate(self.all_variables)}
+        tableau[-1] = 0
+        for variable, coefficient in obj_function.items():
+            if variable in column_idxs:
+                tableau[-1, column_idxs[variable]] = - coefficient
+            else:
+                # A column dropped after Phase 1, whose variable stays at 0 or at its upper bound.
+                tableau[-1, -1] += coefficient * self.fixed_at_upper_bound.get(variable, 0)
+        if self.complemented is not None:
+            for j in np.where(self.complemented)[0]:
+                tableau[-1, -1] -= tableau[-1, j] * self.upper_bounds[j]
+                tableau[-1, j] = - tableau[-1, j]
+        for idx, basic_variable in enumerate(current_basis):
+            basic_variable_idx = column_idxs[basic_variable]
+            if tableau[-1, basic_variable_idx] != 0:
+                tableau[-1] -= tableau[idx] * tableau[-1, basic_variable_idx]
+        return tableau
+
+    def get_state(self):
+        """
+        Snapshot of the last solve, to be passed to resolve: the final tableau and basis together with a copy of the problem.
+        The state is opaque; it does not change when the solver or the LPParser are used again.
+        """
+        if self.tableau is None:
+            print('No LP has been solved yet, thus returning None.')
+            return None
+
+        # Warm starts need a tableau of the problem itself: no artificial column left and every slack column
+        # (which together hold the basis inverse) still there. Otherwise resolve falls back to a full solve.
+        slack_variables = [f'_s{i+1}' for i in range(self.num_constraints)]
+        warm = not any(variable.startswith('_zzz') for variable in self.all_variables) and set(slack_variables) <= set(self.all_variables)
+        # After a presolve, the tableau belongs to the presolved problem rather than to the one given to solve.
+        warm = warm and self.presolver is None
+
+        complemented = None if self.complemented is None else self.complemented.copy()
+        return SimplexState(self.arithmetic, self.tableau.copy(), list(self.current_basis), list(self.all_variables),
+                            list(self.original_variables), self.lp_parser, warm, complemented)
+
+    def resolve(self, state, obj_function: dict = None, rhs: dict = None, new_constraints: list = None):
+        """
+        Re-optimize from the final basis of an earlier solve after changing the problem, instead of solving it from scratch.
+        Changes of the objective keep the basis primal feasible, so the primal simplex continues from it; changes of the RHS
+        and appended rows keep it dual feasible, so the dual simplex restores feasibility (see reoptimize).
+        Changes are expressed on the standard form view of the problem (LPParser.variables, constraints and obj_function).
+
+        Args:
+            state: The SimplexState returned by get_state. It is not modified, so it can be reused for several variations.
+            obj_function: New objective coefficients, as {variable: coefficient}, for the variables that change.
+            rhs: New RHS values, as {constraint index: value}, for the constraints that change.
+            new_constraints: Constraints to append, as dicts in the format of LPParser.constraints ({variable: coefficient} and 'rhs').
+                They may only use variables of the problem.
+
+        Returns:
+            The same result dictionary as solve, with "warm_start" telling whether the final basis could be reused.
+            get_state then returns the state of the modified problem.
+        """
+        if state.arithmetic != self.arithmetic:
+            raise Exception(f"The state comes from a {state.arithmetic} solve, but this solver uses {self.arithmetic} arithmetic.")
+
+        lp_parser = state.copy_problem()
+        for variable, coefficient in (obj_function or {}).items():
+            if variable not in lp_parser.variables:
+                raise Exception(f"Unknown variable {variable} in the objective function.")
+            lp_parser.obj_function[variable] = Fraction(str(coefficient))
+        for constraint_idx, value in (rhs or {}).items():
+            lp_parser.constraints[constraint_idx]['rhs'] = Fraction(str(value))
+        for constraint in (new_constraints or []):
+            if any(variable != 'rhs' and variable not in lp_parser.variables for variable in constraint):
+                raise Exception("Appended constraints may only use variables of the problem.")
+            lp_parser.constraints.append({variable: Fraction(str(value)) for variable, value in constraint.items()})
+        lp_parser.num_constraints = len(lp_parser.constraints)
+
+        if not state.warm:
+            final_solution = self.solve(lp_parser)
+            final_solution["warm_start"] = False
+            return final_solution
+
+        self.lp_parser = lp_parser
+        self.presolver = None
+        self.num_variables = len(lp_parser.variables)
+        self.num_constraints = len(state.constraints)
+        self.original_variables = list(state.original_variables)
+        self.all_variables = list(state.all_variables)
+        self.init_bounds(lp_parser.upper_bounds)
+        if state.complemented is not None:
+            self.complemented = state.complemented.copy()
+        tableau = state.tableau.copy()
+        current_basis = list(state.current_basis)
+
+        # The slack columns of the tableau are B^-1 (with the sign of their row), so the new basic values are that block times the new RHS.
+        # Complemented columns (-B^-1 a_j) add their upper bound times the column.
+        if rhs:
+            slack_idxs = [self.all_variables.index(f'_s{i+1}') for i in range(self.num_constraints)]
+            b = [constraint['rhs'] for constraint in lp_parser.constraints[:self.num_constraints]]
+            b = np.array(b, dtype=np.float64) if self.arithmetic == "float64" else np.array(b, dtype=object)
+            tableau[:, -1] = tableau[:, slack_idxs] @ b
+            if self.complemented is not None:
+                for j in np.where(self.complemented)[0]:
+                    tableau[:, -1] += tableau[:, j] * self.upper_bounds[j]
+
+        for constraint in lp_parser.constraints[self.num_constraints:]:
+            tableau = self.append_constraint(tableau, current_basis, constraint)
+
+        tableau = self.set_objective_row(tableau, lp_parser.obj_function, current_basis)
+        final_solution = self.reoptimize(tableau, current_basis, lp_parser.obj_function)
+        final_solution["warm_start"] = True
+        self.report_objective_value(final_solution, lp_parser)
+        return final_solution
+
+    def append_constraint(self, tableau, current_basis, constraint):
+        """
+        Add a <= row and its slack column to the tableau of the current basis, with the new slack variable basic in it.
+        The basic columns are eliminated from the row, which can leave the basis primal infeasible but never dual infeasible.
+        """
+        self.num_constraints += 1
+        self.all_variables.append(f'_s{self.num_constraints}')
+        if self.upper_bounds is not None:
+            self.upper_bounds = np.append(self.upper_bounds, math.inf)
+            self.complemented = np.append(self.complemented, False)
+
+        tableau = np.insert(tableau, -1, 0, axis=1)
+        row = np.zeros(tableau.shape[1], dtype=tableau.dtype)
+        if self.arithmetic != "float64":
+            row[:] = Fraction(0)
+        column_idxs = {variable: j for j, variable in enumerate(self.all_variables)}
+        for variable, coefficient in constraint.items():
+            if variable != 'rhs':
+                row[column_idxs[variable]] = coefficient
+        row[-2] = Fraction(1)
+        row[-1] = constraint['rhs']
+        if self.complemented is not None:
+            for j in np.where(self.complemented)[0]:
+                row[-1] -= row[j] * self.upper_bounds[j]
+                row[j] = - row[j]
+
+        for idx, basic_variable in enumerate(current_basis):
+            basic_variable_idx = column_idxs[basic_variable]
+            if row[basic_variable_idx] != 0:
+                row -= tableau[idx] * row[basic_variable_idx]
+
+        current_basis.append(self.all_variables[-1])
+        return np.insert(tableau, -1, row, axis=0)
+
+    def solve_dual_tableau(self, tableau, current_basis):
+        """
+        Dual simplex on a dual feasible tableau (non-negative objective row), until every RHS is non-negative
+        (and, for bounded variables, at most the upper bound of its basic variable).
+        """
+        self.tableau = tableau
+        self.current_basis = current_basis
+        self.column_idxs = {variable: j for j, variable in enumerate(self.all_variables)}
+        self.edge_weights = None
+        self.reset_iteration_state()
+        trace = self.trace
+        if trace is not None:
+            trace.start_phase(self.all_variables)
+
+        num_pivot_steps = 0
+        while True:
+            pricing_start_time = time.perf_counter_ns()
+            leaving_variable_index = self.find_leaving_row_dual(tableau, current_basis)
+            pricing_ns = time.perf_counter_ns() - pricing_start_time
+            self.pricing_time += pricing_ns / 1e6
+            if leaving_variable_index == -1:
+                break
+            if self.pivot_limit is not None and num_pivot_steps >= self.pivot_limit:
+                return {"status": "PivotLimit", "value": None, "num_pivot_steps": num_pivot_steps, "current_basis": current_basis, **self.statistics()}
+
+            if trace is not None:
+                complement_start_time = time.perf_counter_ns()
+            leaving_column = self.column_idxs[current_basis[leaving_variable_index]]
+            if tableau[leaving_variable_index, -1] >= 0:
+                # The basic variable is above its upper bound: complement it, so that its row gets a negative RHS
+                # (u - x_B), and it leaves the basis at its upper bound.
+                tableau = self.complement_column(tableau, leaving_column)
+                tableau[leaving_variable_index] = - tableau[leaving_variable_index]
+
+            if trace is not None:
+                ratio_test_start_time = time.perf_counter_ns()
+            pivot_column, step_length = self.dual_ratio_test(tableau[leaving_variable_index, :-1], tableau[-1, :-1])
+            if trace is not None:
+                ratio_test_ns = time.perf_counter_ns() - ratio_test_start_time
+            if pivot_column == -1:
+                # The row has no negative entry, so its basic variable can never become non-negative.
+                return {"status": "Infeasible", "value": - math.inf, "num_pivot_steps": num_pivot_steps, "current_basis": current_basis, **self.statistics()}
+
+            if trace is not None:
+                pivot_start_time = time.perf_counter_ns()
+            self.record_step_length(step_length)
+            tableau = self.perform_pivot_operation(tableau, pivot_column, leaving_variable_index)
+            if trace is not None:
+                # The complement of a leaving variable above its upper bound counts as part of the pivot.
+                pivot_ns = time.perf_counter_ns() - pivot_start_time + ratio_test_start_time - complement_start_time
+                trace.record(self, tableau, "dual_pivot", num_pivot_steps, pivot_column, leaving_column, leaving_variable_index, step_length,
+                             pricing_ns, ratio_test_ns, pivot_ns)
+
+            num_pivot_steps += 1
+            current_basis[leaving_variable_index] = self.all_variables[pivot_column]
+
+        return {"status": "Optimal", "value": float(tableau[-1, -1]), "num_pivot_steps": num_pivot_steps, "current_basis": current_basis, **self.statistics()}
+
+    def find_leaving_row_dual(self, tableau, current_basis):
+        """
+        Dual pricing: choose a row with a negative RHS (or, for bounded variables, one above its upper bound),
+        according to the pivot rule. Returns -1 if the basis is primal feasible.
+        """
+        infeasibilities = self.primal_infeasibilities(tableau, current_basis)
+        infeasible_rows = np.where(infeasibilities > self.feasibility_tol)[0]
+        self.num_priced_columns += len(infeasibilities)
+        if len(infeasible_rows) == 0:
+            return -1
+
+        if self.pivot_rule == "Bland" or self.bland_fallback:
+            return min(infeasible_rows, key=lambda row: self.all_variables.index(current_basis[row]))
+
+        elif self.pivot_rule == "Random":
+            return np.random.choice(infeasible_rows)
+
+        elif self.pivot_rule in EDGE_WEIGHT_RULES:
+            # Infeasibility relative to the norm of the row.
+            rows = tableau[infeasible_rows, :-1].astype(np.float64)
+            infeasibilities = infeasibilities[infeasible_rows].astype(np.float64)
+            return infeasible_rows[np.argmax(infeasibilities ** 2 / np.sum(rows ** 2, axis=1))]
+
+        # Dantzig: most infeasible row.
+        return infeasible_rows[np.argmax(infeasibilities[infeasible_rows])]
+
+    def primal_infeasibilities(self, tableau, current_basis):
+        """How far each basic variable is below zero or above its upper bound (<= 0 where it is within its bounds)."""
+        rhs = tableau[:-1, -1]
+        if self.upper_bounds is None:
+            return - rhs
+
+        upper_bounds = self.basic_upper_bounds(current_basis)
+        bounded = np.where(upper_bounds < math.inf)[0]
+        infeasibilities = - rhs
+        infeasibilities[bounded] = np.maximum(infeasibilities[bounded], rhs[bounded] - upper_bounds[bounded])
+        return infeasibilities
+
+    def init_bounds(self, upper_bounds: dict):
+        """
+        Set up the bounded variables 0 <= x_j <= u_j of upper_bounds ({variable: u_j}), which need no constraint row:
+            - self.upper_bounds holds the upper bound of every tableau column (inf if it has none),
+            - self.complemented tells which columns hold x'_j = u_j - x_j instead of x_j (see complement_column),
+              which is how a nonbasic variable sits at its upper bound.
+        Both are None if no variable has an upper bound, which leaves the simplex exactly as without bounds.
+        """
+        if len(upper_bounds) == 0:
+            self.upper_bounds = None
+            self.complemented = None
+            return
+
+        if self.arithmetic == "float64":
+            self.upper_bounds = np.full(len(self.all_variables), math.inf, dtype=np.float64)
+        else:
+            self.upper_bounds = np.full(len(self.all_variables), math.inf, dtype=object)
+        for j, variable in enumerate(self.all_variables):
+            if variable in upper_bounds:
+                self.upper_bounds[j] = upper_bounds[variable] if self.arithmetic != "float64" else float(upper_bounds[variable])
+        self.complemented = np.zeros(len(self.all_variables), dtype=bool)
+
+    def basic_upper_bounds(self, current_basis):
+        return self.upper_bounds[[self.column_idxs[variable] for variable in current_basis]]
+
+    def complement_column(self, tableau, column: int):
+        """
+        Substitute x_j = u_j - x'_j in every row (objective included): the column changes sign and the RHS loses u_j times it.
+        A nonbasic column at 0 moves to its other bound (bound flip); complementing twice gives back the variable.
+        Returns the tableau, like perform_pivot_operation.
+        """
+        tableau[:, -1] -= tableau[:, column] * self.upper_bounds[column]
+        tableau[:, column] = - tableau[:, column]
+        self.complemented[column] = not self.complemented[column]
+
+        if self.edge_weights is not None and self.float_tableau is not tableau:
+            self.float_tableau[:, column] = - self.float_tableau[:, column]
+        return tableau
+
+    def dual_ratio_test(self, row, reduced_costs):
+        """
+        Harris two-pass dual ratio test over the columns with a negative entry in the leaving row.
+        Ties go to the largest pivot element in absolute value (or the smallest column index under Bland's rule).
+
+        Returns:
+            (pivot_column, step_length), with pivot_column = -1 if the leaving row has no negative entry.
+        """
+        eligible = np.where(row < -self.feasibility_tol)[0]
+        if len(eligible) == 0:
+            return -1, None
+
+        pivots = - row[eligible]
+        reduced_costs = reduced_costs[eligible]
+        if self.arithmetic == "float64":
+            reduced_costs = np.maximum(reduced_costs, 0)
+        ratios = reduced_costs / pivots
+
+        max_step = ((reduced_costs + self.optimality_tol) / pivots).min()
+        candidates = np.where(ratios <= max_step)[0]
+
+        if self.pivot_rule == "Bland" or self.bland_fallback:
+            entering = candidates[0]
+        else:
+            entering = candidates[np.argmax(pivots[candidates])]
+
+        return eligible[entering], ratios[entering]
+
+    def crash_basis(self, tableau):
+        """
+        Crash for two-phase problems. Rows with a negative RHS are kept as they are and share one artificial
+        column with a -1 coefficient. Starting from the all-slack basis, the artificial variable enters on the
+        row with the most negative RHS: after this single pivot every RHS is non-negative, so Phase 1 starts
+        from the slack columns plus one artificial variable, on a tableau with one artificial column instead
+        of one per infeasible row.
+
+        Returns:
+            (tableau, current_basis): the tableau (see perform_pivot_operation) and the starting basis for Phase 1.
+        """
+        artificial_column = self.num_variables + self.num_constraints
+
+        # Phase 1: maximize -1 * the artificial variable.
+        tableau[-1, artificial_column] = Fraction(1)
+        current_basis = self.all_variables[self.num_variables:artificial_column]
+
+        leaving_variable_index = np.argmin(tableau[:-1, -1])
+        tableau = self.perform_pivot_operation(tableau, artificial_column, leaving_variable_index)
+        current_basis[leaving_variable_index] = self.all_variables[artificial_column]
+
+        return tableau, current_basis
+
     def perform_pivot_operation(self, tableau, pivot_column: int, leaving_variable_index: int):
+        """
+        Pivot on (leaving_variable_index, pivot_column) in place. Returns the tableau to use from then on, which is the
+        same array here; IntegerSimplexSolver may replace it by one of another dtype, and sets self.tableau when it does.
+        """
+        if self.arithmetic == "float64":
+            self.rank_one_pivot(tableau, pivot_column, leaving_variable_index)
+            return tableau
+
         # Set the pivot row to have 1 in the pivot column.
         tableau[leaving_variable_index, :] *= (1 / tableau[leaving_variable_index, pivot_column])
 
@@ -157,17 +864,104 @@ class SimplexSolver:
                 continue
 
             tableau[i, :] -= tableau[leaving_variable_index, :] * tableau[i, pivot_column]
+        return tableau
+
+    def add_phase_statistics(self, final_solution, phase_solution):
+        for key in SUMMED_STATISTICS:
+            final_solution[key] = final_solution.get(key, 0) + phase_solution[key]
+
+    def reset_iteration_state(self):
+        self.num_degenerate_pivots = 0
+        self.num_bound_flips = 0
+        self.degenerate_run = 0
+        self.bland_fallback = False
+
+        self.pricing_start = 0
+        self.candidate_list = None
+        self.candidate_list_age = 0
+        self.num_priced_columns = 0
+        self.pricing_time = 0
+
+    def price(self, reduced_costs_of, num_columns: int):
+        """
+        Find the improving candidate columns according to self.pricing.
+
+        Args:
+            reduced_costs_of: function returning the reduced costs (negative means improving) of the
+                columns at the given indices, or of all columns if given None.
+            num_columns: number of columns that can enter the basis.
+
+        Returns:
+            (candidates, reduced_costs): sorted indices of improving columns and their reduced costs.
+            No candidates means the current basis is optimal.
+        """
+        if self.pricing == "partial" and not self.bland_fallback:
+            block_size = self.partial_pricing_block or max(1, math.ceil(num_columns / 4))
+            scanned = 0
+            while scanned < num_columns:
+                start = self.pricing_start
+                end = min(start + block_size, num_columns)
+                self.pricing_start = end % num_columns
+
+                idxs = np.arange(start, end)
+                reduced_costs = reduced_costs_of(idxs)
+                scanned += end - start
+                self.num_priced_columns += end - start
+
+                improving = reduced_costs < -self.optimality_tol
+                if np.any(improving):
+                    return idxs[improving], reduced_costs[improving]
+
+            return np.array([], dtype=int), np.array([])
+
+        if self.pricing == "multiple" and not self.bland_fallback and self.candidate_list is not None and self.candidate_list_age < self.multiple_pricing_size:
+            # Cheap re-pricing of the candidate list only.
+            reduced_costs = reduced_costs_of(self.candidate_list)
+            self.num_priced_columns += len(self.candidate_list)
+            self.candidate_list_age += 1
+
+            improving = reduced_costs < -self.optimality_tol
+            self.candidate_list = self.candidate_list[improving]
+            if len(self.candidate_list) > 0:
+                return self.candidate_list, reduced_costs[improving]
+
+        reduced_costs = reduced_costs_of(None)
+        self.num_priced_columns += num_columns
+        candidates = np.where(reduced_costs < -self.optimality_tol)[0]
+
+        if self.pricing == "multiple":
+            if len(candidates) > self.multiple_pricing_size:
+                most_attractive = np.argsort(reduced_costs[candidates].astype(np.float64), kind='stable')[:self.multiple_pricing_size]
+                candidates = np.sort(candidates[most_attractive])
+            self.candidate_list = candidates
+            self.candidate_list_age = 0
 
+        return candidates, reduced_costs[candidates]
+
+    def rank_one_pivot(self, tableau, pivot_column: int, leaving_variable_index: int):
+        # A single rank-1 update: subtract (pivot column) x (normalised pivot row) from the whole float64 tableau.
+        pivot_row = tableau[leaving_variable_index, :] / tableau[leaving_variable_index, pivot_column]
+        pivot_col = tableau[:, pivot_column].copy()
+        pivot_col[leaving_variable_index] = 0
+        tableau -= np.outer(pivot_col, pivot_row)
+        tableau[leaving_variable_index, :] = pivot_row
 
     def find_entering_variable(self, tableau):
-        # Find the index of the smallest negative coefficient.
-        negative_indices = np.where(tableau[-1, :-1] < 0)[0]
+        # Find the negative coefficients of the objective row (all of them, or some of them with partial/multiple pricing).
+        negative_indices, reduced_costs = self.price(lambda idxs: tableau[-1, :-1] if idxs is None else tableau[-1, idxs], tableau.shape[1] - 1)
         if len(negative_indices) == 0:
             return -1  # No negative coefficients, end of computations.
-        
+
+        return self.select_entering_variable(negative_indices, reduced_costs)
+
+    def select_entering_variable(self, negative_indices, reduced_costs):
+        """Apply the pivot rule to the improving columns negative_indices, with (negative) reduced_costs."""
+        if self.bland_fallback:
+            return negative_indices[0]
+
         # Smallest negative coefficient
         if self.pivot_rule == "Dantzig":
-            pivot_column = negative_indices[np.argmin(tableau[-1, negative_indices])]
+            pivot_column = negative_indices[np.argmin(reduced_costs)]
         
         # First negative coefficient (smallest index)
         elif self.pivot_rule == "Bland":
@@ -177,83 +971,200 @@ class SimplexSolver:
         elif self.pivot_rule == "Random":
             pivot_column = np.random.choice(negative_indices)
         
-        elif self.pivot_rule == "SteepestEdge":
-            # For steepest edge, we look for the variable that gives the 
-            # steepest descent when normalized by the Euclidean norm
-            max_steepness = 0.0
-            pivot_column = -1
-            
-            for col in negative_indices:
-                column_vector = tableau[:, col]
-                
-                column_float = np.array([float(x) for x in column_vector])
-                
-                norm = np.linalg.norm(column_float)
-                
-                steepness = abs(float(tableau[-1, col])) / norm
-                
-                if steepness > max_steepness:
-                    max_steepness = steepness
-                    pivot_column = col
+        elif self.pivot_rule in EDGE_WEIGHT_RULES:
+            # For steepest edge (and its Devex approximation), we look for the variable that gives the
+            # steepest descent, i.e. the largest squared reduced cost relative to its edge weight.
+            # The weights are maintained incrementally by update_edge_weights.
+            reduced_costs = reduced_costs.astype(np.float64)
+            pivot_column = negative_indices[np.argmax(reduced_costs ** 2 / self.edge_weights[negative_indices])]
 
         return pivot_column
-    
+
+    def init_edge_weights(self, tableau):
+        """
+        Set up the pricing weights of the columns for the current basis.
+            - SteepestEdge: exact Goldfarb-Reid weights 1 + ||B^-1 a_j||^2, computed once per phase.
+            - Devex: reference framework made of the current nonbasic variables, i.e. all weights 1.
+        In exact arithmetic, a float64 copy of the tableau is pivoted alongside the exact one,
+        as the weights only steer pricing and do not need to be exact.
+        """
+        if self.pivot_rule not in EDGE_WEIGHT_RULES:
+            self.edge_weights = None
+            return
+
+        if self.arithmetic == "float64":
+            self.float_tableau = tableau
+        else:
+            self.float_tableau = tableau.astype(np.float64)
+
+        if self.pivot_rule == "SteepestEdge":
+            self.edge_weights = 1 + np.sum(self.float_tableau[:-1, :-1] ** 2, axis=0)
+        else:
+            self.edge_weights = np.ones(tableau.shape[1] - 1)
+
+    def update_edge_weights(self, pivot_column: int, leaving_variable_index: int, leaving_column: int):
+        """
+        Update the pricing weights for the pivot on (leaving_variable_index, pivot_column).
+        Must be called before the pivot is applied, as it uses the current pivot row and column.
+        """
+        alpha_q = self.float_tableau[:-1, pivot_column]
+        alpha_rq = alpha_q[leaving_variable_index]
+        # Pivot row divided by the pivot element: how much each column changes with the entering variable.
+        ratios = self.float_tableau[leaving_variable_index, :-1] / alpha_rq
+        weight_q = self.edge_weights[pivot_column]
+
+        if self.pivot_rule == "SteepestEdge":
+            # Goldfarb-Reid update: w_j = w_j - 2 r_j (alpha_j . alpha_q) + r_j^2 w_q, kept above 1 + r_j^2.
+            dot_products = alpha_q @ self.float_tableau[:-1, :-1]
+            self.edge_weights = np.maximum(self.edge_weights - 2 * ratios * dot_products + ratios ** 2 * weight_q, 1 + ratios ** 2)
+        else:
+            self.edge_weights = np.maximum(self.edge_weights, ratios ** 2 * weight_q)
+
+        self.edge_weights[leaving_column] = max(weight_q / alpha_rq ** 2, 1)
+        self.edge_weights[pivot_column] = 1
+
+        if self.arithmetic != "float64":
+            self.rank_one_pivot(self.float_tableau, pivot_column, leaving_variable_index)
+
     def solve_tableau(self, tableau, current_basis):
-        visited_states = set()
+        # Kept for get_state, as the tableau and the basis are updated in place.
+        self.tableau = tableau
+        self.current_basis = current_basis
+        self.column_idxs = {variable: j for j, variable in enumerate(self.all_variables)}
+        self.init_edge_weights(tableau)
+        self.reset_iteration_state()
+        # Stage timings are only taken with a trace (see SimplexTrace), pricing_time always.
+        trace = self.trace
+        if trace is not None:
+            trace.start_phase(self.all_variables)
 
         num_pivot_steps = 0
         while True:
-            if tuple(current_basis) in visited_states:
-                print('Cycle detected. Exiting.')
-                return {"status": "Unsolvable (cycles)", "value": - math.inf, "num_pivot_steps": num_pivot_steps, "current_basis": current_basis}
-            else:
-                visited_states.add(tuple(current_basis))
-
+            pricing_start_time = time.perf_counter_ns()
             pivot_column = self.find_entering_variable(tableau)
+            pricing_ns = time.perf_counter_ns() - pricing_start_time
+            self.pricing_time += pricing_ns / 1e6
             if pivot_column == -1:
                 break
+            if self.pivot_limit is not None and num_pivot_steps + self.num_bound_flips >= self.pivot_limit:
+                return {"status": "PivotLimit", "value": None, "num_pivot_steps": num_pivot_steps, "current_basis": current_basis, **self.statistics()}
 
-            # Calculate the ratios for the pivot operation
-            denominator = tableau[:-1, pivot_column]
+            if trace is not None:
+                ratio_test_start_time = time.perf_counter_ns()
+            upper_bounds = None if self.upper_bounds is None else self.basic_upper_bounds(current_basis)
+            leaving_variable_index, step_length = self.ratio_test(tableau[:-1, pivot_column], tableau[:-1, -1], lambda row: self.all_variables.index(current_basis[row]), upper_bounds)
+            if trace is not None:
+                ratio_test_ns = time.perf_counter_ns() - ratio_test_start_time
 
-            ratios = []
-            # Use for loop, as np.where does not really work on Fractions.
-            for i in range(len(denominator)):
-                if denominator[i] != 0:
-                    ratios.append(tableau[i, -1] / denominator[i])
-                else:
-                    ratios.append(Fraction(-1))
+            if self.upper_bounds is not None and self.upper_bounds[pivot_column] < math.inf and (leaving_variable_index == -1 or self.upper_bounds[pivot_column] <= step_length):
+                # Bound flip: the entering variable reaches its own upper bound before any basic variable
+                # reaches one of its bounds, so it moves to that bound without a pivot.
+                if trace is not None:
+                    pivot_start_time = time.perf_counter_ns()
+                self.record_step_length(self.upper_bounds[pivot_column])
+                tableau = self.complement_column(tableau, pivot_column)
+                self.num_bound_flips += 1
+                if trace is not None:
+                    trace.record(self, tableau, "bound_flip", num_pivot_steps + self.num_bound_flips - 1, pivot_column, -1, -1, self.upper_bounds[pivot_column],
+                                 pricing_ns, ratio_test_ns, time.perf_counter_ns() - pivot_start_time)
+                continue
 
-            ratios = np.array(ratios)
-            # Only consider positive ratios
-            positive_ratios = ratios[ratios > 0]
-            
-            if positive_ratios.size == 0:
-                # If no positive ratio, we have to make a degenerate move.
+            if leaving_variable_index == -1:
+                self.solution = "Unbounded"
+                return {"status": "Unbounded", "value": math.inf, "num_pivot_steps": num_pivot_steps, "current_basis": current_basis, **self.statistics()}
 
-                if ratios[ratios == 0].size == 0:
-                    self.solution = "Unbounded"
-                    return {"status": "Unbounded", "value": math.inf, "num_pivot_steps": num_pivot_steps, "current_basis": current_basis}
-                
-                # If we have at least a ratio of 0, make any degenerate move
-                # (the first one in this case).
-                leaving_variable_index = np.where(ratios == 0)[0][0]
+            if trace is not None:
+                pivot_start_time = time.perf_counter_ns()
+            self.record_step_length(step_length)
 
-            else:
-                # If we have a positive ratio, can make an improving move.
+            leaving_column = self.column_idxs[current_basis[leaving_variable_index]]
+            # With a negative pivot element the basic variable increases to its upper bound, where it leaves.
+            leaves_at_upper_bound = self.upper_bounds is not None and tableau[leaving_variable_index, pivot_column] < 0
 
-                # Get the index of leaving variable
-                leaving_variable_index = np.argmin(positive_ratios)
-                leaving_variable_index = np.where(ratios == positive_ratios[leaving_variable_index])[0][0]
+            if self.edge_weights is not None:
+                self.update_edge_weights(pivot_column, leaving_variable_index, leaving_column)
 
-            self.perform_pivot_operation(tableau, pivot_column, leaving_variable_index)
+            tableau = self.perform_pivot_operation(tableau, pivot_column, leaving_variable_index)
+            if leaves_at_upper_bound:
+                tableau = self.complement_column(tableau, leaving_column)
+            if trace is not None:
+                trace.record(self, tableau, "pivot", num_pivot_steps + self.num_bound_flips, pivot_column, leaving_column, leaving_variable_index, step_length,
+                             pricing_ns, ratio_test_ns, time.perf_counter_ns() - pivot_start_time)
 
             # Update state
             num_pivot_steps += 1
             entering_variable = self.all_variables[pivot_column]
             current_basis[leaving_variable_index] = entering_variable
-    
-        return {"status": "Optimal", "value": float(tableau[-1, -1]), "num_pivot_steps": num_pivot_steps, "current_basis": current_basis}
+
+        return {"status": "Optimal", "value": float(tableau[-1, -1]), "num_pivot_steps": num_pivot_steps, "current_basis": current_basis, **self.statistics()}
+
+    def ratio_test(self, column, rhs, basic_variable_index, upper_bounds=None):
+        """
+        Vectorized Harris two-pass ratio test over the rows with a positive entry in the entering column
+        (and, given the upper_bounds of the basic variables, the rows with a negative entry whose basic variable
+        has a finite upper bound, which it reaches after (u - rhs) / -entry). Works on both Fraction (object) and float64 arrays.
+            - Pass 1: the largest step that keeps every basic variable within feasibility_tol of its bound.
+            - Pass 2: among the rows whose ratio does not exceed that step, the one with the largest pivot element
+              leaves, which keeps pivots well conditioned and breaks degenerate ties.
+        In exact arithmetic (feasibility_tol = 0) pass 1 is the usual minimum ratio and pass 2 only breaks exact ties.
+        Under Bland's rule (chosen, or as the anti-cycling fallback) ties go instead to the row whose basic variable
+        has the smallest index, as given by basic_variable_index(row).
+
+        Returns:
+            (leaving_row, step_length), with leaving_row = -1 if the entering column is unbounded.
+        """
+        eligible = np.where(column > self.feasibility_tol)[0]
+        distances = rhs[eligible]
+        if upper_bounds is not None:
+            increasing = np.where((column < -self.feasibility_tol) & (upper_bounds < math.inf))[0]
+            eligible = np.concatenate([eligible, increasing])
+            distances = np.concatenate([distances, upper_bounds[increasing] - rhs[increasing]])
+        if len(eligible) == 0:
+            return -1, None
+
+        pivots = np.abs(column[eligible])
+        if self.arithmetic == "float64":
+            # Clip slightly negative distances (round-off) so they count as degenerate rows.
+            distances = np.maximum(distances, 0)
+        ratios = distances / pivots
+
+        max_step = ((distances + self.feasibility_tol) / pivots).min()
+        candidates = np.where(ratios <= max_step)[0]
+
+        if len(candidates) > 1 and (self.pivot_rule == "Bland" or self.bland_fallback):
+            leaving = min(candidates, key=lambda k: basic_variable_index(eligible[k]))
+        else:
+            leaving = candidates[np.argmax(pivots[candidates])]
+
+        return eligible[leaving], ratios[leaving]
+
+    def record_step_length(self, step_length):
+        """
+        Anti-cycling: after degenerate_pivot_limit degenerate pivots in a row, pricing and the ratio test
+        switch to Bland's rule, which cannot cycle, until the next pivot that makes progress.
+        This needs no history of visited bases, so memory stays bounded.
+        """
+        if step_length <= self.feasibility_tol:
+            self.num_degenerate_pivots += 1
+            self.degenerate_run += 1
+            if self.degenerate_run >= self.degenerate_pivot_limit:
+                self.bland_fallback = True
+        else:
+            self.degenerate_run = 0
+            self.bland_fallback = False
+
+    def statistics(self):
+        """Per-phase statistics reported in the result of solve_tableau."""
+        return {"pricing_time": self.pricing_time, "num_priced_columns": self.num_priced_columns, "num_degenerate_pivots": self.num_degenerate_pivots,
+                "num_bound_flips": self.num_bound_flips}
+
+    def tableau_bit_lengths(self, tableau):
+        """(largest numerator bit length, largest denominator bit length) of the tableau entries, (-1, -1) for float64 tableaux."""
+        if self.arithmetic == "float64":
+            return -1, -1
+        numerator_bits = np.frompyfunc(lambda value: value.numerator.bit_length(), 1, 1)(tableau)
+        denominator_bits = np.frompyfunc(lambda value: value.denominator.bit_length(), 1, 1)(tableau)
+        return int(numerator_bits.max()), int(denominator_bits.max())
 
     def get_solution(self):
         if self.solution is None:
@@ -261,16 +1172,41 @@ class SimplexSolver:
             return -1
         
         return self.solution
+
+    def get_variable_values(self):
+        """
+        Values of the standard form variables (LPParser.variables) at the final basis of the last solve,
+        mapped back through the presolve (see Presolver.postsolve_values) if there was one.
+        """
+        if self.tableau is None:
+            print('No LP has been solved yet, thus returning None.')
+            return None
+
+        values = {variable: 0 for variable in self.original_variables}
+        values.update(self.fixed_at_upper_bound)
+        for row, basic_variable in enumerate(self.current_basis):
+            if basic_variable in values:
+                values[basic_variable] = self.tableau[row, -1]
+        if self.complemented is not None:
+            for j in np.where(self.complemented)[0]:
+                if self.all_variables[j] in values:
+                    values[self.all_variables[j]] = self.upper_bounds[j] - values[self.all_variables[j]]
+
+        if self.presolver is not None:
+            values = self.presolver.postsolve_values(values)
+        return values
     
     def sort_variables_key_function(self, var):
         """
         This function sorts the variables as such:
             - x1, x2, ..., x10 -> x1, x2, ..., x10
             - a, c, b, d -> a, b, c, d
+            - x, x_neg, x1, x1_neg -> x, x_neg, x1, x1_neg
         Need this function to handle both variables without digits in their name, but also those with digits.
+        The full name breaks ties (e.g. x1 and x1_neg), so that the column order does not depend on set iteration order.
         """
         match = re.match(r"([a-zA-Z]+)(\d*)", var)
         if match:
             prefix, num = match.groups()
-            return (prefix, int(num) if num else 0)  # Convert number to int for proper sorting
-        return (var, 0)
\ No newline at end of file
+            return (prefix, int(num) if num else 0, var)  # Convert number to int for proper sorting
+        return (var, 0, var)
\ No newline at end of file
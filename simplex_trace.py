@@ -0,0 +1,84 @@
+import json
+import numpy as np
+
+# Kinds of recorded iterations, stored by index in the "event" column.
+TRACE_EVENTS = ["pivot", "bound_flip", "dual_pivot"]
+# Columns of a trace and their dtypes.
+TRACE_COLUMNS = {
+    "phase": np.int32,
+    "iteration": np.int32,
+    "event": np.int8,
+    "entering": np.int32,
+    "leaving": np.int32,
+    "leaving_row": np.int32,
+    "step_length": np.float64,
+    "degenerate": np.bool_,
+    "pricing_ns": np.int64,
+    "ratio_test_ns": np.int64,
+    "pivot_ns": np.int64,
+    "numerator_bits": np.int32,
+    "denominator_bits": np.int32,
+}
+
+class SimplexTrace:
+    """
+    Per-iteration trace of SimplexSolver.solve_tableau and solve_dual_tableau, kept column by column:
+        - phase: index of the solve_tableau / solve_dual_tableau call since the trace was created (see phase_variables).
+        - iteration: pivot (or bound flip) number within the phase.
+        - event: index in TRACE_EVENTS.
+        - entering, leaving: tableau columns of the entering and leaving variables (-1 for none, e.g. for a bound flip).
+        - leaving_row: pivot row (-1 for a bound flip).
+        - step_length: ratio of the ratio test (float64), degenerate: whether it is within the feasibility tolerance of 0.
+        - pricing_ns, ratio_test_ns, pivot_ns: time of each stage, from time.perf_counter_ns. The pivot stage
+          includes the edge weight update and the complement of a variable leaving at its upper bound.
+        - numerator_bits, denominator_bits: largest bit length of the numerators and denominators of the tableau
+          after the iteration (see SimplexSolver.tableau_bit_lengths), -1 for float64 tableaux or if bit_lengths is False.
+          Computing them scans the tableau, which is not counted in any stage time.
+
+    Pass it to the solver (SimplexSolver(pivot_rule, trace=SimplexTrace())), which records the iterations of solve_tableau and
+    solve_dual_tableau (solve_revised for RevisedSimplexSolver and SparseSimplexSolver); without a trace it records nothing.
+    record is called once per iteration, so subclasses can override it to act on iterations as they happen.
+    """
+    def __init__(self, bit_lengths: bool = True):
+        self.bit_lengths = bit_lengths
+        self.columns = {name: [] for name in TRACE_COLUMNS}
+        # Names of the tableau columns of each phase, which entering and leaving refer to.
+        self.phase_variables = []
+
+    def start_phase(self, all_variables: list):
+        self.phase_variables.append(list(all_variables))
+
+    def record(self, solver, tableau, event: str, iteration: int, entering: int, leaving: int, leaving_row: int, step_length,
+               pricing_ns: int, ratio_test_ns: int, pivot_ns: int):
+        numerator_bits, denominator_bits = solver.tableau_bit_lengths(tableau) if self.bit_lengths else (-1, -1)
+        step_length = np.nan if step_length is None else float(step_length)
+        row = (len(self.phase_variables) - 1, iteration, TRACE_EVENTS.index(event), entering, leaving, leaving_row, step_length,
+               step_length <= solver.feasibility_tol, pricing_ns, ratio_test_ns, pivot_ns, numerator_bits, denominator_bits)
+        for column, value in zip(self.columns.values(), row):
+            column.append(value)
+
+    def arrays(self):
+        """The trace as one numpy array per column."""
+        return {name: np.array(values, dtype=TRACE_COLUMNS[name]) for name, values in self.columns.items()}
+
+    def stage_times(self):
+        """Total time (ms) of each stage over the whole trace."""
+        return {stage[:-3] + "_time": sum(self.columns[stage]) / 1e6 for stage in ["pricing_ns", "ratio_test_ns", "pivot_ns"]}
+
+    def save(self, filepath):
+        """Write the trace as a compressed .npz file: one array per column, and the event names and phase variables as JSON."""
+        metadata = json.dumps({"events": TRACE_EVENTS, "phase_variables": self.phase_variables})
+        np.savez_compressed(filepath, metadata=np.array(metadata), **self.arrays())
+
+    @staticmethod
+    def load(filepath):
+        """
+        Read a trace written by save.
+
+        Returns:
+            (columns, metadata): the column arrays and the dictionary with "events" and "phase_variables".
+        """
+        with np.load(filepath) as data:
+            columns = {name: data[name] for name in TRACE_COLUMNS}
+            metadata = json.loads(str(data["metadata"]))
+        return columns, metadata
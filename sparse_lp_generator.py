@@ -1,5 +1,6 @@
 import random
 import numpy as np
+from lp_writer import GeneratedLP, instance_seeds, to_fixed_point, write_lp_file
 
 class SparseLPGenerator:
     def __init__(self, precision=2, allow_negative_rhs=False, density=0.5):
@@ -123,6 +124,53 @@ class SparseLPGenerator:
                 
             f.write('End')
 
-# Example usage:
-generator = SparseLPGenerator(precision=4, density=0.5)  # 30% density
-generator.generate_sparse_lp("sparse_problem.lp", num_variables=100, num_constraints=100)
\ No newline at end of file
+    def draw_sparse_coefficients(self, rng, num_rows, num_variables, scale_factor=5):
+        """
+        Rows of generate_sparse_coefficients drawn at once: the non-zero positions of each row are the first
+        max(1, num_variables * density) columns of a random permutation, and each row is scaled by uniform(1, scale_factor).
+        """
+        num_nonzero = max(1, int(num_variables * self.density))
+        nonzero_indices = np.argsort(rng.random((num_rows, num_variables)), axis=1)[:, :num_nonzero]
+
+        coefficients = np.zeros((num_rows, num_variables))
+        np.put_along_axis(coefficients, nonzero_indices, rng.uniform(-1, 1, (num_rows, num_nonzero)), axis=1)
+
+        norms = np.linalg.norm(coefficients, axis=1, keepdims=True)
+        coefficients = np.divide(coefficients, norms, out=coefficients, where=norms > 0)
+        return coefficients * rng.uniform(1, scale_factor, (num_rows, 1))
+
+    def draw_instance(self, rng, num_variables, num_constraints):
+        """
+        Draw a whole problem at once from a numpy.random.Generator, with the distribution of generate_sparse_lp.
+
+        Returns:
+            (obj_coefficients, coefficients, rhs), rounded to the precision as fixed-point int64 arrays (see lp_writer.to_fixed_point).
+        """
+        obj_coefficients = self.draw_sparse_coefficients(rng, 1, num_variables, scale_factor=10)[0]
+        coefficients = self.draw_sparse_coefficients(rng, num_constraints, num_variables)
+        rhs = rng.uniform(-10 if self.allow_negative_rhs else 0, 10, num_constraints)
+        return to_fixed_point(obj_coefficients, self.precision), to_fixed_point(coefficients, self.precision), to_fixed_point(rhs, self.precision)
+
+    def write_instance(self, filepath, rng, num_variables, num_constraints, maximize=True):
+        """Same as generate_sparse_lp, but drawing from rng (see draw_instance) and writing the file in one call."""
+        obj_coefficients, coefficients, rhs = self.draw_instance(rng, num_variables, num_constraints)
+        write_lp_file(filepath, obj_coefficients, coefficients, rhs, self.precision, maximize, write_bounds=True)
+
+    def generate_instances(self, num_variables, num_constraints, num_problems, seed=42, values="fraction", maximize=True):
+        """
+        Yield num_problems problems of one size as GeneratedLP objects, which the solvers take as they are, without any file.
+        Problem i is the one suite_generator.generate_suite writes to {num_variables}x{num_constraints}/{i}.lp with the same seed.
+
+        Args:
+            values: "fraction" (exact, default) or "float", as in LPParser.parse_file.
+        """
+        for seed_sequence in instance_seeds(seed, num_variables, num_constraints, num_problems):
+            lp = GeneratedLP()
+            lp.load_instance(*self.draw_instance(np.random.default_rng(seed_sequence), num_variables, num_constraints), self.precision,
+                             maximize=maximize, write_bounds=True, values=values)
+            yield lp
+
+if __name__ == "__main__":
+    # Example usage:
+    generator = SparseLPGenerator(precision=4, density=0.5)  # 30% density
+    generator.generate_sparse_lp("sparse_problem.lp", num_variables=100, num_constraints=100)
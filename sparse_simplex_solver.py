@@ -0,0 +1,59 @@
+from input_parser import LPParser
+from revised_simplex_solver import RevisedSimplexSolver
+import numpy as np
+import scipy.sparse
+import scipy.sparse.linalg
+
+class SparseSimplexSolver(RevisedSimplexSolver):
+    """
+    Revised simplex method for sparse LPs (e.g. the ones from SparseLPGenerator).
+
+    The constraint matrix is stored in CSC form straight from LPParser.constraints, so
+    memory scales with the number of non-zeros rather than m * (n + m). Pricing is a
+    sparse matrix-vector product with the CSR transpose, entering columns are read
+    straight from the CSC arrays and the basis is factorized with a sparse LU (SuperLU).
+
+    On top of the usual result dictionary, this reports:
+        - constraint_nnz: non-zeros in the constraint matrix (without slack and artificial columns),
+        - max_factor_nnz: largest number of non-zeros in the L and U factors over all refactorizations,
+        - max_fill_in: largest number of non-zeros the factorization added on top of the basis matrix.
+    """
+    def solve_standard_form(self, lp_parser: LPParser):
+        self.max_factor_nnz = 0
+        self.max_fill_in = 0
+
+        final_solution = super().solve_standard_form(lp_parser)
+
+        final_solution["constraint_nnz"] = int(self.A[:, :self.num_variables].nnz)
+        final_solution["max_factor_nnz"] = self.max_factor_nnz
+        final_solution["max_fill_in"] = self.max_fill_in
+
+        return final_solution
+
+    def build_constraint_matrix(self, rows, cols, values, shape):
+        return scipy.sparse.csc_matrix((values, (rows, cols)), shape=shape, dtype=np.float64)
+
+    def columns(self, idxs):
+        if np.isscalar(idxs) or np.ndim(idxs) == 0:
+            # Read a single column straight from the CSC arrays.
+            column = np.zeros(self.num_constraints, dtype=np.float64)
+            start, end = self.A.indptr[idxs], self.A.indptr[idxs + 1]
+            column[self.A.indices[start:end]] = self.A.data[start:end]
+            return column
+
+        return self.A[:, idxs].toarray()
+
+    def refactor(self):
+        basis_matrix = self.A[:, self.basis].tocsc()
+        self.lu = scipy.sparse.linalg.splu(basis_matrix)
+
+        # L and U both store the unit diagonal of L, hence the - num_constraints.
+        factor_nnz = self.lu.L.nnz + self.lu.U.nnz - self.num_constraints
+        self.max_factor_nnz = max(self.max_factor_nnz, factor_nnz)
+        self.max_fill_in = max(self.max_fill_in, factor_nnz - basis_matrix.nnz)
+
+        self.etas = []
+        self.x_basis = self.ftran(self.b)
+
+    def solve_factors(self, rhs, transpose: bool = False):
+        return self.lu.solve(np.asarray(rhs, dtype=np.float64), trans='T' if transpose else 'N')
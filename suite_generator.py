@@ -0,0 +1,69 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from dense_lp_generator import DenseLPGenerator
+from lp_writer import instance_seeds
+from sparse_lp_generator import SparseLPGenerator
+
+# Problems written by one task of the process pool.
+TASK_SIZE = 25
+
+def size_folder_name(num_variables, num_constraints):
+    return f'{num_variables}x{num_constraints}'
+
+def write_instances(generator, tasks):
+    """Write (filepath, seed sequence, num_variables, num_constraints) problems, in a worker process."""
+    for filepath, seed_sequence, num_variables, num_constraints in tasks:
+        generator.write_instance(filepath, np.random.default_rng(seed_sequence), num_variables, num_constraints)
+    return len(tasks)
+
+def generate_suite(generator, root_folder, sizes, num_problems, seed=42, workers=None):
+    """
+    Write num_problems problems per size with generator.write_instance, to root_folder/{n}x{m}/1.lp, ..., spreading
+    the files over a process pool. This is the layout batch_runner.py and the notebooks read.
+
+    Args:
+        generator: A DenseLPGenerator or SparseLPGenerator.
+        sizes: (num_variables, num_constraints) pairs, e.g. [(50, 50), (50, 100)].
+        num_problems: Number of problems per size.
+        seed: Base seed (see instance_seeds).
+        workers: Number of worker processes (default: number of CPUs).
+    """
+    tasks = []
+    for num_variables, num_constraints in sizes:
+        size_folder = os.path.join(root_folder, size_folder_name(num_variables, num_constraints))
+        os.makedirs(size_folder, exist_ok=True)
+        for i, seed_sequence in enumerate(instance_seeds(seed, num_variables, num_constraints, num_problems)):
+            tasks.append((os.path.join(size_folder, f'{i+1}.lp'), seed_sequence, num_variables, num_constraints))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(write_instances, generator, tasks[start:start + TASK_SIZE]) for start in range(0, len(tasks), TASK_SIZE)]
+        for future in as_completed(futures):
+            future.result()
+
+def parse_size(text):
+    """'50x100' -> (50, 100), i.e. (num_variables, num_constraints) as in the folder names."""
+    num_variables, num_constraints = text.lower().split('x')
+    return int(num_variables), int(num_constraints)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a suite of random dense or sparse .lp problems in parallel.")
+    parser.add_argument("path", help="Root directory of the suite.")
+    parser.add_argument("--sizes", nargs="+", type=parse_size, required=True, help="Sizes as NUM_VARIABLESxNUM_CONSTRAINTS, e.g. 50x50 50x100.")
+    parser.add_argument("--num-problems", type=int, default=100, help="Number of problems per size.")
+    parser.add_argument("--generator", choices=["dense", "sparse"], default="dense")
+    parser.add_argument("--density", type=float, default=0.5, help="Density of the sparse generator.")
+    parser.add_argument("--precision", type=int, default=4)
+    parser.add_argument("--allow-negative-rhs", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: number of CPUs).")
+    args = parser.parse_args()
+
+    if args.generator == "dense":
+        generator = DenseLPGenerator(precision=args.precision, allow_negative_rhs=args.allow_negative_rhs)
+    else:
+        generator = SparseLPGenerator(precision=args.precision, allow_negative_rhs=args.allow_negative_rhs, density=args.density)
+    generate_suite(generator, args.path, args.sizes, args.num_problems, seed=args.seed, workers=args.workers)